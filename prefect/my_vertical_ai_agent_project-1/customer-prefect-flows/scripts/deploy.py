@@ -14,7 +14,10 @@ from prefect.server.schemas.schedules import CronSchedule
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from customer_flows.flows.async_flow import example_analysis_flow_async
+from customer_flows.flows.batch_flow import example_batch_analysis_flow
 from customer_flows.flows.example_flow import example_analysis_flow
+from customer_flows.flows.retention_flow import storage_retention_flow
 from customer_flows.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -55,6 +58,7 @@ async def create_deployment(
 def deploy_all(
     work_pool: str = typer.Option("default", help="Work pool name"),
     schedule_example: str = typer.Option(None, help="Cron schedule for example flow"),
+    schedule_retention: str = typer.Option(None, help="Cron schedule for storage retention flow"),
 ):
     """Deploy all flows to Prefect."""
     async def _deploy():
@@ -67,6 +71,24 @@ def deploy_all(
                 "description": "Example analysis flow with CrewAI and LangChain",
                 "schedule": schedule_example,
             },
+            {
+                "flow": example_analysis_flow_async,
+                "name": "example-analysis-async-deployment",
+                "description": "Async example analysis flow; many runs share one event loop",
+                "schedule": None,
+            },
+            {
+                "flow": example_batch_analysis_flow,
+                "name": "example-batch-analysis-deployment",
+                "description": "Example analysis over many documents with mapped tasks",
+                "schedule": None,
+            },
+            {
+                "flow": storage_retention_flow,
+                "name": "storage-retention-deployment",
+                "description": "Expire stored results by age, total size and count",
+                "schedule": schedule_retention,
+            },
         ]
         
         deployment_ids = []
@@ -98,6 +120,9 @@ def deploy_single(
         # Map flow names to functions
         flows = {
             "example_analysis_flow": example_analysis_flow,
+            "example_analysis_flow_async": example_analysis_flow_async,
+            "example_batch_analysis_flow": example_batch_analysis_flow,
+            "storage_retention_flow": storage_retention_flow,
         }
         
         if flow_name not in flows:
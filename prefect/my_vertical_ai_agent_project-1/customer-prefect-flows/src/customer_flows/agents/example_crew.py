@@ -1,18 +1,57 @@
 """CrewAI agent configurations for customer flows with Prefect 3 integration."""
 
+import inspect
+import json
+import sys
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
 
 from crewai import Agent, Crew, Task, Process
-from langchain_openai import ChatOpenAI
 from langchain_community.tools import DuckDuckGoSearchRun
 
 from ..config import get_settings
+from ..storage import canonical_json, content_digest
 from ..utils.logging import bind_flow_context, get_logger
+from .llm_clients import get_llm
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+DEFAULT_LLM_CONFIG = {
+    "model": "gpt-4",
+    "temperature": 0.7,
+    "max_tokens": 2000,
+}
+
+DEFAULT_CREW_CONFIG = {
+    "process": Process.sequential,
+    "verbose": True,
+    "memory": True,
+    "max_rpm": 10,
+}
+
+# Sequential crews run one analysis task; parallel crews split it into one
+# concurrently executed task per facet
+CREW_MODES = ("sequential", "parallel")
+
+ANALYSIS_FACETS = {
+    "structure": "Content structure and organization assessment",
+    "themes": "Key themes and topics identification",
+    "statistics": "Statistical analysis of text properties",
+    "patterns": "Pattern recognition and anomaly detection",
+    "relevance": "Contextual relevance evaluation",
+}
+
+# Placeholders are filled in from the kickoff inputs (see analysis_inputs)
+DATA_SUMMARY = """
+        Data Summary:
+        - Original content: {original}...
+        - Word count: {word_count}
+        - Character count: {character_count}
+        - Processing metadata: {metadata}
+        """
+
 
 class AgentManager:
     """Manages CrewAI agents with enhanced configuration and monitoring."""
@@ -28,20 +67,14 @@ class AgentManager:
         self.settings = get_settings()
         
         # Configure LLM with fallbacks
-        default_config = {
-            "model": "gpt-4",
-            "temperature": 0.7,
-            "max_tokens": 2000,
-        }
+        default_config = dict(DEFAULT_LLM_CONFIG)
         
         if llm_config:
             default_config.update(llm_config)
         
         try:
-            self.llm = ChatOpenAI(
-                openai_api_key=self.settings.openai_api_key,
-                **default_config
-            )
+            # Shared process-wide client; its HTTP connections outlive this manager
+            self.llm = get_llm(default_config)
             self.logger.info("LLM initialized successfully", model=default_config["model"])
         except Exception as e:
             self.logger.error("Failed to initialize LLM", error=str(e))
@@ -107,13 +140,14 @@ class AgentManager:
             return False
 
 
-def create_data_analysis_tasks(data: Dict[str, Any]) -> List[Task]:
+def create_data_analysis_tasks() -> List[Task]:
     """
     Create a comprehensive set of analysis tasks.
     
-    Args:
-        data: Input data for analysis
-        
+    Descriptions contain ``{placeholders}`` that CrewAI fills in from the
+    kickoff inputs (see :func:`analysis_inputs`), so the same tasks serve
+    every input.
+    
     Returns:
         List of configured tasks
     """
@@ -122,21 +156,11 @@ def create_data_analysis_tasks(data: Dict[str, Any]) -> List[Task]:
     
     # Task 1: Primary Data Analysis
     analysis_task = Task(
-        description=f"""
+        description="""
         Perform a comprehensive analysis of the provided data:
-        
-        Data Summary:
-        - Original content: {data.get('original', 'N/A')[:200]}...
-        - Word count: {data.get('word_count', 'N/A')}
-        - Character count: {data.get('character_count', 'N/A')}
-        - Processing metadata: {data.get('metadata', {})}
-        
+        """ + DATA_SUMMARY + """
         Your analysis should include:
-        1. Content structure and organization assessment
-        2. Key themes and topics identification
-        3. Statistical analysis of text properties
-        4. Pattern recognition and anomaly detection
-        5. Contextual relevance evaluation
+        """ + "\n        ".join(f"{i}. {focus}" for i, focus in enumerate(ANALYSIS_FACETS.values(), 1)) + """
         
         Provide detailed findings with supporting evidence.
         """,
@@ -181,70 +205,123 @@ def create_data_analysis_tasks(data: Dict[str, Any]) -> List[Task]:
     return [analysis_task, insight_task, review_task]
 
 
-def create_analysis_crew(data: Optional[Dict[str, Any]] = None, crew_config: Optional[Dict[str, Any]] = None) -> Crew:
+def create_parallel_analysis_tasks() -> List[Task]:
     """
-    Create a comprehensive analysis crew with multiple specialized agents.
+    Create one analysis task per facet followed by the insight and review tasks.
+    
+    The facet tasks are independent and execute asynchronously, so they run
+    at the same time. The insight task takes all facet results as context
+    and is the first to wait for them; the review sees the facet results
+    and the insights.
+    
+    Returns:
+        Facet tasks, then the insight and review tasks
+    """
+    insight_task, review_task = create_data_analysis_tasks()[1:]
+    facet_tasks = [
+        Task(
+            description=f"""
+        Analyze one facet of the provided data: {focus.lower()}.
+        Other analysts cover the remaining facets at the same time.
+        """ + DATA_SUMMARY + """
+        Provide detailed findings with supporting evidence.
+        """,
+            expected_output=f"A focused report on the {facet} of the data with key findings and evidence.",
+            agent=None,  # Will be assigned when creating the crew
+            async_execution=True,
+        )
+        for facet, focus in ANALYSIS_FACETS.items()
+    ]
+    insight_task.context = list(facet_tasks)
+    review_task.context = [*facet_tasks, insight_task]
+    return [*facet_tasks, insight_task, review_task]
+
+
+def analysis_inputs(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the kickoff inputs filling the analysis task placeholders.
     
     Args:
-        data: Input data for analysis (if None, will expect data in kickoff)
-        crew_config: Crew configuration overrides
+        data: Processed data with the original text and its counters
         
     Returns:
-        Configured CrewAI crew
+        Inputs for ``Crew.kickoff``, including the data itself under ``data``
     """
-    crew_logger = bind_flow_context(logger, component="crew_creator")
+    return {
+        "data": data,
+        "original": str(data.get("original", "N/A"))[:200],
+        "word_count": data.get("word_count", "N/A"),
+        "character_count": data.get("character_count", "N/A"),
+        "metadata": json.dumps(data.get("metadata", {}), default=str),
+    }
+
+
+class CrewTemplate:
+    """
+    Agents and placeholder tasks of a crew, built once per process.
+    
+    Building agents is the expensive part of setting up a crew, so a
+    template is built on first use and every run kicks off its own copy.
+    Copies share the agents' LLM clients and tools; each keeps its own task
+    outputs, so concurrent runs do not see each other's results.
+    """
+    
+    def __init__(self, crew: Crew):
+        """
+        Initialize the template.
+        
+        Args:
+            crew: Crew whose task descriptions contain placeholders
+        """
+        self.crew = crew
+    
+    def instantiate(self) -> Crew:
+        """Create a crew for one run; inputs are interpolated at kickoff."""
+        return self.crew.copy()
+
+
+def _build_analysis_crew(crew_config: Dict[str, Any], mode: str = "sequential") -> Crew:
+    """Build the analysis crew's agents and placeholder tasks."""
+    crew_logger = bind_flow_context(logger, component="crew_creator", mode=mode)
     crew_logger.info("Creating analysis crew")
     
     try:
         # Initialize agent manager
         agent_manager = AgentManager()
         
+        if mode == "parallel":
+            tasks = create_parallel_analysis_tasks()
+            # Concurrent facet tasks each need their own analyst
+            analysts = [agent_manager.create_data_analyst_agent() for _ in ANALYSIS_FACETS]
+        else:
+            tasks = create_data_analysis_tasks()
+            analysts = [agent_manager.create_data_analyst_agent()]
+        
         # Create specialized agents
-        data_analyst = agent_manager.create_data_analyst_agent()
         insight_generator = agent_manager.create_insight_generator_agent()
         quality_reviewer = agent_manager.create_quality_reviewer_agent()
         
-        # Create tasks (will be customized based on actual data during execution)
-        default_data = data or {
-            "original": "Sample data",
-            "word_count": 0,
-            "character_count": 0,
-            "metadata": {}
-        }
-        
-        tasks = create_data_analysis_tasks(default_data)
-        
         # Assign agents to tasks
-        tasks[0].agent = data_analyst
-        tasks[1].agent = insight_generator
-        tasks[2].agent = quality_reviewer
-        
-        # Configure crew settings
-        default_crew_config = {
-            "process": Process.sequential,
-            "verbose": True,
-            "memory": True,
-            "max_rpm": 10,
-        }
-        
-        if crew_config:
-            default_crew_config.update(crew_config)
+        for task, analyst in zip(tasks, analysts):
+            task.agent = analyst
+        tasks[-2].agent = insight_generator
+        tasks[-1].agent = quality_reviewer
         
         # Create the crew
         crew = Crew(
-            agents=[data_analyst, insight_generator, quality_reviewer],
+            agents=[*analysts, insight_generator, quality_reviewer],
             tasks=tasks,
-            process=default_crew_config["process"],
-            verbose=default_crew_config["verbose"],
-            memory=default_crew_config["memory"],
-            max_rpm=default_crew_config.get("max_rpm"),
+            process=crew_config["process"],
+            verbose=crew_config["verbose"],
+            memory=crew_config["memory"],
+            max_rpm=crew_config.get("max_rpm"),
         )
         
         crew_logger.info(
             "Analysis crew created successfully",
             agents_count=len(crew.agents),
             tasks_count=len(crew.tasks),
-            process=default_crew_config["process"]
+            process=crew_config["process"]
         )
         
         return crew
@@ -254,9 +331,65 @@ def create_analysis_crew(data: Optional[Dict[str, Any]] = None, crew_config: Opt
         raise
 
 
+@lru_cache(maxsize=16)
+def get_crew_template(mode: str = "sequential", **crew_config: Any) -> CrewTemplate:
+    """
+    Get the process-wide analysis crew template for a configuration.
+    
+    Args:
+        mode: ``sequential`` or ``parallel`` (see :data:`CREW_MODES`)
+        **crew_config: Crew configuration overrides (``max_rpm``, ...)
+        
+    Returns:
+        Template built on the first request for this configuration
+    """
+    if mode not in CREW_MODES:
+        raise ValueError(f"Unsupported crew mode: {mode!r}")
+    return CrewTemplate(_build_analysis_crew({**DEFAULT_CREW_CONFIG, **crew_config}, mode))
+
+
+def create_analysis_crew(crew_config: Optional[Dict[str, Any]] = None, mode: str = "sequential") -> Crew:
+    """
+    Create a comprehensive analysis crew with multiple specialized agents.
+    
+    The crew is a copy of the process-wide template for the configuration;
+    pass :func:`analysis_inputs` of the data to ``kickoff``. In ``parallel``
+    mode the analysis facets run concurrently and only the insight and
+    review stages wait for all of them, so the analysis takes as long as
+    the slowest facet rather than all of them in turn.
+    
+    Args:
+        crew_config: Crew configuration overrides
+        mode: ``sequential`` or ``parallel``
+        
+    Returns:
+        Configured CrewAI crew
+    """
+    return get_crew_template(mode, **(crew_config or {})).instantiate()
+
+
+@lru_cache(maxsize=1)
+def analysis_crew_fingerprint() -> str:
+    """
+    Digest of everything besides the input that shapes an analysis crew's output.
+    
+    Covers the model configuration, the crew process and this module's
+    source, so editing an agent, task prompt or model setting produces a
+    new fingerprint. Rate limits and verbosity are left out.
+    
+    Returns:
+        SHA-256 hex digest
+    """
+    return content_digest(canonical_json({
+        "llm": DEFAULT_LLM_CONFIG,
+        "process": str(DEFAULT_CREW_CONFIG["process"]),
+        "memory": DEFAULT_CREW_CONFIG["memory"],
+        "source": inspect.getsource(sys.modules[__name__]),
+    }))
+
+
 def create_specialized_crew(
     crew_type: str, 
-    data: Optional[Dict[str, Any]] = None,
     config: Optional[Dict[str, Any]] = None
 ) -> Crew:
     """
@@ -264,7 +397,6 @@ def create_specialized_crew(
     
     Args:
         crew_type: Type of crew to create ('analysis', 'research', 'validation', etc.)
-        data: Input data for the crew
         config: Crew-specific configuration
         
     Returns:
@@ -274,27 +406,27 @@ def create_specialized_crew(
     crew_logger.info("Creating specialized crew")
     
     if crew_type == "analysis":
-        return create_analysis_crew(data, config)
+        return create_analysis_crew(config)
     elif crew_type == "research":
         # Create research-focused crew
-        return _create_research_crew(data, config)
+        return _create_research_crew(config)
     elif crew_type == "validation":
         # Create validation-focused crew
-        return _create_validation_crew(data, config)
+        return _create_validation_crew(config)
     else:
         raise ValueError(f"Unsupported crew type: {crew_type}")
 
 
-def _create_research_crew(data: Optional[Dict[str, Any]] = None, config: Optional[Dict[str, Any]] = None) -> Crew:
+def _create_research_crew(config: Optional[Dict[str, Any]] = None) -> Crew:
     """Create a research-focused crew (placeholder for future implementation)."""
     # Implement research crew creation logic
-    return create_analysis_crew(data, config)  # Fallback to analysis crew for now
+    return create_analysis_crew(config)  # Fallback to analysis crew for now
 
 
-def _create_validation_crew(data: Optional[Dict[str, Any]] = None, config: Optional[Dict[str, Any]] = None) -> Crew:
+def _create_validation_crew(config: Optional[Dict[str, Any]] = None) -> Crew:
     """Create a validation-focused crew (placeholder for future implementation)."""
     # Implement validation crew creation logic
-    return create_analysis_crew(data, config)  # Fallback to analysis crew for now
+    return create_analysis_crew(config)  # Fallback to analysis crew for now
 
 
 # Utility functions for crew management
@@ -303,18 +435,26 @@ def get_crew_metrics(crew: Crew) -> Dict[str, Any]:
     """
     Get performance metrics for a crew.
     
+    Latency and cost across runs are kept in the metrics history; see the
+    ``customer-flows stats`` command.
+    
     Args:
         crew: The crew to analyze
         
     Returns:
-        Dictionary containing crew metrics
+        Dictionary containing crew metrics, with the token usage of its
+        last kickoff when CrewAI reports it
     """
-    return {
+    metrics = {
         "agents_count": len(crew.agents),
         "tasks_count": len(crew.tasks),
         "process_type": str(crew.process),
         "created_at": datetime.now(timezone.utc).isoformat(),
     }
+    usage = getattr(crew, "usage_metrics", None)
+    if usage is not None:
+        metrics["usage_metrics"] = usage.model_dump() if hasattr(usage, "model_dump") else dict(usage)
+    return metrics
 
 
 def validate_crew_configuration(crew: Crew) -> Dict[str, Any]:
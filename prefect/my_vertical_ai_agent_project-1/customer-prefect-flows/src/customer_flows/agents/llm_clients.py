@@ -0,0 +1,199 @@
+"""Process-wide LLM clients sharing one pooled HTTP client per provider."""
+
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from ..config import get_settings
+from ..storage import canonical_json
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+PROVIDERS = ("openai",)
+
+
+class LLMClientRegistry:
+    """
+    LLM clients keyed by their model configuration.
+
+    Every configuration of a provider talks to it through the same pooled
+    ``httpx.Client``, so crews and chains built per task run reuse open
+    keep-alive connections instead of paying a TCP and TLS handshake for
+    each new client. The clients are thread-safe and shared by all task
+    runs in the process.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.openai.com/v1",
+        max_connections: int = 8,
+        keepalive_expiry: float = 120.0,
+        timeout: float = 120.0,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            api_key: OpenAI API key
+            base_url: OpenAI API base URL
+            max_connections: Pooled connections per provider, all kept alive while idle
+            keepalive_expiry: Seconds an idle connection is kept open
+            timeout: Per-request timeout in seconds
+        """
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._http: Dict[str, httpx.Client] = {}
+        self._llms: Dict[str, Any] = {}
+        self._warming: Dict[str, threading.Thread] = {}
+        self._closed = False
+
+    def http_client(self, provider: str = "openai") -> httpx.Client:
+        """Get the pooled HTTP client of a provider, creating it on first use."""
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unsupported LLM provider: {provider!r}")
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("LLM client registry is closed")
+            if provider not in self._http:
+                self._http[provider] = httpx.Client(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        keepalive_expiry=self.keepalive_expiry,
+                    ),
+                )
+            return self._http[provider]
+
+    def get(self, llm_config: Dict[str, Any]) -> Any:
+        """
+        Get the client for a model configuration.
+
+        Args:
+            llm_config: Model settings passed to the client (``model``,
+                ``temperature``, ...), optionally with a ``provider``
+
+        Returns:
+            The client shared by every caller with the same configuration
+        """
+        config = dict(llm_config)
+        provider = config.pop("provider", "openai")
+        key = canonical_json({"provider": provider, **config})
+        with self._lock:
+            llm = self._llms.get(key)
+        if llm is not None:
+            return llm
+
+        http_client = self.http_client(provider)
+        llm = ChatOpenAI(
+            openai_api_key=self.api_key,
+            openai_api_base=self.base_url,
+            http_client=http_client,
+            **config,
+        )
+        with self._lock:
+            # Two threads may build the same client; keep the first
+            llm = self._llms.setdefault(key, llm)
+        logger.debug("LLM client created", provider=provider, model=config.get("model"))
+        return llm
+
+    def warm(self, provider: str = "openai", connections: Optional[int] = None) -> int:
+        """
+        Open pooled connections to a provider ahead of the first LLM call.
+
+        Concurrent requests to the provider's model listing each open a
+        connection, which stays in the pool for later calls whatever the
+        response status.
+
+        Args:
+            provider: Provider to connect to
+            connections: Connections to open (defaults to the pool size)
+
+        Returns:
+            Number of connections that got a response
+        """
+        client = self.http_client(provider)
+        connections = min(connections or self.max_connections, self.max_connections)
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+        def connect(_: int) -> bool:
+            try:
+                client.get(f"{self.base_url}/models", headers=headers)
+                return True
+            except httpx.HTTPError as e:
+                logger.debug("LLM connection warm-up failed", provider=provider, error=str(e))
+                return False
+
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="llm-warmup") as pool:
+            warmed = sum(pool.map(connect, range(connections)))
+        logger.info("LLM connections warmed", provider=provider, connections=warmed)
+        return warmed
+
+    def warm_in_background(self, provider: str = "openai") -> threading.Thread:
+        """Warm a provider's connections once per registry from a daemon thread."""
+        with self._lock:
+            thread = self._warming.get(provider)
+            if thread is None:
+                thread = threading.Thread(
+                    target=self._warm_quietly, args=(provider,), name=f"llm-warmup-{provider}", daemon=True
+                )
+                self._warming[provider] = thread
+                thread.start()
+        return thread
+
+    def _warm_quietly(self, provider: str) -> None:
+        # Warm-up is an optimization; the registry may also close underneath it
+        try:
+            self.warm(provider)
+        except Exception as e:
+            logger.warning("LLM connection warm-up failed", provider=provider, error=str(e))
+
+    def close(self) -> None:
+        """Close the pooled HTTP clients and drop the LLM clients."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            clients = list(self._http.values())
+            self._http.clear()
+            self._llms.clear()
+        for client in clients:
+            client.close()
+
+
+@lru_cache(maxsize=1)
+def get_llm_registry() -> LLMClientRegistry:
+    """Get the process-wide registry configured from settings."""
+    settings = get_settings()
+    registry = LLMClientRegistry(
+        api_key=settings.openai_api_key,
+        base_url=settings.openai_base_url,
+        max_connections=settings.llm_pool_connections or 2 * settings.llm_max_concurrency,
+        keepalive_expiry=settings.llm_keepalive_expiry,
+        timeout=settings.llm_request_timeout,
+    )
+    atexit.register(registry.close)
+    return registry
+
+
+def get_llm(llm_config: Dict[str, Any]) -> Any:
+    """Get the process-wide client for a model configuration."""
+    return get_llm_registry().get(llm_config)
+
+
+def prewarm_llm_clients() -> None:
+    """Warm the provider connections in the background unless ``LLM_PREWARM`` is off."""
+    if get_settings().llm_prewarm:
+        get_llm_registry().warm_in_background()
@@ -0,0 +1,69 @@
+"""Process-wide limits on concurrent LLM work."""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Iterator
+
+from ..config import get_settings
+
+
+class LLMConcurrencyLimit:
+    """
+    Cap on crews talking to the LLM provider at the same time.
+
+    The provider's requests-per-minute budget is split evenly between the
+    crews allowed to run at once, and each crew enforces its share through
+    CrewAI's ``max_rpm``. Running more tasks concurrently therefore never
+    exceeds the account's rate limit; extra crews wait for a slot.
+    """
+
+    def __init__(self, max_concurrency: int = 4, requests_per_minute: int = 40):
+        """
+        Initialize the limit.
+
+        Args:
+            max_concurrency: Crews allowed to run at once
+            requests_per_minute: LLM requests per minute shared by all crews
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    @property
+    def crew_max_rpm(self) -> int:
+        """Requests per minute each concurrently running crew may make."""
+        return max(1, self.requests_per_minute // self.max_concurrency)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one of the concurrency slots while running a crew."""
+        with self._slots:
+            yield
+
+    @asynccontextmanager
+    async def slot_async(self, poll_interval: float = 0.05) -> AsyncIterator[None]:
+        """
+        Hold a slot from a coroutine without blocking the event loop.
+
+        Sync and async crews draw from the same slots.
+
+        Args:
+            poll_interval: Seconds between attempts while all slots are taken
+        """
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+@lru_cache(maxsize=1)
+def get_llm_limit() -> LLMConcurrencyLimit:
+    """Get the process-wide limit configured from settings."""
+    settings = get_settings()
+    return LLMConcurrencyLimit(settings.llm_max_concurrency, settings.llm_requests_per_minute)
@@ -3,9 +3,8 @@
 from typing import Any, Dict, List
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 from langchain.schema import BaseOutputParser
-from config import settings
+from ..agents.llm_clients import get_llm
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -44,11 +43,7 @@ def create_analysis_chain() -> LLMChain:
     """
     logger.info("Creating analysis chain")
     
-    llm = ChatOpenAI(
-        model="gpt-4",
-        openai_api_key=settings.openai_api_key,
-        temperature=0.1
-    )
+    llm = get_llm({"model": "gpt-4", "temperature": 0.1})
     
     prompt = PromptTemplate(
         input_variables=["data", "analysis_type"],
@@ -96,11 +91,7 @@ def create_summarization_chain() -> LLMChain:
     """
     logger.info("Creating summarization chain")
     
-    llm = ChatOpenAI(
-        model="gpt-3.5-turbo",  # Using faster model for summarization
-        openai_api_key=settings.openai_api_key,
-        temperature=0.3
-    )
+    llm = get_llm({"model": "gpt-3.5-turbo", "temperature": 0.3})  # Using faster model for summarization
     
     prompt = PromptTemplate(
         input_variables=["text", "max_length"],
@@ -134,11 +125,7 @@ def create_classification_chain() -> LLMChain:
     """
     logger.info("Creating classification chain")
     
-    llm = ChatOpenAI(
-        model="gpt-3.5-turbo",
-        openai_api_key=settings.openai_api_key,
-        temperature=0.1
-    )
+    llm = get_llm({"model": "gpt-3.5-turbo", "temperature": 0.1})
     
     prompt = PromptTemplate(
         input_variables=["text", "categories"],
@@ -184,11 +171,7 @@ def create_qa_chain() -> LLMChain:
     """
     logger.info("Creating Q&A chain")
     
-    llm = ChatOpenAI(
-        model="gpt-4",
-        openai_api_key=settings.openai_api_key,
-        temperature=0.2
-    )
+    llm = get_llm({"model": "gpt-4", "temperature": 0.2})
     
     prompt = PromptTemplate(
         input_variables=["context", "question"],
@@ -223,11 +206,7 @@ def create_extraction_chain() -> LLMChain:
     """
     logger.info("Creating extraction chain")
     
-    llm = ChatOpenAI(
-        model="gpt-4",
-        openai_api_key=settings.openai_api_key,
-        temperature=0.1
-    )
+    llm = get_llm({"model": "gpt-4", "temperature": 0.1})
     
     prompt = PromptTemplate(
         input_variables=["text", "entities"],
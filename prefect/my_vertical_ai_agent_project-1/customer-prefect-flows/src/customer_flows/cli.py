@@ -14,8 +14,11 @@ from rich import print as rprint
 
 from .config import get_settings
 from .utils.logging import configure_logging, get_logger
+from .flows.async_flow import example_analysis_flow_async
+from .flows.batch_flow import example_batch_analysis_flow
 from .flows.example_flow import example_analysis_flow
-from .agents.example_crew import create_analysis_crew, validate_crew_configuration
+from .flows.retention_flow import storage_retention_flow
+from .agents.example_crew import analysis_inputs, create_analysis_crew, validate_crew_configuration
 
 # Initialize CLI app
 app = typer.Typer(
@@ -28,6 +31,13 @@ console = Console()
 logger = get_logger(__name__)
 
 
+def _json_default(value: Any) -> Any:
+    """Serialize flow result objects such as ProcessedText for display."""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return str(value)
+
+
 def setup_cli():
     """Initialize CLI environment."""
     configure_logging()
@@ -59,8 +69,11 @@ def info():
 @app.command()
 def run_flow(
     flow_name: str = typer.Argument("example-analysis-flow", help="Name of the flow to run"),
-    input_data: str = typer.Option("Sample data for analysis", "--input", "-i", help="Input data for the flow"),
+    input_data: str = typer.Option("Sample data for analysis", "--input", "-i", help="Input data for the flow, or a file:// or s3:// URI to read it from"),
     save_results: bool = typer.Option(True, "--save/--no-save", help="Whether to save results"),
+    refresh: bool = typer.Option(False, "--refresh", help="Ignore cached task results and recompute them"),
+    use_async: bool = typer.Option(False, "--async", help="Run the async variant of the flow"),
+    parallel_crew: bool = typer.Option(False, "--parallel-crew", help="Run the crew's analysis facets concurrently"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Enable verbose output"),
 ):
     """Run a specific flow with given parameters."""
@@ -69,11 +82,17 @@ def run_flow(
     with console.status("[bold green]Running flow...", spinner="dots"):
         try:
             if flow_name == "example-analysis-flow":
-                result = example_analysis_flow(input_data, save_results)
+                crew_mode = "parallel" if parallel_crew else None
+                if use_async:
+                    result = asyncio.run(
+                        example_analysis_flow_async(input_data, save_results, refresh_cache=refresh, crew_mode=crew_mode)
+                    )
+                else:
+                    result = example_analysis_flow(input_data, save_results, refresh_cache=refresh, crew_mode=crew_mode)
                 
                 if verbose:
                     console.print("\n[bold green]Flow completed successfully![/bold green]")
-                    console.print(Panel(json.dumps(result, indent=2), title="Flow Result"))
+                    console.print(Panel(json.dumps(result, indent=2, default=_json_default), title="Flow Result"))
                 else:
                     console.print(f"[bold green]✓[/bold green] Flow completed. Status: {result.get('status', 'unknown')}")
                     if result.get('storage_location'):
@@ -89,6 +108,62 @@ def run_flow(
             raise typer.Exit(1)
 
 
+@app.command()
+def run_batch(
+    inputs: List[str] = typer.Argument(None, help="Input documents"),
+    input_file: Optional[Path] = typer.Option(None, "--file", "-f", help="JSONL file of input documents"),
+    concurrency: Optional[int] = typer.Option(None, "--concurrency", "-c", help="Task runs executed concurrently (defaults to BATCH_MAX_WORKERS)"),
+    save_results: bool = typer.Option(True, "--save/--no-save", help="Whether to save results"),
+    refresh: bool = typer.Option(False, "--refresh", help="Ignore cached task results and recompute them"),
+    parallel_crew: bool = typer.Option(False, "--parallel-crew", help="Run each crew's analysis facets concurrently"),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Enable verbose output"),
+):
+    """Run the example analysis over a batch of documents."""
+    setup_cli()
+    
+    if bool(inputs) == bool(input_file):
+        console.print("[bold red]Error:[/bold red] Pass either input documents or --file")
+        raise typer.Exit(1)
+    
+    batch_flow = example_batch_analysis_flow
+    if concurrency:
+        from .flows.task_runners import HybridTaskRunner
+        
+        settings = get_settings()
+        batch_flow = batch_flow.with_options(
+            task_runner=HybridTaskRunner(max_workers=concurrency, process_workers=settings.process_pool_workers)
+        )
+    
+    with console.status("[bold green]Running batch flow...", spinner="dots"):
+        try:
+            result = batch_flow(
+                str(input_file) if input_file else inputs,
+                save_results,
+                refresh_cache=refresh,
+                crew_mode="parallel" if parallel_crew else None,
+            )
+        except Exception as e:
+            console.print(f"[bold red]Batch flow failed:[/bold red] {e}")
+            if verbose:
+                console.print_exception()
+            raise typer.Exit(1)
+    
+    if verbose:
+        console.print(Panel(json.dumps(result, indent=2, default=_json_default), title="Batch Result"))
+    
+    summary = result["summary"]
+    console.print(
+        f"[bold green]✓[/bold green] Batch completed. Status: {result['status']} "
+        f"({summary['completed']} of {summary['total']} documents)"
+    )
+    for item in result["results"]:
+        if item["error"]:
+            console.print(f"  [red]• Document {item['index']}: {item['error']}[/red]")
+    
+    if summary["failed"]:
+        raise typer.Exit(1)
+
+
 @app.command()
 def list_flows():
     """List all available flows."""
@@ -100,6 +175,24 @@ def list_flows():
             "description": "Example flow using CrewAI and LangChain with Prefect 3",
             "version": "1.0.0",
             "status": "Active"
+        },
+        {
+            "name": "example-analysis-flow-async",
+            "description": "Async example analysis flow; many runs share one event loop",
+            "version": "1.0.0",
+            "status": "Active"
+        },
+        {
+            "name": "example-batch-analysis-flow",
+            "description": "Example analysis over many documents with mapped tasks",
+            "version": "1.0.0",
+            "status": "Active"
+        },
+        {
+            "name": "storage-retention-flow",
+            "description": "Expire stored results by age, total size and count",
+            "version": "1.0.0",
+            "status": "Active"
         }
     ]
     
@@ -141,7 +234,7 @@ def test_crew(
             }
             
             # Create crew
-            crew = create_analysis_crew(test_data)
+            crew = create_analysis_crew()
             
             # Validate crew configuration
             validation_result = validate_crew_configuration(crew)
@@ -167,7 +260,7 @@ def test_crew(
             
             if not validate_only and validation_result["is_valid"]:
                 console.print("\n[bold green]Running crew test...[/bold green]")
-                result = crew.kickoff({"data": test_data})
+                result = crew.kickoff(analysis_inputs(test_data))
                 console.print("[bold green]✓[/bold green] Crew test completed successfully")
                 console.print(Panel(str(result)[:500] + "..." if len(str(result)) > 500 else str(result), title="Crew Result"))
             
@@ -177,6 +270,127 @@ def test_crew(
             raise typer.Exit(1)
 
 
+@app.command()
+def retention(
+    max_age_days: Optional[float] = typer.Option(None, "--max-age-days", help="Remove results older than this many days"),
+    max_size_mb: Optional[float] = typer.Option(None, "--max-size-mb", help="Remove the oldest results until the total size fits"),
+    max_entries: Optional[int] = typer.Option(None, "--max-entries", help="Remove the oldest results until the count fits"),
+    flow: Optional[str] = typer.Option(None, "--flow", "-f", help="Only expire this flow's results"),
+    compact: Optional[bool] = typer.Option(None, "--compact/--delete", help="Compact expired results into the archive instead of deleting them"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only show what would be removed"),
+    reindex: bool = typer.Option(False, "--reindex", help="Index results stored before the index existed first"),
+):
+    """Expire stored results by age, total size and count."""
+    setup_cli()
+    settings = get_settings()
+    
+    if reindex:
+        from .storage import get_result_index, rebuild_index
+        
+        storage_dir = Path(settings.storage_dir)
+        with console.status("[bold green]Indexing stored results...", spinner="dots"):
+            indexed = rebuild_index(
+                get_result_index(),
+                storage_dir / "results",
+                Path(settings.archive_dir) if settings.archive_dir else storage_dir / "archive",
+                storage_dir / "payloads",
+            )
+        console.print(f"[bold green]✓[/bold green] Indexed {indexed} stored files")
+    
+    with console.status("[bold green]Enforcing retention...", spinner="dots"):
+        try:
+            summary = storage_retention_flow(
+                max_age_days=max_age_days,
+                max_total_bytes=int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None,
+                max_entries=max_entries,
+                flow_name=flow,
+                compact=compact,
+                dry_run=dry_run,
+            )
+        except Exception as e:
+            console.print(f"[bold red]Retention failed:[/bold red] {e}")
+            raise typer.Exit(1)
+    
+    table = Table(title="Retention Summary" + (" (dry run)" if dry_run else ""))
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="magenta")
+    
+    table.add_row("Expired entries", str(summary["expired_entries"]))
+    table.add_row("Expired size", f"{summary['expired_bytes'] / (1024 * 1024):.2f} MB")
+    table.add_row("Removed entries", str(summary["removed_entries"]))
+    table.add_row("Compacted entries", str(summary["compacted_entries"]))
+    table.add_row("Expired checkpoint runs", str(summary["expired_checkpoint_runs"]))
+    table.add_row("Failed cleanups", str(len(summary["failed_cleanups"])))
+    table.add_row("Remaining entries", str(summary["remaining"]["entries"]))
+    table.add_row("Remaining size", f"{summary['remaining']['bytes'] / (1024 * 1024):.2f} MB")
+    
+    console.print(table)
+    
+    if summary["failed_cleanups"]:
+        raise typer.Exit(1)
+
+
+def _seconds(value: Optional[float]) -> str:
+    return f"{value:.2f}s" if value is not None else "-"
+
+
+@app.command()
+def stats(
+    window: str = typer.Option("24h", "--window", "-w", help="Time window, e.g. 30m, 24h or 7d"),
+    by: Optional[str] = typer.Option(None, "--by", "-b", help="Only report per flow, task or model"),
+    flow: Optional[str] = typer.Option(None, "--flow", "-f", help="Only include runs of this flow"),
+    as_json: bool = typer.Option(False, "--json", help="Print the report as JSON"),
+):
+    """Report latency percentiles, throughput and token cost from the metrics history."""
+    from .metrics import GROUPINGS, get_metrics_history, parse_window
+    
+    setup_cli()
+    
+    try:
+        window_seconds = parse_window(window)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+        raise typer.Exit(1)
+    if by is not None and by not in GROUPINGS:
+        console.print(f"[bold red]Error:[/bold red] --by must be one of {', '.join(GROUPINGS)}")
+        raise typer.Exit(1)
+    
+    history = get_metrics_history()
+    report = {
+        grouping: history.stats(by=grouping, window_seconds=window_seconds, flow=flow)
+        for grouping in ([by] if by else GROUPINGS)
+    }
+    
+    if as_json:
+        console.print_json(json.dumps(report))
+        return
+    
+    for grouping, rows in report.items():
+        table = Table(title=f"Per {grouping} (last {window})")
+        table.add_column(grouping.capitalize(), style="cyan")
+        for column in ("Runs", "Failed", "p50", "p95", "p99", "Runs/h", "Tokens", "Cost"):
+            table.add_column(column, style="magenta", justify="right")
+        
+        for row in rows:
+            tokens = row["prompt_tokens"] + row["completion_tokens"]
+            table.add_row(
+                str(row[grouping]),
+                str(row["runs"]),
+                str(row["failed"]),
+                _seconds(row["p50"]),
+                _seconds(row["p95"]),
+                _seconds(row["p99"]),
+                f"{row['throughput']:.2f}",
+                str(tokens),
+                f"${row['cost']:.4f}" if row["cost"] is not None else "-",
+            )
+        
+        if rows:
+            console.print(table)
+        else:
+            console.print(f"[dim]No {grouping} runs recorded in the last {window}[/dim]")
+
+
 @app.command()
 def deploy(
     environment: str = typer.Option("development", "--env", "-e", help="Deployment environment"),
@@ -195,6 +409,24 @@ def deploy(
             "deployment_name": f"example-analysis-{environment}",
             "work_pool": work_pool,
             "tags": [environment, "customer-flows", "crewai"],
+        },
+        {
+            "flow_name": "example-analysis-flow-async",
+            "deployment_name": f"example-analysis-async-{environment}",
+            "work_pool": work_pool,
+            "tags": [environment, "customer-flows", "crewai", "async"],
+        },
+        {
+            "flow_name": "example-batch-analysis-flow",
+            "deployment_name": f"example-batch-analysis-{environment}",
+            "work_pool": work_pool,
+            "tags": [environment, "customer-flows", "crewai", "batch"],
+        },
+        {
+            "flow_name": "storage-retention-flow",
+            "deployment_name": f"storage-retention-{environment}",
+            "work_pool": work_pool,
+            "tags": [environment, "customer-flows", "maintenance"],
         }
     ]
     
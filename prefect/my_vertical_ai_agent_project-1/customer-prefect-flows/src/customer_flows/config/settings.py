@@ -2,9 +2,9 @@
 
 import os
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseSettings, Field
+from pydantic import BaseSettings, Field, validator
 
 
 class Settings(BaseSettings):
@@ -25,6 +25,38 @@ class Settings(BaseSettings):
         default=None,
         description="OpenAI API key"
     )
+    llm_max_concurrency: int = Field(
+        default=4,
+        description="Crew analyses allowed to call the LLM provider at the same time"
+    )
+    llm_requests_per_minute: int = Field(
+        default=40,
+        description="LLM requests per minute shared by concurrently running crews"
+    )
+    openai_base_url: str = Field(
+        default="https://api.openai.com/v1",
+        description="OpenAI API base URL"
+    )
+    llm_pool_connections: Optional[int] = Field(
+        default=None,
+        description="Pooled HTTP connections per LLM provider (defaults to twice llm_max_concurrency)"
+    )
+    llm_keepalive_expiry: float = Field(
+        default=120.0,
+        description="Seconds an idle pooled LLM connection is kept open"
+    )
+    llm_request_timeout: float = Field(
+        default=120.0,
+        description="Timeout in seconds for each LLM request"
+    )
+    llm_prewarm: bool = Field(
+        default=True,
+        description="Open pooled LLM connections in the background when the first flow run starts"
+    )
+    crew_mode: str = Field(
+        default="sequential",
+        description="Analysis crew mode: sequential, or parallel to run the analysis facets concurrently"
+    )
     
     # LangChain settings
     langchain_tracing_v2: bool = Field(
@@ -55,6 +87,208 @@ class Settings(BaseSettings):
         default=None,
         description="Database URL for persistence"
     )
+    database_pool_size: int = Field(
+        default=5,
+        description="Maximum pooled connections per database URL"
+    )
+    database_batch_size: int = Field(
+        default=500,
+        description="Rows per bulk insert when persisting results to the database"
+    )
+    database_flush_interval: float = Field(
+        default=0.2,
+        description="Maximum seconds a result waits in the insert buffer before being flushed"
+    )
+    database_wait_for_commit: bool = Field(
+        default=False,
+        description="Block each database write until its batch is committed (adds up to the flush interval per write)"
+    )
+    storage_dir: str = Field(
+        default="./storage",
+        description="Root directory for locally stored results and statistics"
+    )
+    payload_ref_threshold: Optional[int] = Field(
+        default=256 * 1024,
+        description="Pickled size in bytes above which task payloads are passed by reference (unset disables)"
+    )
+    payload_cache_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        description="Pickled bytes of loaded task payloads kept in memory per process (0 disables)"
+    )
+    s3_bucket: Optional[str] = Field(
+        default=None,
+        description="Bucket used by the s3 result backend"
+    )
+    s3_prefix: str = Field(
+        default="customer-flows/results",
+        description="Key prefix for results stored in S3"
+    )
+    s3_endpoint_url: Optional[str] = Field(
+        default=None,
+        description="Endpoint for S3-compatible object stores (e.g. MinIO)"
+    )
+    archive_dir: Optional[str] = Field(
+        default=None,
+        description="Root of the partitioned result archive (defaults to <storage_dir>/archive)"
+    )
+    archive_codec: str = Field(
+        default="zstd",
+        description="Compression codec for archive segments (zstd or gzip)"
+    )
+    archive_segment_bytes: int = Field(
+        default=128 * 1024 * 1024,
+        description="Compressed size at which an archive segment is rolled over"
+    )
+    retention_max_age_days: Optional[float] = Field(
+        default=None,
+        description="Remove stored results older than this many days"
+    )
+    retention_max_bytes: Optional[int] = Field(
+        default=None,
+        description="Remove the oldest stored results until their total size fits"
+    )
+    retention_max_entries: Optional[int] = Field(
+        default=None,
+        description="Remove the oldest stored results until their count fits"
+    )
+    checkpoint_max_age_days: Optional[float] = Field(
+        default=7.0,
+        description="Delete checkpoints of failed runs not resumed within this many days"
+    )
+    retention_compact: bool = Field(
+        default=False,
+        description="Compact expired result blobs into the archive instead of deleting them"
+    )
+    persistence_max_workers: int = Field(
+        default=8,
+        description="Threads used to write results to storage backends concurrently"
+    )
+    write_behind: bool = Field(
+        default=False,
+        description="Acknowledge persistence once the primary backend commits and flush the rest in the background"
+    )
+    
+    # Task cache settings
+    process_data_cache_ttl: Optional[int] = Field(
+        default=24 * 3600,
+        description="Seconds processed data is reused for identical input (unset never expires)"
+    )
+    crew_analysis_cache_ttl: Optional[int] = Field(
+        default=7 * 24 * 3600,
+        description="Seconds a crew analysis is reused for identical data and crew configuration (unset never expires)"
+    )
+    
+    # Batch settings
+    batch_max_workers: int = Field(
+        default=16,
+        description="Task runs executed concurrently by batch flows"
+    )
+    process_pool_workers: Optional[int] = Field(
+        default=None,
+        description="Worker processes for CPU-bound tasks in batch flows (defaults to the CPU count)"
+    )
+    
+    # Notification settings
+    smtp_host: Optional[str] = Field(
+        default=None,
+        description="SMTP server for email notifications"
+    )
+    smtp_port: int = Field(
+        default=587,
+        description="SMTP server port"
+    )
+    smtp_username: Optional[str] = Field(
+        default=None,
+        description="SMTP username"
+    )
+    smtp_password: Optional[str] = Field(
+        default=None,
+        description="SMTP password"
+    )
+    smtp_starttls: bool = Field(
+        default=True,
+        description="Upgrade SMTP connections with STARTTLS"
+    )
+    smtp_sender: str = Field(
+        default="customer-flows@localhost",
+        description="From address for email notifications"
+    )
+    slack_bot_token: Optional[str] = Field(
+        default=None,
+        description="Slack bot token for chat.postMessage"
+    )
+    slack_api_url: str = Field(
+        default="https://slack.com/api",
+        description="Slack Web API base URL"
+    )
+    notification_max_concurrency: int = Field(
+        default=100,
+        description="Maximum notification sends in flight at once"
+    )
+    notification_coalesce_window: float = Field(
+        default=0.0,
+        description="Seconds to merge non-urgent notifications per recipient into a digest (0 disables)"
+    )
+    notification_timeout: float = Field(
+        default=10.0,
+        description="Timeout in seconds for each notification request"
+    )
+    
+    # Metrics settings
+    metrics_port: Optional[int] = Field(
+        default=None,
+        description="Port of the Prometheus metrics endpoint started with the first flow run (unset disables)"
+    )
+    metrics_host: str = Field(
+        default="127.0.0.1",
+        description="Address the metrics endpoint binds to"
+    )
+    metrics_history: bool = Field(
+        default=True,
+        description="Append flow and task run metrics to the SQLite history"
+    )
+    metrics_db_path: Optional[str] = Field(
+        default=None,
+        description="Metrics history database (defaults to <storage_dir>/metrics.db)"
+    )
+    llm_token_prices: Dict[str, List[float]] = Field(
+        default_factory=dict,
+        description="USD per 1K prompt and completion tokens by model, overriding the built-in prices"
+    )
+    
+    # Preprocessing settings
+    keyword_stats_path: Optional[str] = Field(
+        default=None,
+        description="Keyword IDF statistics file (defaults to <storage_dir>/keyword_idf.json)"
+    )
+    keyword_max_vocabulary: int = Field(
+        default=100_000,
+        description="Maximum number of terms kept in the keyword IDF statistics"
+    )
+    
+    @validator(
+        "payload_ref_threshold",
+        "retention_max_age_days",
+        "retention_max_bytes",
+        "retention_max_entries",
+        "checkpoint_max_age_days",
+        "process_data_cache_ttl",
+        "crew_analysis_cache_ttl",
+        "process_pool_workers",
+        "metrics_port",
+        "llm_pool_connections",
+        pre=True,
+    )
+    def empty_as_unset(cls, value):
+        """Treat empty optional limits (``RETENTION_MAX_BYTES=``) as unset."""
+        return None if value == "" else value
+    
+    @validator("crew_mode")
+    def known_crew_mode(cls, value):
+        """Reject crew modes the analysis crew does not support."""
+        if value not in ("sequential", "parallel"):
+            raise ValueError("crew_mode must be sequential or parallel")
+        return value
     
     class Config:
         """Pydantic config."""
@@ -0,0 +1,298 @@
+"""Async variant of the example analysis flow."""
+
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from prefect import flow, task
+from prefect.transactions import transaction
+
+from ..agents.example_crew import DEFAULT_LLM_CONFIG, analysis_inputs, create_analysis_crew
+from ..agents.llm_clients import prewarm_llm_clients
+from ..agents.rate_limits import get_llm_limit
+from ..config import get_settings
+from ..metrics import collect_task_metrics, finish_task_run, instrumented, record_llm_usage
+from ..processing import ProcessedText
+from ..storage import PayloadRef, get_checkpoint_store, load_payload, offload_payload, payload_available, read_input
+from ..utils.logging import bind_flow_context, get_logger
+from .caching import cache_expiration
+from .example_flow import (
+    CREW_ANALYSIS_CACHE_POLICY,
+    PROCESS_DATA_CACHE_POLICY,
+    PROCESSOR_METADATA,
+    analysis_run_key,
+    save_results,
+    validate_results,
+)
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@task(
+    name="process-input-data-async",
+    description="Process raw input data into structured format off the event loop",
+    retries=3,
+    retry_delay_seconds=10,
+    cache_policy=PROCESS_DATA_CACHE_POLICY,
+    cache_expiration=cache_expiration(settings.process_data_cache_ttl),
+    persist_result=True,
+    tags=["data", "preprocessing"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
+)
+@instrumented
+async def process_data_async(raw_data: Union[str, PayloadRef]) -> Union[ProcessedText, PayloadRef]:
+    """
+    Process raw input data in a worker thread.
+
+    Shares its cache entries with the sync ``process_data`` task.
+
+    Args:
+        raw_data: Raw input data string, or a reference to one
+
+    Returns:
+        Processed data mapping, or a reference to it
+    """
+    raw_data = await asyncio.to_thread(load_payload, raw_data)
+    task_logger = bind_flow_context(logger, task="process_data_async", data_length=len(raw_data))
+    task_logger.info("Processing raw data")
+
+    try:
+        # Text scanning is CPU-bound; keep the event loop free for other runs
+        processed = await asyncio.to_thread(
+            ProcessedText,
+            raw_data,
+            derived=("uppercase", "lowercase"),
+            metadata=dict(PROCESSOR_METADATA),
+        )
+
+        task_logger.info("Data processing successful", processed_items=len(processed))
+        return await asyncio.to_thread(offload_payload, processed)
+
+    except Exception as e:
+        task_logger.error("Data processing failed", error=str(e))
+        raise
+
+
+@task(
+    name="run-crew-analysis-async",
+    description="Execute CrewAI analysis on processed data with kickoff_async",
+    retries=2,
+    retry_delay_seconds=30,
+    cache_policy=CREW_ANALYSIS_CACHE_POLICY,
+    cache_expiration=cache_expiration(settings.crew_analysis_cache_ttl),
+    persist_result=True,
+    tags=["crewai", "llm"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
+)
+@instrumented
+async def run_crew_analysis_async(
+    processed_data: Union[Dict[str, Any], PayloadRef],
+    crew_mode: str = "sequential",
+) -> Any:
+    """
+    Run CrewAI analysis without blocking the event loop.
+
+    Waits for a slot of the process-wide LLM limit, which sync and async
+    crews share, and shares its cache entries with ``run_crew_analysis``.
+
+    Args:
+        processed_data: Previously processed data, or a reference to it
+        crew_mode: ``sequential`` or ``parallel``
+
+    Returns:
+        Analysis results from CrewAI
+    """
+    task_logger = bind_flow_context(logger, task="crew_analysis_async")
+    task_logger.info("Starting CrewAI analysis")
+
+    try:
+        processed_data = await asyncio.to_thread(load_payload, processed_data)
+        if isinstance(processed_data, ProcessedText):
+            processed_data = processed_data.to_dict()
+
+        limit = get_llm_limit()
+        async with limit.slot_async():
+            crew = await asyncio.to_thread(create_analysis_crew, crew_config={"max_rpm": limit.crew_max_rpm}, mode=crew_mode)
+            analysis_result = await crew.kickoff_async(analysis_inputs(processed_data))
+        record_llm_usage(getattr(analysis_result, "token_usage", None), model=DEFAULT_LLM_CONFIG["model"])
+
+        task_logger.info("CrewAI analysis completed successfully")
+        return analysis_result
+
+    except Exception as e:
+        task_logger.error("CrewAI analysis failed", error=str(e))
+        raise
+
+
+@task(
+    name="validate-analysis-results-async",
+    description="Validate analysis results for quality and completeness",
+    retries=2,
+    tags=["validation", "quality"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
+)
+@instrumented
+async def validate_results_async(results: Any) -> Dict[str, bool]:
+    """Validate analysis results; see ``validate_results``."""
+    # The undecorated body, so this run is not instrumented a second time
+    return inspect.unwrap(validate_results.fn)(results)
+
+
+@task(
+    name="save-results-to-storage-async",
+    description="Save flow results to configured storage",
+    retries=2,
+    tags=["storage", "persistence"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
+)
+@instrumented
+async def save_results_async(results: Dict[str, Any], validation: Dict[str, bool]) -> str:
+    """Save flow results; see ``save_results``."""
+    return inspect.unwrap(save_results.fn)(results, validation)
+
+
+async def _process_unless_expired(process: Any, raw_data: Any, step_logger: Any) -> Any:
+    """Recompute cached processed data whose payload expired."""
+    processed = await process(raw_data)
+    if await asyncio.to_thread(payload_available, processed):
+        return processed
+    step_logger.warning("Cached payload expired; recomputing")
+    return await process_data_async.with_options(refresh_cache=True)(raw_data)
+
+
+async def _checkpointed_async(
+    run_key: str,
+    step: str,
+    compute: Callable[[], Awaitable[Any]],
+    step_logger: Any,
+) -> Any:
+    """Return a step's checkpointed output, or compute and checkpoint it."""
+    store = get_checkpoint_store()
+    try:
+        found, value = await asyncio.to_thread(store.load, run_key, step)
+    except Exception as e:
+        step_logger.warning("Ignoring unreadable checkpoint", step=step, error=str(e))
+        found = False
+    if found and not await asyncio.to_thread(payload_available, value):
+        step_logger.warning("Ignoring checkpoint of an expired payload", step=step)
+        found = False
+    if found:
+        step_logger.info("Resuming from checkpoint", step=step)
+        return value
+
+    value = await compute()
+    try:
+        await asyncio.to_thread(store.save, run_key, step, value)
+    except Exception as e:
+        step_logger.warning("Checkpoint not saved", step=step, error=str(e))
+    return value
+
+
+@flow(
+    name="example-analysis-flow-async",
+    description="Async example analysis flow; many runs share one event loop",
+    version="1.0.0",
+    timeout_seconds=3600,
+)
+async def example_analysis_flow_async(
+    input_data: str,
+    save_results_flag: bool = True,
+    refresh_cache: bool = False,
+    run_key: Optional[str] = None,
+    crew_mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Async version of ``example_analysis_flow``.
+
+    Runs spend nearly all their time waiting on the LLM, so a worker can
+    host dozens of them on one event loop instead of a thread or process
+    each. CPU-bound work runs in worker threads. Cache entries and step
+    checkpoints are shared with the sync flow, so either variant can
+    resume a run started by the other.
+
+    Args:
+        input_data: Raw input data to process, or a ``file://`` or
+            ``s3://`` URI to read it from
+        save_results_flag: Whether to save results to storage
+        refresh_cache: Recompute cached steps and checkpoints and overwrite
+            their cache entries
+        run_key: Checkpoint key; defaults to a hash of the input and the
+            processor and crew configuration
+        crew_mode: ``sequential`` or ``parallel`` (defaults to ``CREW_MODE``)
+
+    Returns:
+        Dictionary containing processing results and analysis
+    """
+    crew_mode = crew_mode or settings.crew_mode
+    # Provider connections open while the input is read and preprocessed
+    prewarm_llm_clients()
+    input_text = await asyncio.to_thread(read_input, input_data)
+    flow_logger = bind_flow_context(
+        logger,
+        flow_name="example-analysis-flow-async",
+        input_data_length=len(input_text)
+    )
+    flow_logger.info("Starting async example analysis flow")
+
+    run_key = run_key or analysis_run_key(input_text, crew_mode)
+    raw_data = await asyncio.to_thread(offload_payload, input_text)
+    process, analyze = process_data_async, run_crew_analysis_async
+    if refresh_cache:
+        process = process_data_async.with_options(refresh_cache=True)
+        analyze = run_crew_analysis_async.with_options(refresh_cache=True)
+        await asyncio.to_thread(get_checkpoint_store().clear, run_key)
+
+    try:
+        with collect_task_metrics("example-analysis-flow-async", run_key) as run_metrics, transaction():
+            processed_data = await _checkpointed_async(
+                run_key, "processed_data", lambda: _process_unless_expired(process, raw_data, flow_logger), flow_logger
+            )
+            flow_logger.info("Data processing step completed")
+
+            analysis_result = await _checkpointed_async(
+                run_key, "analysis", lambda: analyze(processed_data, crew_mode), flow_logger
+            )
+            flow_logger.info("CrewAI analysis step completed")
+
+            validation_result = await _checkpointed_async(
+                run_key, "validation", lambda: validate_results_async(analysis_result), flow_logger
+            )
+            flow_logger.info("Validation step completed")
+
+            storage_location = None
+            if save_results_flag:
+                final_results = {
+                    "processed_data": processed_data,
+                    "analysis": analysis_result,
+                    "validation": validation_result,
+                }
+                storage_location = await save_results_async(final_results, validation_result)
+                flow_logger.info("Results storage step completed")
+
+            flow_result = {
+                "processed_data": processed_data,
+                "analysis": analysis_result,
+                "validation": validation_result,
+                "storage_location": storage_location,
+                "status": "completed",
+                "flow_metadata": {
+                    "flow_name": "example-analysis-flow-async",
+                    "version": "1.0.0",
+                    "completed_at": "2024-01-01T00:00:00Z",
+                    "run_key": run_key,
+                },
+                "metrics": run_metrics.summary(),
+            }
+
+            await asyncio.to_thread(get_checkpoint_store().clear, run_key)
+            flow_logger.info("Flow completed successfully", result_keys=list(flow_result.keys()))
+            return flow_result
+
+    except Exception as e:
+        flow_logger.error("Flow execution failed", error=str(e), error_type=type(e).__name__)
+        raise
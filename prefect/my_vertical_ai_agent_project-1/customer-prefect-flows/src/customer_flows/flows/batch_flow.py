@@ -0,0 +1,162 @@
+"""Batch variant of the example analysis flow using mapped tasks."""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from prefect import flow, unmapped
+
+from ..agents.llm_clients import prewarm_llm_clients
+from ..config import get_settings
+from ..metrics import collect_task_metrics
+from ..storage import offload_payload, read_input
+from ..utils.logging import bind_flow_context, get_logger
+from .example_flow import process_data, run_crew_analysis, save_results, validate_results
+from .task_runners import HybridTaskRunner
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+def load_batch_inputs(inputs: Union[List[str], str, Path]) -> List[str]:
+    """
+    Resolve batch inputs to a list of documents.
+
+    Args:
+        inputs: List of input strings, or path to a JSONL file whose lines are
+            JSON strings or objects with an ``input_data`` field. Each input
+            may be a ``file://`` or ``s3://`` URI instead of inline text.
+
+    Returns:
+        Input documents in order
+
+    Raises:
+        ValueError: If a JSONL line is not a string or has no ``input_data``
+    """
+    if isinstance(inputs, list):
+        return inputs
+
+    documents = []
+    with open(inputs, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, dict):
+                record = record.get("input_data")
+            if not isinstance(record, str):
+                raise ValueError(f"{inputs}:{line_number}: expected a string or an object with input_data")
+            documents.append(record)
+    return documents
+
+
+def _outcome(future: Any) -> Tuple[Any, Optional[str]]:
+    """Return a mapped task's result, or the error it (or an upstream task) failed with."""
+    try:
+        return future.result(), None
+    except Exception as e:
+        return None, str(e) or type(e).__name__
+
+
+@flow(
+    name="example-batch-analysis-flow",
+    description="Analyze many documents in one flow run with mapped tasks",
+    version="1.0.0",
+    timeout_seconds=3600 * 6,
+    task_runner=HybridTaskRunner(
+        max_workers=settings.batch_max_workers,
+        process_workers=settings.process_pool_workers,
+    ),
+)
+def example_batch_analysis_flow(
+    inputs: Union[List[str], str],
+    save_results_flag: bool = True,
+    refresh_cache: bool = False,
+    crew_mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Run the example analysis over a batch of documents.
+
+    Every step is mapped over the batch on a hybrid runner, so documents
+    move through the pipeline independently instead of paying a flow run
+    per document. ``BATCH_MAX_WORKERS`` threads orchestrate the task runs;
+    preprocessing bodies run on a warm pool of
+    ``PROCESS_POOL_WORKERS`` processes to use every core. Crew analyses
+    additionally share the process-wide LLM limit, so raising the worker
+    count never exceeds the provider's rate limit. A document that fails
+    does not fail the batch; it is reported with its error. Documents and
+    processed data above ``PAYLOAD_REF_THRESHOLD`` travel between tasks as
+    payload references.
+
+    Args:
+        inputs: Input documents, or path to a JSONL file of documents
+        save_results_flag: Whether to save each document's results
+        refresh_cache: Recompute cached steps and overwrite their cache entries
+        crew_mode: ``sequential`` or ``parallel`` (defaults to ``CREW_MODE``)
+
+    Returns:
+        Per-document results and a batch summary
+    """
+    crew_mode = crew_mode or settings.crew_mode
+    # Provider connections open while the inputs are read and preprocessed
+    prewarm_llm_clients()
+    # Large documents are handed to the tasks as payload references
+    documents = [offload_payload(read_input(document)) for document in load_batch_inputs(inputs)]
+    flow_logger = bind_flow_context(logger, flow_name="example-batch-analysis-flow", batch_size=len(documents))
+    flow_logger.info("Starting example batch analysis flow")
+
+    process, analyze = process_data, run_crew_analysis
+    if refresh_cache:
+        process = process_data.with_options(refresh_cache=True)
+        analyze = run_crew_analysis.with_options(refresh_cache=True)
+
+    # The flow run recorded in the metrics history spans submission and every result
+    with collect_task_metrics("example-batch-analysis-flow") as run_metrics:
+        processed = process.map(documents)
+        analyses = analyze.map(processed, crew_mode=unmapped(crew_mode))
+        validations = validate_results.map(analyses)
+
+        saved = []
+        if save_results_flag:
+            final_results = [
+                {"processed_data": p, "analysis": a, "validation": v}
+                for p, a, v in zip(processed, analyses, validations)
+            ]
+            saved = save_results.map(final_results, validations)
+
+        results = []
+        for index in range(len(documents)):
+            # A failed step fails every later step; report the first error
+            processed_data, processed_error = _outcome(processed[index])
+            analysis, analysis_error = _outcome(analyses[index])
+            validation, validation_error = _outcome(validations[index])
+            storage_location, save_error = _outcome(saved[index]) if save_results_flag else (None, None)
+            error = processed_error or analysis_error or validation_error or save_error
+            results.append({
+                "index": index,
+                "processed_data": processed_data,
+                "analysis": analysis,
+                "validation": validation,
+                "storage_location": storage_location,
+                "status": "failed" if error else "completed",
+                "error": error,
+            })
+
+    completed = sum(1 for result in results if result["status"] == "completed")
+    flow_result = {
+        "results": results,
+        "summary": {
+            "total": len(results),
+            "completed": completed,
+            "failed": len(results) - completed,
+        },
+        "status": "completed" if completed == len(results) else ("partial" if completed else "failed"),
+        "flow_metadata": {
+            "flow_name": "example-batch-analysis-flow",
+            "version": "1.0.0",
+        },
+        "metrics": run_metrics.summary(),
+    }
+
+    flow_logger.info("Batch flow completed", **flow_result["summary"])
+    return flow_result
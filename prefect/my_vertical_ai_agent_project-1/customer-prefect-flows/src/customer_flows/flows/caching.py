@@ -0,0 +1,71 @@
+"""Cache policies for expensive flow tasks."""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from prefect.cache_policies import CachePolicy
+
+from ..processing import ProcessedText
+from ..storage import PayloadRef, canonical_json, content_digest
+
+
+@dataclass
+class CanonicalInputs(CachePolicy):
+    """
+    Cache key from the canonical JSON of a task's inputs.
+
+    Prefect's built-in ``INPUTS`` policy hashes the pickled parameters, so
+    equal inputs built in a different key order miss the cache. This policy
+    hashes canonical JSON instead, and adds a fingerprint of whatever else
+    determines the output (processor version, crew and model
+    configuration), so changing the configuration invalidates old entries.
+    Payload references are hashed by their content digest without loading
+    the payload, and processed text by its original and counters without
+    building its derived strings.
+
+    Pass the fields by keyword: Prefect's ``CachePolicy`` declares its own
+    fields (``key_storage`` first) ahead of these.
+
+    Attributes:
+        namespace: Keeps keys of different tasks apart
+        fingerprint: Returns the configuration the output depends on
+        exclude: Parameters left out of the key
+        volatile_fields: Fields of mapping parameters left out of the key,
+            such as timestamps that differ between otherwise equal inputs
+    """
+
+    namespace: str = ""
+    fingerprint: Optional[Callable[[], Any]] = None
+    exclude: List[str] = field(default_factory=list)
+    volatile_fields: List[str] = field(default_factory=list)
+
+    def _stable(self, value: Any) -> Any:
+        if isinstance(value, PayloadRef):
+            # The digest already identifies the payload; never load it for a key
+            return {"payload_ref": value.digest}
+        if isinstance(value, ProcessedText):
+            # Iterating would build the lazy derived strings
+            value = value.to_dict(include_derived=False)
+        if self.volatile_fields and isinstance(value, Mapping):
+            return {k: v for k, v in value.items() if k not in self.volatile_fields}
+        return value
+
+    def compute_key(
+        self,
+        task_ctx: Any,
+        inputs: Dict[str, Any],
+        flow_parameters: Dict[str, Any],
+        **kwargs: Any,
+    ) -> Optional[str]:
+        key = {
+            "namespace": self.namespace,
+            "inputs": {name: self._stable(value) for name, value in inputs.items() if name not in self.exclude},
+            "fingerprint": self.fingerprint() if self.fingerprint else None,
+        }
+        return content_digest(canonical_json(key))
+
+
+def cache_expiration(ttl_seconds: Optional[int]) -> Optional[timedelta]:
+    """Convert a TTL setting to a cache expiration; None never expires."""
+    return timedelta(seconds=ttl_seconds) if ttl_seconds is not None else None
@@ -1,55 +1,92 @@
 """Example Prefect 3.x flow demonstrating CrewAI and LangChain integration."""
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, Union
 
 from prefect import flow, task
 from prefect.transactions import transaction
 
-from ..agents.example_crew import create_analysis_crew
+from ..agents.example_crew import (
+    DEFAULT_LLM_CONFIG,
+    analysis_crew_fingerprint,
+    analysis_inputs,
+    create_analysis_crew,
+)
+from ..agents.llm_clients import prewarm_llm_clients
+from ..agents.rate_limits import get_llm_limit
 from ..config import get_settings
+from ..metrics import collect_task_metrics, finish_task_run, instrumented, record_llm_usage
+from ..processing import ProcessedText
+from ..storage import (
+    PayloadRef,
+    canonical_json,
+    content_digest,
+    get_checkpoint_store,
+    load_payload,
+    offload_payload,
+    payload_available,
+    read_input,
+)
 from ..utils.logging import bind_flow_context, get_logger
+from .caching import CanonicalInputs, cache_expiration
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+PROCESSOR_METADATA = {
+    "processor": "example_processor",
+    "version": "1.0.0"
+}
+
+# Shared with the async flow's tasks so both variants hit the same cache entries
+PROCESS_DATA_CACHE_POLICY = CanonicalInputs(namespace="process-input-data", fingerprint=lambda: PROCESSOR_METADATA)
+CREW_ANALYSIS_CACHE_POLICY = CanonicalInputs(
+    namespace="run-crew-analysis",
+    fingerprint=analysis_crew_fingerprint,
+    volatile_fields=["processed_at"],
+)
+
 
 @task(
     name="process-input-data",
     description="Process raw input data into structured format",
     retries=3,
     retry_delay_seconds=10,
+    cache_policy=PROCESS_DATA_CACHE_POLICY,
+    cache_expiration=cache_expiration(settings.process_data_cache_ttl),
+    persist_result=True,
+    tags=["data", "preprocessing"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
 )
-def process_data(raw_data: str) -> Dict[str, Any]:
+@instrumented
+def process_data(raw_data: Union[str, PayloadRef]) -> Union[ProcessedText, PayloadRef]:
     """
     Process raw input data into structured format.
     
+    Counters are computed eagerly in one scan; the upper- and lower-case
+    variants are only built if a downstream step reads them. Results are
+    cached by a canonical hash of the input for ``PROCESS_DATA_CACHE_TTL``.
+    Results larger than ``PAYLOAD_REF_THRESHOLD`` are returned by reference.
+    
     Args:
-        raw_data: Raw input data string
+        raw_data: Raw input data string, or a reference to one
         
     Returns:
-        Processed data dictionary
+        Processed data mapping, or a reference to it
     """
+    raw_data = load_payload(raw_data)
     task_logger = bind_flow_context(logger, task="process_data", data_length=len(raw_data))
     task_logger.info("Processing raw data")
     
     try:
-        # Example processing logic with enhanced structure for Prefect 3
-        processed = {
-            "original": raw_data,
-            "length": len(raw_data),
-            "uppercase": raw_data.upper(),
-            "lowercase": raw_data.lower(),
-            "word_count": len(raw_data.split()),
-            "character_count": len(raw_data.replace(" ", "")),
-            "processed_at": "2024-01-01T00:00:00Z",  # In real implementation, use datetime.utcnow()
-            "metadata": {
-                "processor": "example_processor",
-                "version": "1.0.0"
-            }
-        }
+        processed = ProcessedText(
+            raw_data,
+            derived=("uppercase", "lowercase"),
+            metadata=dict(PROCESSOR_METADATA),
+        )
         
         task_logger.info("Data processing successful", processed_items=len(processed))
-        return processed
+        return offload_payload(processed)
         
     except Exception as e:
         task_logger.error("Data processing failed", error=str(e))
@@ -61,13 +98,31 @@ def process_data(raw_data: str) -> Dict[str, Any]:
     description="Execute CrewAI analysis on processed data",
     retries=2,
     retry_delay_seconds=30,
+    cache_policy=CREW_ANALYSIS_CACHE_POLICY,
+    cache_expiration=cache_expiration(settings.crew_analysis_cache_ttl),
+    persist_result=True,
+    tags=["crewai", "llm"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
 )
-def run_crew_analysis(processed_data: Dict[str, Any]) -> Any:
+@instrumented
+def run_crew_analysis(processed_data: Union[Dict[str, Any], PayloadRef], crew_mode: str = "sequential") -> Any:
     """
     Run CrewAI analysis on processed data.
     
+    Crews started from concurrent task runs share the process-wide LLM
+    limit: at most ``LLM_MAX_CONCURRENCY`` run at once, each within its
+    share of ``LLM_REQUESTS_PER_MINUTE``. Analyses are cached by a
+    canonical hash of the data plus the crew and model configuration for
+    ``CREW_ANALYSIS_CACHE_TTL``, so re-running identical input costs no
+    LLM calls.
+    
+    In ``parallel`` crew mode the analysis facets run concurrently within
+    the crew's slot and share its requests-per-minute budget.
+    
     Args:
-        processed_data: Previously processed data
+        processed_data: Previously processed data, or a reference to it
+        crew_mode: ``sequential`` or ``parallel``
         
     Returns:
         Analysis results from CrewAI
@@ -76,9 +131,18 @@ def run_crew_analysis(processed_data: Dict[str, Any]) -> Any:
     task_logger.info("Starting CrewAI analysis")
     
     try:
-        # Create and run CrewAI analysis
-        crew = create_analysis_crew()
-        analysis_result = crew.kickoff({"data": processed_data})
+        processed_data = load_payload(processed_data)
+        
+        # Hand the crew counters and the original text, not derived copies
+        if isinstance(processed_data, ProcessedText):
+            processed_data = processed_data.to_dict()
+        
+        # Create and run CrewAI analysis within the provider's rate limit
+        limit = get_llm_limit()
+        with limit.slot():
+            crew = create_analysis_crew(crew_config={"max_rpm": limit.crew_max_rpm}, mode=crew_mode)
+            analysis_result = crew.kickoff(analysis_inputs(processed_data))
+        record_llm_usage(getattr(analysis_result, "token_usage", None), model=DEFAULT_LLM_CONFIG["model"])
         
         task_logger.info("CrewAI analysis completed successfully")
         return analysis_result
@@ -92,7 +156,11 @@ def run_crew_analysis(processed_data: Dict[str, Any]) -> Any:
     name="validate-analysis-results",
     description="Validate analysis results for quality and completeness",
     retries=2,
+    tags=["validation", "quality"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
 )
+@instrumented
 def validate_results(results: Any) -> Dict[str, bool]:
     """
     Validate analysis results for quality and completeness.
@@ -138,7 +206,11 @@ def validate_results(results: Any) -> Dict[str, bool]:
     name="save-results-to-storage",
     description="Save flow results to configured storage",
     retries=2,
+    tags=["storage", "persistence"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
 )
+@instrumented
 def save_results(results: Dict[str, Any], validation: Dict[str, bool]) -> str:
     """
     Save flow results to configured storage.
@@ -180,13 +252,75 @@ def save_results(results: Dict[str, Any], validation: Dict[str, bool]) -> str:
         raise
 
 
+def analysis_run_key(input_data: str, crew_mode: str = "sequential") -> str:
+    """
+    Default checkpoint key of an analysis run.
+    
+    Runs of the same input with the same processor and crew configuration
+    share a key, so a retried or re-submitted run finds the checkpoints of
+    the one that failed.
+    
+    Args:
+        input_data: Raw input data of the run
+        crew_mode: Crew mode of the run
+        
+    Returns:
+        SHA-256 hex digest
+    """
+    return content_digest(canonical_json({
+        "flow": "example-analysis-flow",
+        "input_data": input_data,
+        "processor": PROCESSOR_METADATA,
+        "crew": analysis_crew_fingerprint(),
+        "crew_mode": crew_mode,
+    }))
+
+
+def _unless_expired(value: Any, recompute: Callable[[], Any], step_logger: Any) -> Any:
+    """Recompute a cached step whose output references an expired payload."""
+    if payload_available(value):
+        return value
+    step_logger.warning("Cached payload expired; recomputing")
+    return recompute()
+
+
+def _checkpointed(run_key: str, step: str, compute: Callable[[], Any], step_logger: Any) -> Any:
+    """Return a step's checkpointed output, or compute and checkpoint it."""
+    store = get_checkpoint_store()
+    try:
+        found, value = store.load(run_key, step)
+    except Exception as e:
+        step_logger.warning("Ignoring unreadable checkpoint", step=step, error=str(e))
+        found = False
+    if found and not payload_available(value):
+        step_logger.warning("Ignoring checkpoint of an expired payload", step=step)
+        found = False
+    if found:
+        step_logger.info("Resuming from checkpoint", step=step)
+        return value
+    
+    value = compute()
+    try:
+        store.save(run_key, step, value)
+    except Exception as e:
+        # A missing checkpoint only costs recomputation on a retry
+        step_logger.warning("Checkpoint not saved", step=step, error=str(e))
+    return value
+
+
 @flow(
     name="example-analysis-flow",
     description="Example flow using CrewAI and LangChain with Prefect 3 best practices",
     version="1.0.0",
     timeout_seconds=3600,
 )
-def example_analysis_flow(input_data: str, save_results_flag: bool = True) -> Dict[str, Any]:
+def example_analysis_flow(
+    input_data: str,
+    save_results_flag: bool = True,
+    refresh_cache: bool = False,
+    run_key: Optional[str] = None,
+    crew_mode: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Example flow that processes data using CrewAI agents and LangChain.
     
@@ -197,33 +331,75 @@ def example_analysis_flow(input_data: str, save_results_flag: bool = True) -> Di
     - Structured logging
     - Result validation and storage
     
+    Processed data, crew output and validation are checkpointed under the
+    run key as each step completes. A retried or re-submitted run resumes
+    at the first step without a checkpoint, so a failure while saving never
+    re-runs the crew. Checkpoints are removed once the run completes.
+    Checkpoints and cached results whose payload retention has expired are
+    recomputed.
+    
+    Inputs and processed data larger than ``PAYLOAD_REF_THRESHOLD`` are
+    stored once in the local payload store; tasks, checkpoints and the
+    flow result carry ``PayloadRef`` handles to them instead of copies.
+    
+    Wall time, retries, payload sizes and LLM tokens of every task run are
+    summarized under ``metrics`` in the result and exported on the
+    Prometheus endpoint when ``METRICS_PORT`` is set.
+    
     Args:
-        input_data: Raw input data to process
+        input_data: Raw input data to process, or a ``file://`` or
+            ``s3://`` URI to read it from
         save_results_flag: Whether to save results to storage
+        refresh_cache: Recompute cached steps and checkpoints and overwrite
+            their cache entries
+        run_key: Checkpoint key; defaults to a hash of the input and the
+            processor and crew configuration
+        crew_mode: ``sequential`` or ``parallel`` (defaults to ``CREW_MODE``)
         
     Returns:
         Dictionary containing processing results and analysis
     """
+    crew_mode = crew_mode or settings.crew_mode
+    # Provider connections open while the input is read and preprocessed
+    prewarm_llm_clients()
+    input_text = read_input(input_data)
     flow_logger = bind_flow_context(
         logger, 
         flow_name="example-analysis-flow",
-        input_data_length=len(input_data)
+        input_data_length=len(input_text)
     )
     flow_logger.info("Starting example analysis flow")
     
+    run_key = run_key or analysis_run_key(input_text, crew_mode)
+    raw_data = offload_payload(input_text)
+    process, analyze = process_data, run_crew_analysis
+    if refresh_cache:
+        process = process_data.with_options(refresh_cache=True)
+        analyze = run_crew_analysis.with_options(refresh_cache=True)
+        get_checkpoint_store().clear(run_key)
+    
     try:
         # Use transactions for better error handling and rollback capabilities
-        with transaction():
+        with collect_task_metrics("example-analysis-flow", run_key) as run_metrics, transaction():
             # Step 1: Process the input data
-            processed_data = process_data(input_data)
+            processed_data = _checkpointed(
+                run_key,
+                "processed_data",
+                lambda: _unless_expired(
+                    process(raw_data), lambda: process_data.with_options(refresh_cache=True)(raw_data), flow_logger
+                ),
+                flow_logger,
+            )
             flow_logger.info("Data processing step completed")
             
             # Step 2: Run CrewAI analysis
-            analysis_result = run_crew_analysis(processed_data)
+            analysis_result = _checkpointed(run_key, "analysis", lambda: analyze(processed_data, crew_mode), flow_logger)
             flow_logger.info("CrewAI analysis step completed")
             
             # Step 3: Validate results
-            validation_result = validate_results(analysis_result)
+            validation_result = _checkpointed(
+                run_key, "validation", lambda: validate_results(analysis_result), flow_logger
+            )
             flow_logger.info("Validation step completed")
             
             # Step 4: Optionally save results
@@ -247,10 +423,13 @@ def example_analysis_flow(input_data: str, save_results_flag: bool = True) -> Di
                 "flow_metadata": {
                     "flow_name": "example-analysis-flow",
                     "version": "1.0.0",
-                    "completed_at": "2024-01-01T00:00:00Z"
-                }
+                    "completed_at": "2024-01-01T00:00:00Z",
+                    "run_key": run_key,
+                },
+                "metrics": run_metrics.summary(),
             }
             
+            get_checkpoint_store().clear(run_key)
             flow_logger.info("Flow completed successfully", result_keys=list(flow_result.keys()))
             return flow_result
             
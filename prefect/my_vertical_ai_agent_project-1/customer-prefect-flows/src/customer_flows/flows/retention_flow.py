@@ -0,0 +1,155 @@
+"""Retention flow expiring locally stored results."""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from prefect import flow, task
+
+from ..config import get_settings
+from ..storage import ArchiveBackend, RetentionPolicy, enforce_retention, get_checkpoint_store, get_result_index
+from ..utils.logging import bind_flow_context, get_logger
+
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@task(
+    name="enforce-retention",
+    description="Delete or compact stored results expired by the retention policy",
+    retries=1,
+    retry_delay_seconds=30,
+    tags=["storage", "maintenance"],
+)
+def enforce_retention_policy(
+    policy: Dict[str, Any],
+    compact: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Enforce a retention policy against the result index.
+    
+    Args:
+        policy: RetentionPolicy fields
+        compact: Compact expired blobs into the archive instead of deleting them;
+            the flow runs compaction without retries, as it is not idempotent
+        dry_run: Only report what would be removed
+        
+    Returns:
+        Retention summary
+    """
+    task_logger = bind_flow_context(logger, task="enforce_retention_policy", **policy)
+    task_logger.info("Enforcing retention policy", compact=compact, dry_run=dry_run)
+    
+    try:
+        archive = None
+        if compact and not dry_run:
+            archive = ArchiveBackend(
+                settings.archive_dir or Path(settings.storage_dir) / "archive",
+                codec=settings.archive_codec,
+                segment_bytes=settings.archive_segment_bytes,
+                index=get_result_index(),
+            )
+        try:
+            summary = enforce_retention(get_result_index(), RetentionPolicy(**policy), compact_to=archive, dry_run=dry_run)
+        finally:
+            if archive is not None:
+                archive.close()
+        
+        task_logger.info(
+            "Retention policy enforced",
+            expired_entries=summary["expired_entries"],
+            removed_entries=summary["removed_entries"],
+        )
+        return summary
+        
+    except Exception as e:
+        task_logger.error("Retention enforcement failed", error=str(e))
+        raise
+
+
+@task(
+    name="sweep-checkpoints",
+    description="Delete checkpoints of failed runs that were never resumed",
+    retries=1,
+    retry_delay_seconds=30,
+    tags=["storage", "maintenance"],
+)
+def sweep_checkpoints(max_age_days: float, dry_run: bool = False) -> List[str]:
+    """
+    Delete checkpoints of runs that saved no step for ``max_age_days``.
+    
+    Args:
+        max_age_days: Age in days of a run's newest checkpoint
+        dry_run: Only report what would be removed
+        
+    Returns:
+        Run keys whose checkpoints were (or would be) deleted
+    """
+    task_logger = bind_flow_context(logger, task="sweep_checkpoints", max_age_days=max_age_days)
+    
+    expired = get_checkpoint_store().sweep(max_age_days * 86400, dry_run=dry_run)
+    task_logger.info("Checkpoints swept", expired_runs=len(expired), dry_run=dry_run)
+    return expired
+
+
+@flow(
+    name="storage-retention-flow",
+    description="Expire stored results by age, total size and count",
+    version="1.0.0",
+    timeout_seconds=3600,
+)
+def storage_retention_flow(
+    max_age_days: Optional[float] = None,
+    max_total_bytes: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    flow_name: Optional[str] = None,
+    compact: Optional[bool] = None,
+    dry_run: bool = False,
+    checkpoint_max_age_days: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Expire stored results according to the retention policy.
+    
+    Limits that are not given default to the ``RETENTION_*`` settings. The
+    flow works from the result index, so each run only touches expired
+    entries. Checkpoints left by failed runs older than
+    ``CHECKPOINT_MAX_AGE_DAYS`` are deleted as well.
+    
+    Args:
+        max_age_days: Remove results older than this many days
+        max_total_bytes: Remove the oldest results until the total size fits
+        max_entries: Remove the oldest results until the count fits
+        flow_name: Only expire this flow's results
+        compact: Compact expired blobs into the archive instead of deleting them
+        dry_run: Only report what would be removed
+        checkpoint_max_age_days: Delete checkpoints of runs idle for this many days
+        
+    Returns:
+        Retention summary
+    """
+    flow_logger = bind_flow_context(logger, flow_name="storage-retention-flow")
+    flow_logger.info("Starting storage retention flow")
+    
+    policy = {
+        "max_age_days": max_age_days if max_age_days is not None else settings.retention_max_age_days,
+        "max_total_bytes": max_total_bytes if max_total_bytes is not None else settings.retention_max_bytes,
+        "max_entries": max_entries if max_entries is not None else settings.retention_max_entries,
+        "flow": flow_name,
+    }
+    if compact is None:
+        compact = settings.retention_compact
+    
+    enforce = enforce_retention_policy
+    if compact and not dry_run:
+        # A retried compaction would append the already archived blobs again
+        enforce = enforce_retention_policy.with_options(retries=0)
+    summary = enforce(policy, compact=compact, dry_run=dry_run)
+    
+    if checkpoint_max_age_days is None:
+        checkpoint_max_age_days = settings.checkpoint_max_age_days
+    summary["expired_checkpoint_runs"] = (
+        len(sweep_checkpoints(checkpoint_max_age_days, dry_run=dry_run)) if checkpoint_max_age_days is not None else 0
+    )
+    
+    flow_logger.info("Storage retention flow completed", removed_entries=summary["removed_entries"])
+    return summary
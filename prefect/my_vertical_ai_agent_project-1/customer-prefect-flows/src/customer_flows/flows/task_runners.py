@@ -0,0 +1,180 @@
+"""Task runner routing CPU-bound tasks to a warm process pool."""
+
+import atexit
+import functools
+import importlib
+import inspect
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from prefect.task_runners import ThreadPoolTaskRunner
+
+from ..metrics import instrumented, is_instrumented
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Tags of tasks whose bodies hold the GIL (text scanning and parsing)
+CPU_TAGS = frozenset({"data", "preprocessing"})
+
+_PACKAGE = __name__.rsplit(".", 2)[0]
+
+# Imported by every worker at start so the first CPU task pays no import cost
+WARM_MODULES = (
+    f"{_PACKAGE}.flows.example_flow",
+    f"{_PACKAGE}.tasks.core_tasks",
+)
+
+
+def _warm_worker(modules: Sequence[str]) -> None:
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _worker_pid(hold: float) -> int:
+    # Holding the worker makes each warm-up call land on a different process
+    time.sleep(hold)
+    return os.getpid()
+
+
+def _call_task_fn(module: str, qualname: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+    """Run a task's function inside a worker process."""
+    target: Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    # Module attributes of decorated tasks are Task objects wrapping the function;
+    # instrumentation stays in the parent, where the flow collects it
+    fn = inspect.unwrap(getattr(target, "fn", target))
+    return fn(*args, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def get_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Get the process-wide pool for CPU-bound task bodies.
+
+    Workers are spawned rather than forked, since the parent runs threads,
+    and import the task modules when they start. The pool lives for the
+    whole process, so it stays warm across flow runs.
+
+    Args:
+        max_workers: Worker processes (defaults to the CPU count)
+    """
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_warm_worker,
+        initargs=(WARM_MODULES,),
+    )
+    atexit.register(pool.shutdown, cancel_futures=True)
+    return pool
+
+
+def warm_process_pool(pool: ProcessPoolExecutor, workers: int, hold: float = 0.05) -> int:
+    """
+    Start the pool's workers and wait until each has imported the task modules.
+
+    Args:
+        pool: Process pool
+        workers: Number of workers to wait for
+        hold: Seconds each warm-up call occupies its worker
+
+    Returns:
+        Number of distinct worker processes that answered
+    """
+    futures = [pool.submit(_worker_pid, hold) for _ in range(workers)]
+    wait(futures)
+    return len({future.result() for future in futures})
+
+
+def _offloaded(fn: Callable[..., Any], pool: ProcessPoolExecutor) -> Callable[..., Any]:
+    """Wrap a task function so each call runs in the process pool."""
+    body = inspect.unwrap(fn)
+
+    @functools.wraps(body)
+    def run_in_process(*args: Any, **kwargs: Any) -> Any:
+        return pool.submit(_call_task_fn, body.__module__, body.__qualname__, args, kwargs).result()
+
+    return instrumented(run_in_process) if is_instrumented(fn) else run_in_process
+
+
+class HybridTaskRunner(ThreadPoolTaskRunner):
+    """
+    Thread pool task runner that executes CPU-bound task bodies in processes.
+
+    Every task run is orchestrated on a thread as with
+    ``ThreadPoolTaskRunner``, so caching, retries and state tracking are
+    unchanged. Sync tasks carrying one of ``cpu_tags`` (``data`` and
+    ``preprocessing`` by default) have their function executed in a warm
+    process pool, which scales them across cores. All
+    other tasks, such as ``crewai`` and ``notification`` tasks, and async
+    tasks run on the threads, where waiting on I/O costs nothing.
+
+    Arguments and results of CPU tasks must be picklable.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        process_workers: Optional[int] = None,
+        cpu_tags: Iterable[str] = CPU_TAGS,
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            max_workers: Threads orchestrating task runs
+            process_workers: Worker processes for CPU tasks (defaults to the
+                CPU count)
+            cpu_tags: Tags routing a task to the process pool
+        """
+        super().__init__(max_workers=max_workers)
+        self.process_workers = process_workers or os.cpu_count()
+        self.cpu_tags = frozenset(cpu_tags)
+        self._process_tasks: Dict[int, Any] = {}
+
+    def duplicate(self) -> "HybridTaskRunner":
+        return type(self)(
+            max_workers=self._max_workers,
+            process_workers=self.process_workers,
+            cpu_tags=self.cpu_tags,
+        )
+
+    def routes_to_process_pool(self, task: Any) -> bool:
+        """Return whether a task's body runs in the process pool."""
+        return not task.isasync and bool(self.cpu_tags & set(task.tags))
+
+    def _process_task(self, task: Any) -> Any:
+        process_task = self._process_tasks.get(id(task))
+        if process_task is None:
+            process_task = task.with_options()
+            process_task.fn = _offloaded(task.fn, get_process_pool(self.process_workers))
+            self._process_tasks[id(task)] = process_task
+        return process_task
+
+    def submit(self, task: Any, parameters: Dict[str, Any], wait_for: Any = None, dependencies: Any = None) -> Any:
+        if self.routes_to_process_pool(task):
+            task = self._process_task(task)
+        return super().submit(task, parameters, wait_for=wait_for, dependencies=dependencies)
+
+    def __enter__(self) -> "HybridTaskRunner":
+        super().__enter__()
+        warm_process_pool(get_process_pool(self.process_workers), self.process_workers)
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self._process_tasks.clear()
+        super().__exit__(exc_type, exc_value, traceback)
+
+    def __eq__(self, value: object) -> bool:
+        if not isinstance(value, HybridTaskRunner):
+            return False
+        return (
+            self._max_workers == value._max_workers
+            and self.process_workers == value.process_workers
+            and self.cpu_tags == value.cpu_tags
+        )
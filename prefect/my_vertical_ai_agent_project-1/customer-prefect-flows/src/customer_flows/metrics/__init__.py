@@ -0,0 +1,38 @@
+"""Task instrumentation and metrics export."""
+
+from .exposition import ensure_metrics_server, render_prometheus, start_metrics_server
+from .history import GROUPINGS, MetricsHistory, get_metrics_history, parse_window, percentile, token_cost
+from .instrumentation import (
+    MetricsRegistry,
+    RunMetrics,
+    TaskRunRecord,
+    collect_task_metrics,
+    finish_task_run,
+    get_metrics_registry,
+    instrumented,
+    is_instrumented,
+    record_llm_usage,
+    serialized_size,
+)
+
+__all__ = [
+    "GROUPINGS",
+    "MetricsHistory",
+    "MetricsRegistry",
+    "RunMetrics",
+    "TaskRunRecord",
+    "collect_task_metrics",
+    "ensure_metrics_server",
+    "finish_task_run",
+    "get_metrics_history",
+    "get_metrics_registry",
+    "instrumented",
+    "is_instrumented",
+    "parse_window",
+    "percentile",
+    "record_llm_usage",
+    "render_prometheus",
+    "serialized_size",
+    "start_metrics_server",
+    "token_cost",
+]
@@ -0,0 +1,142 @@
+"""Prometheus text exposition of the task metrics."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from ..config import get_settings
+from ..utils.logging import get_logger
+from .instrumentation import MetricsRegistry, get_metrics_registry
+
+logger = get_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "customer_flows"
+
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+_server_attempted = False
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(registry: Optional[MetricsRegistry] = None) -> str:
+    """
+    Render the task metrics in the Prometheus text exposition format.
+
+    Args:
+        registry: Registry to render; the process-wide one if omitted
+
+    Returns:
+        Exposition text
+    """
+    registry = registry or get_metrics_registry()
+    data: Dict[str, Any] = registry.snapshot()
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str) -> str:
+        metric = f"{PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        return metric
+
+    metric = family("task_runs_total", "counter", "Finished task runs by final state.")
+    for (task, state), count in sorted(data["runs"].items()):
+        lines.append(f"{metric}{_labels(task=task, state=state)} {count}")
+
+    metric = family("task_retries_total", "counter", "Task retries.")
+    for task, count in sorted(data["retries"].items()):
+        lines.append(f"{metric}{_labels(task=task)} {count}")
+
+    metric = family("task_duration_seconds", "histogram", "Wall time of task runs, summed over attempts.")
+    for task, counts in sorted(data["durations"].items()):
+        cumulative = 0
+        for bound, count in zip(registry.buckets, counts):
+            cumulative += count
+            lines.append(f"{metric}_bucket{_labels(task=task, le=_format(bound))} {cumulative}")
+        cumulative += counts[-1]
+        lines.append(f"{metric}_bucket{_labels(task=task, le='+Inf')} {cumulative}")
+        lines.append(f"{metric}_sum{_labels(task=task)} {_format(data['duration_sums'][task])}")
+        lines.append(f"{metric}_count{_labels(task=task)} {cumulative}")
+
+    metric = family("task_queue_wait_seconds", "summary", "Delay between a task run's scheduled and actual start.")
+    for task, (total, count) in sorted(data["queue_waits"].items()):
+        lines.append(f"{metric}_sum{_labels(task=task)} {_format(total)}")
+        lines.append(f"{metric}_count{_labels(task=task)} {count}")
+
+    metric = family("task_input_bytes_total", "counter", "Serialized size of task inputs.")
+    for task, size in sorted(data["input_bytes"].items()):
+        lines.append(f"{metric}{_labels(task=task)} {size}")
+
+    metric = family("task_output_bytes_total", "counter", "Serialized size of task outputs.")
+    for task, size in sorted(data["output_bytes"].items()):
+        lines.append(f"{metric}{_labels(task=task)} {size}")
+
+    metric = family("llm_tokens_total", "counter", "LLM tokens used by tasks.")
+    for (task, model, kind), count in sorted(data["tokens"].items()):
+        lines.append(f"{metric}{_labels(task=task, model=model, kind=kind)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Scrapes are frequent; keep them out of the flow logs
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve ``/metrics`` from a daemon thread.
+
+    Args:
+        port: Port to listen on; 0 picks a free port
+        host: Address to bind
+
+    Returns:
+        The running server
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info("Metrics endpoint started", host=host, port=server.server_address[1])
+    return server
+
+
+def ensure_metrics_server() -> Optional[ThreadingHTTPServer]:
+    """Start the process-wide endpoint once if ``METRICS_PORT`` is set."""
+    global _server, _server_attempted
+    settings = get_settings()
+    if settings.metrics_port is None:
+        return None
+    with _server_lock:
+        if not _server_attempted:
+            _server_attempted = True
+            try:
+                _server = start_metrics_server(settings.metrics_port, settings.metrics_host)
+            except OSError as e:
+                # Another process on this host already serves the port
+                logger.warning("Metrics endpoint not started", port=settings.metrics_port, error=str(e))
+        return _server
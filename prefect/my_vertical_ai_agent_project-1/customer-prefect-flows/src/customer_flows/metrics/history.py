@@ -0,0 +1,283 @@
+"""SQLite history of flow and task run metrics."""
+
+import math
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from ..config import get_settings
+
+if TYPE_CHECKING:
+    from .instrumentation import TaskRunRecord
+
+# USD per 1,000 prompt and completion tokens; LLM_TOKEN_PRICES overrides entries
+DEFAULT_TOKEN_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+GROUPINGS = ("flow", "task", "model")
+
+_WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_window(window: str) -> float:
+    """
+    Convert a window such as ``30m``, ``24h`` or ``7d`` to seconds.
+
+    Raises:
+        ValueError: If the window is not a number followed by s, m, h, d or w
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*", window)
+    if not match:
+        raise ValueError(f"Invalid window {window!r}; use e.g. 30m, 24h or 7d")
+    return float(match.group(1)) * _WINDOW_UNITS[match.group(2)]
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Return the nearest-rank percentile of sorted values, or None if empty."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def token_cost(
+    model: Optional[str],
+    prompt_tokens: int,
+    completion_tokens: int,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> Optional[float]:
+    """Return the USD cost of tokens, or None for a model without a price."""
+    prices = prices if prices is not None else token_prices()
+    if model not in prices:
+        return None
+    prompt_price, completion_price = prices[model]
+    return prompt_tokens / 1000 * prompt_price + completion_tokens / 1000 * completion_price
+
+
+def token_prices() -> Dict[str, Tuple[float, float]]:
+    """Return the default token prices with the configured overrides applied."""
+    prices = dict(DEFAULT_TOKEN_PRICES)
+    prices.update({model: (float(p[0]), float(p[1])) for model, p in get_settings().llm_token_prices.items()})
+    return prices
+
+
+class MetricsHistory:
+    """
+    Append-only SQLite history of flow runs and their task runs.
+
+    Every process running flows appends to the same database file; WAL
+    mode lets the ``stats`` command read while flows write. Rows carry
+    their finish time, so reports over a window use the time index.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open (and create if needed) the history.
+
+        Args:
+            path: Database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS flow_runs ("
+                "id INTEGER PRIMARY KEY, "
+                "flow TEXT NOT NULL, "
+                "status TEXT NOT NULL, "
+                "finished_at REAL NOT NULL, "
+                "duration REAL NOT NULL, "
+                "run_key TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS task_runs ("
+                "flow_run_id INTEGER NOT NULL REFERENCES flow_runs (id), "
+                "flow TEXT NOT NULL, "
+                "task TEXT NOT NULL, "
+                "state TEXT NOT NULL, "
+                "finished_at REAL NOT NULL, "
+                "wall_time REAL NOT NULL, "
+                "queue_wait REAL, "
+                "attempts INTEGER NOT NULL, "
+                "retries INTEGER NOT NULL, "
+                "input_bytes INTEGER, "
+                "output_bytes INTEGER, "
+                "model TEXT, "
+                "prompt_tokens INTEGER NOT NULL, "
+                "completion_tokens INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS flow_runs_finished_at ON flow_runs (finished_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS task_runs_finished_at ON task_runs (finished_at)")
+
+    def record_flow_run(
+        self,
+        flow: str,
+        duration: float,
+        status: str,
+        records: Iterable["TaskRunRecord"] = (),
+        run_key: Optional[str] = None,
+        finished_at: Optional[float] = None,
+    ) -> int:
+        """
+        Append a flow run and its task runs in one transaction.
+
+        Args:
+            flow: Flow name
+            duration: Flow run wall time in seconds
+            status: ``completed`` or ``failed``
+            records: Task run records collected during the run
+            run_key: Run key of the flow run, if any
+            finished_at: Finish time as a Unix timestamp (defaults to now)
+
+        Returns:
+            Row id of the flow run
+        """
+        finished_at = finished_at if finished_at is not None else time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO flow_runs (flow, status, finished_at, duration, run_key) VALUES (?, ?, ?, ?, ?)",
+                    (flow, status, finished_at, duration, run_key),
+                )
+                flow_run_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO task_runs (flow_run_id, flow, task, state, finished_at, wall_time, queue_wait, "
+                    "attempts, retries, input_bytes, output_bytes, model, prompt_tokens, completion_tokens) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            flow_run_id, flow, r.task, r.state, finished_at, r.wall_time, r.queue_wait,
+                            r.attempts, r.retries, r.input_bytes, r.output_bytes, r.model,
+                            r.prompt_tokens, r.completion_tokens,
+                        )
+                        for r in records
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return flow_run_id
+
+    def stats(
+        self,
+        by: str = "flow",
+        window_seconds: Optional[float] = None,
+        flow: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Report latency percentiles, throughput and token cost per group.
+
+        Args:
+            by: ``flow`` (flow run durations), ``task`` or ``model`` (task
+                run wall times; ``model`` covers LLM tasks only)
+            window_seconds: Only include runs finished this recently
+            flow: Only include runs of this flow
+            now: End of the window as a Unix timestamp (defaults to now)
+
+        Returns:
+            One dictionary per group with ``runs``, ``failed``,
+            ``p50``/``p95``/``p99`` latency in seconds, ``throughput`` in
+            runs per hour, tokens and ``cost`` in USD (None if unpriced)
+        """
+        if by not in GROUPINGS:
+            raise ValueError(f"Unknown grouping {by!r}; use one of {', '.join(GROUPINGS)}")
+        now = now if now is not None else time.time()
+        since = now - window_seconds if window_seconds is not None else None
+
+        conditions, params = ["finished_at <= ?"], [now]
+        if since is not None:
+            conditions.append("finished_at > ?")
+            params.append(since)
+        if flow:
+            conditions.append("flow = ?")
+            params.append(flow)
+
+        if by == "flow":
+            query = (
+                "SELECT flow AS name, duration AS latency, status != 'completed' AS failed, finished_at, "
+                "NULL AS model, 0 AS prompt_tokens, 0 AS completion_tokens FROM flow_runs"
+            )
+        else:
+            if by == "model":
+                conditions.append("model IS NOT NULL")
+            query = (
+                f"SELECT {by} AS name, wall_time AS latency, state = 'Failed' AS failed, finished_at, "
+                "model, prompt_tokens, completion_tokens FROM task_runs"
+            )
+        with self._lock:
+            rows = self._conn.execute(
+                f"{query} WHERE {' AND '.join(conditions)} ORDER BY name, latency", params
+            ).fetchall()
+
+        groups: Dict[str, List[sqlite3.Row]] = {}
+        for row in rows:
+            groups.setdefault(row["name"], []).append(row)
+
+        tokens = self._flow_tokens(conditions, params) if by == "flow" else {}
+
+        prices = token_prices()
+        report = []
+        for name, group in groups.items():
+            latencies = [row["latency"] for row in group]
+            # Without a window, throughput is measured since the group's first run
+            first = min(row["finished_at"] for row in group)
+            span = window_seconds if window_seconds is not None else max(now - first, 1.0)
+            if by == "flow":
+                usage = tokens.get(name, [])
+            else:
+                usage = [(row["model"], row["prompt_tokens"], row["completion_tokens"]) for row in group]
+            costs = [token_cost(model, prompt, completion, prices) for model, prompt, completion in usage]
+            priced = [cost for cost in costs if cost is not None]
+            report.append({
+                by: name,
+                "runs": len(group),
+                "failed": sum(1 for row in group if row["failed"]),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "throughput": len(group) / span * 3600,
+                "prompt_tokens": sum(prompt for _, prompt, _ in usage),
+                "completion_tokens": sum(completion for _, _, completion in usage),
+                "cost": sum(priced) if priced else None,
+            })
+        return report
+
+    def _flow_tokens(self, conditions: List[str], params: List[Any]) -> Dict[str, List[Tuple[Optional[str], int, int]]]:
+        """Token usage per flow and model of the task runs matching the flow run filters."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT flow, model, SUM(prompt_tokens), SUM(completion_tokens) FROM task_runs "
+                f"WHERE {' AND '.join(conditions)} GROUP BY flow, model",
+                params,
+            ).fetchall()
+        usage: Dict[str, List[Tuple[Optional[str], int, int]]] = {}
+        for flow, model, prompt, completion in rows:
+            usage.setdefault(flow, []).append((model, prompt, completion))
+        return usage
+
+    def close(self) -> None:
+        """Close the history database."""
+        with self._lock:
+            self._conn.close()
+
+
+@lru_cache(maxsize=1)
+def get_metrics_history() -> MetricsHistory:
+    """Get the process-wide history at ``METRICS_DB_PATH`` or ``<storage_dir>/metrics.db``."""
+    settings = get_settings()
+    return MetricsHistory(settings.metrics_db_path or Path(settings.storage_dir) / "metrics.db")
@@ -0,0 +1,371 @@
+"""Per-task-run timing, retry, payload-size and token records."""
+
+import asyncio
+import functools
+import pickle
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from prefect.context import TaskRunContext
+
+from ..config import get_settings
+from ..utils.logging import get_logger
+from .history import get_metrics_history
+
+logger = get_logger(__name__)
+
+# Upper bounds of the task duration histogram, in seconds
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+@dataclass
+class TaskRunRecord:
+    """Measurements of one task run, summed over its attempts."""
+
+    task: str
+    task_run_id: Optional[str] = None
+    flow_run_id: Optional[str] = None
+    state: str = "Running"
+    attempts: int = 0
+    retries: int = 0
+    wall_time: float = 0.0
+    queue_wait: Optional[float] = None
+    input_bytes: Optional[int] = None
+    output_bytes: Optional[int] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    model: Optional[str] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "total_tokens": self.total_tokens}
+
+
+class RunMetrics:
+    """Task run records collected while a flow run executes."""
+
+    def __init__(self):
+        self.records: List[TaskRunRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: TaskRunRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the run for the flow result.
+
+        Returns:
+            JSON-compatible dictionary with one entry per task run and totals
+        """
+        with self._lock:
+            records = list(self.records)
+        return {
+            "tasks": [record.to_dict() for record in records],
+            "totals": {
+                "task_runs": len(records),
+                "retries": sum(record.retries for record in records),
+                "wall_time": round(sum(record.wall_time for record in records), 6),
+                "input_bytes": sum(record.input_bytes or 0 for record in records),
+                "output_bytes": sum(record.output_bytes or 0 for record in records),
+                "prompt_tokens": sum(record.prompt_tokens for record in records),
+                "completion_tokens": sum(record.completion_tokens for record in records),
+                "total_tokens": sum(record.total_tokens for record in records),
+            },
+        }
+
+
+_current_run: ContextVar[Optional[RunMetrics]] = ContextVar("customer_flows_run_metrics", default=None)
+_current_record: ContextVar[Optional[TaskRunRecord]] = ContextVar("customer_flows_task_record", default=None)
+
+
+class MetricsRegistry:
+    """
+    Process-wide task metrics.
+
+    Keeps the records of task runs that are still executing and the
+    cumulative counters rendered on the Prometheus endpoint. A record is
+    finished by the task's state hook once Prefect reports the final state,
+    or by the instrumented function itself when it runs outside a task run.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, TaskRunRecord] = {}
+        self._owners: Dict[str, Optional[RunMetrics]] = {}
+        self.runs: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.retries: Dict[str, int] = defaultdict(int)
+        self.durations: Dict[str, List[int]] = {}
+        self.duration_sums: Dict[str, float] = defaultdict(float)
+        self.queue_waits: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        self.input_bytes: Dict[str, int] = defaultdict(int)
+        self.output_bytes: Dict[str, int] = defaultdict(int)
+        self.tokens: Dict[Tuple[str, str, str], int] = defaultdict(int)
+
+    def begin(self, task_run_id: str, task: str, flow_run_id: Optional[str]) -> TaskRunRecord:
+        """Return the in-flight record of a task run, creating it on its first attempt."""
+        with self._lock:
+            record = self._in_flight.get(task_run_id)
+            if record is None:
+                record = TaskRunRecord(task=task, task_run_id=task_run_id, flow_run_id=flow_run_id)
+                self._in_flight[task_run_id] = record
+                self._owners[task_run_id] = _current_run.get()
+            return record
+
+    def finish_task_run(
+        self,
+        task_run_id: str,
+        task: str,
+        state: str,
+        retries: int = 0,
+        queue_wait: Optional[float] = None,
+        flow_run_id: Optional[str] = None,
+    ) -> TaskRunRecord:
+        """
+        Finish a task run's record with its final state.
+
+        Cached task runs never execute their function and get a record
+        with no attempts here.
+
+        Returns:
+            The finished record
+        """
+        with self._lock:
+            record = self._in_flight.pop(task_run_id, None)
+            owner = self._owners.pop(task_run_id, _current_run.get())
+        if record is None:
+            record = TaskRunRecord(task=task, task_run_id=task_run_id, flow_run_id=flow_run_id)
+        record.state = state
+        record.retries = retries
+        record.queue_wait = queue_wait
+        self.finish(record, owner)
+        return record
+
+    def finish(self, record: TaskRunRecord, owner: Optional[RunMetrics] = None) -> None:
+        """Add a finished record to the counters and to the flow run collecting it."""
+        with self._lock:
+            task = record.task
+            self.runs[(task, record.state)] += 1
+            self.retries[task] += record.retries
+            counts = self.durations.setdefault(task, [0] * (len(self.buckets) + 1))
+            counts[_bucket_index(self.buckets, record.wall_time)] += 1
+            self.duration_sums[task] += record.wall_time
+            if record.queue_wait is not None:
+                self.queue_waits[task][0] += record.queue_wait
+                self.queue_waits[task][1] += 1
+            self.input_bytes[task] += record.input_bytes or 0
+            self.output_bytes[task] += record.output_bytes or 0
+            model = record.model or "unknown"
+            if record.prompt_tokens:
+                self.tokens[(task, model, "prompt")] += record.prompt_tokens
+            if record.completion_tokens:
+                self.tokens[(task, model, "completion")] += record.completion_tokens
+        if owner is not None:
+            owner.add(record)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a consistent copy of the counters for rendering."""
+        with self._lock:
+            return {
+                "runs": dict(self.runs),
+                "retries": dict(self.retries),
+                "durations": {task: list(counts) for task, counts in self.durations.items()},
+                "duration_sums": dict(self.duration_sums),
+                "queue_waits": {task: tuple(values) for task, values in self.queue_waits.items()},
+                "input_bytes": dict(self.input_bytes),
+                "output_bytes": dict(self.output_bytes),
+                "tokens": dict(self.tokens),
+            }
+
+
+def _bucket_index(buckets: Tuple[float, ...], value: float) -> int:
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            return index
+    return len(buckets)
+
+
+@lru_cache(maxsize=1)
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return MetricsRegistry()
+
+
+@contextmanager
+def collect_task_metrics(flow: Optional[str] = None, run_key: Optional[str] = None) -> Iterator[RunMetrics]:
+    """
+    Collect the records of task runs started inside the block.
+
+    Prefect runs tasks in a copy of the caller's context, so task runs
+    submitted to thread pools are collected as well. When ``flow`` is
+    given, the block's duration, outcome and task records are appended to
+    the metrics history as one flow run.
+
+    Args:
+        flow: Flow name to record the run under
+        run_key: Run key stored with the flow run
+    """
+    from .exposition import ensure_metrics_server
+
+    ensure_metrics_server()
+    run_metrics = RunMetrics()
+    token = _current_run.set(run_metrics)
+    started = time.perf_counter()
+    status = "failed"
+    try:
+        yield run_metrics
+        status = "completed"
+    finally:
+        _current_run.reset(token)
+        if flow is not None and get_settings().metrics_history:
+            _append_history(flow, time.perf_counter() - started, status, run_metrics, run_key)
+
+
+def _append_history(flow: str, duration: float, status: str, run_metrics: RunMetrics, run_key: Optional[str]) -> None:
+    try:
+        get_metrics_history().record_flow_run(flow, duration, status, list(run_metrics.records), run_key=run_key)
+    except Exception as e:
+        # Losing a history row must never fail the flow run
+        logger.warning("Metrics history not updated", flow=flow, error=str(e))
+
+
+def serialized_size(value: Any) -> Optional[int]:
+    """Return the pickled size of a value, or None if it cannot be pickled."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return None
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+def _usage_count(usage: Any, name: str) -> int:
+    value = usage.get(name) if isinstance(usage, Mapping) else getattr(usage, name, None)
+    return value if isinstance(value, int) else 0
+
+
+def record_llm_usage(usage: Any, model: Optional[str] = None) -> None:
+    """
+    Add LLM token usage to the task run currently executing.
+
+    Args:
+        usage: Mapping or object with ``prompt_tokens`` and
+            ``completion_tokens``, such as a crew output's ``token_usage``
+        model: Model the tokens were billed for
+    """
+    record = _current_record.get()
+    if record is None or usage is None:
+        return
+    record.prompt_tokens += _usage_count(usage, "prompt_tokens")
+    record.completion_tokens += _usage_count(usage, "completion_tokens")
+    if model:
+        record.model = model
+
+
+def _begin_attempt(fn: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[TaskRunRecord, bool]:
+    context = TaskRunContext.get()
+    if context is None:
+        # Called outside a task run (``.fn``, tests): the call is the whole run
+        record = TaskRunRecord(task=fn.__name__, attempts=1)
+        owned = True
+    else:
+        task_run = context.task_run
+        record = get_metrics_registry().begin(str(task_run.id), fn.__name__, _optional_str(task_run.flow_run_id))
+        record.attempts = max(task_run.run_count, record.attempts + 1)
+        owned = False
+    record.input_bytes = serialized_size((args, kwargs))
+    return record, owned
+
+
+def _end_attempt(record: TaskRunRecord, owned: bool, started: float, result: Any = None, error: bool = False) -> None:
+    record.wall_time += time.perf_counter() - started
+    if not error:
+        record.output_bytes = serialized_size(result)
+    if owned:
+        record.state = "Failed" if error else "Completed"
+        get_metrics_registry().finish(record, _current_run.get())
+
+
+def instrumented(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Record wall time, payload sizes and LLM tokens of each call of a task function.
+
+    Apply below ``@task`` together with the ``finish_task_run`` state hooks,
+    which add the final state, retry count and queue wait.
+    """
+    if asyncio.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def run_async(*args: Any, **kwargs: Any) -> Any:
+            record, owned = _begin_attempt(fn, args, kwargs)
+            token = _current_record.set(record)
+            started = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except BaseException:
+                _end_attempt(record, owned, started, error=True)
+                raise
+            finally:
+                _current_record.reset(token)
+            _end_attempt(record, owned, started, result)
+            return result
+
+        run_async.instrumented = True
+        return run_async
+
+    @functools.wraps(fn)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        record, owned = _begin_attempt(fn, args, kwargs)
+        token = _current_record.set(record)
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            _end_attempt(record, owned, started, error=True)
+            raise
+        finally:
+            _current_record.reset(token)
+        _end_attempt(record, owned, started, result)
+        return result
+
+    run.instrumented = True
+    return run
+
+
+def is_instrumented(fn: Callable[..., Any]) -> bool:
+    """Return whether a function was wrapped by ``instrumented``."""
+    return getattr(fn, "instrumented", False) is True
+
+
+def finish_task_run(task: Any, task_run: Any, state: Any) -> None:
+    """
+    State hook finishing the record of a completed, cached or failed task run.
+
+    Register it as both ``on_completion`` and ``on_failure`` hook. Records
+    are named after the task function, like calls outside a task run, so a
+    task keeps one name whether it runs through Prefect or through ``.fn``.
+    """
+    queue_wait = None
+    if task_run.start_time and task_run.expected_start_time:
+        queue_wait = max((task_run.start_time - task_run.expected_start_time).total_seconds(), 0.0)
+    get_metrics_registry().finish_task_run(
+        str(task_run.id),
+        getattr(task.fn, "__name__", task.name),
+        state.name,
+        retries=max(task_run.run_count - 1, 0),
+        queue_wait=queue_wait,
+        flow_run_id=_optional_str(task_run.flow_run_id),
+    )
@@ -0,0 +1,19 @@
+"""Notification delivery."""
+
+from .coalescing import NotificationCoalescer, format_digest, get_notification_coalescer
+from .dispatcher import (
+    CHANNELS,
+    NotificationDispatcher,
+    PersistentSMTP,
+    get_notification_dispatcher,
+)
+
+__all__ = [
+    "CHANNELS",
+    "NotificationCoalescer",
+    "NotificationDispatcher",
+    "PersistentSMTP",
+    "format_digest",
+    "get_notification_coalescer",
+    "get_notification_dispatcher",
+]
@@ -0,0 +1,244 @@
+"""Coalesce bursts of notifications into digest messages."""
+
+import atexit
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import get_settings
+from ..utils.logging import get_logger
+from .dispatcher import NotificationDispatcher, Recipients, get_notification_dispatcher
+
+logger = get_logger(__name__)
+
+URGENT = "urgent"
+
+_Key = Tuple[str, str, str]
+
+
+class _Window:
+    """Messages buffered for one (recipient, channel, priority) key."""
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.messages: List[str] = []
+        self.failures = 0
+
+
+def format_digest(messages: List[str]) -> str:
+    """
+    Merge buffered messages into one digest.
+
+    Identical messages are collapsed with a repeat count and the original
+    order of first occurrence is kept.
+
+    Args:
+        messages: Buffered messages, oldest first
+
+    Returns:
+        Digest text, or the message itself if only one was buffered
+    """
+    if len(messages) == 1:
+        return messages[0]
+    counts = Counter(messages)
+    lines = [f"{len(messages)} notifications:"]
+    for message in dict.fromkeys(messages):
+        suffix = f" (x{counts[message]})" if counts[message] > 1 else ""
+        lines.append(f"- {message}{suffix}")
+    return "\n".join(lines)
+
+
+class NotificationCoalescer:
+    """
+    Buffer notifications and send one digest per key and window.
+
+    Notifications sharing a (recipient, channel, priority) key within
+    ``window`` seconds of the first one are merged into a single digest.
+    Urgent notifications are dispatched immediately. Recipients whose
+    digests are identical are sent together, so a burst that fails a whole
+    batch of runs costs one send per channel rather than one per failure.
+    A digest whose send raises is buffered again and retried once with the
+    next flush; if that fails too it is dropped and counted in
+    ``dropped_digests``.
+    """
+
+    def __init__(self, dispatcher: NotificationDispatcher, window: float = 60.0):
+        """
+        Initialize the coalescer.
+
+        Args:
+            dispatcher: Dispatcher used to deliver digests
+            window: Seconds to buffer notifications after the first of a key
+        """
+        self.dispatcher = dispatcher
+        self.window = window
+        self._windows: Dict[_Key, _Window] = {}
+        self.dropped_digests = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="notification-coalescer", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        message: str,
+        recipients: Recipients,
+        channels: List[str],
+        priority: str = "normal",
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Send or buffer a notification.
+
+        Args:
+            message: Notification message
+            recipients: Recipients for every channel, or a list per channel
+            channels: Channels to use
+            priority: Notification priority
+
+        Returns:
+            Delivery status per channel; buffered recipients are ``queued``
+        """
+        if priority == URGENT or self.window <= 0:
+            return self.dispatcher.dispatch(message, recipients, channels, priority)
+
+        with self._condition:
+            if not self._closed:
+                return self._buffer(message, recipients, channels, priority)
+        # Already shut down; nothing would flush a new buffer
+        return self.dispatcher.dispatch(message, recipients, channels, priority)
+
+    def _buffer(
+        self,
+        message: str,
+        recipients: Recipients,
+        channels: List[str],
+        priority: str,
+    ) -> Dict[str, Dict[str, Any]]:
+        delivery_status = {}
+        for channel in channels:
+            targets = recipients.get(channel, []) if isinstance(recipients, dict) else recipients
+            for recipient in targets:
+                key = (recipient, channel, priority)
+                window = self._windows.get(key)
+                if window is None:
+                    window = self._windows[key] = _Window(time.monotonic() + self.window)
+                window.messages.append(message)
+            delivery_status[channel] = {
+                "status": "queued",
+                "details": f"Buffered for {len(targets)} recipients for up to {self.window:g}s",
+                "recipients": {recipient: {"status": "queued"} for recipient in targets},
+            }
+        self._condition.notify()
+        return delivery_status
+
+    def pending(self) -> int:
+        """Return the number of buffered notifications."""
+        with self._condition:
+            return sum(len(window.messages) for window in self._windows.values())
+
+    def flush(self, force: bool = True) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Send buffered digests.
+
+        Args:
+            force: Send every buffered digest, not only those whose window closed
+
+        Returns:
+            Delivery status of each dispatch
+        """
+        now = time.monotonic()
+        with self._condition:
+            due = {
+                key: self._windows.pop(key)
+                for key, window in list(self._windows.items())
+                if force or window.deadline <= now
+            }
+        if not due:
+            return []
+
+        # Recipients with the same digest on the same channel share one send
+        grouped: Dict[Tuple[str, str, str], List[str]] = defaultdict(list)
+        for (recipient, channel, priority), window in due.items():
+            grouped[(channel, priority, format_digest(window.messages))].append(recipient)
+
+        results = []
+        undelivered: Dict[_Key, _Window] = {}
+        for (channel, priority, digest), recipients in grouped.items():
+            try:
+                status = self.dispatcher.dispatch(digest, {channel: recipients}, [channel], priority)
+            except Exception as e:
+                logger.error("Digest delivery failed", channel=channel, recipients=len(recipients), error=str(e))
+                for recipient in recipients:
+                    undelivered[(recipient, channel, priority)] = due[(recipient, channel, priority)]
+                continue
+            if status[channel]["status"] != "sent":
+                logger.warning("Digest not fully delivered", channel=channel, details=status[channel]["details"])
+            results.append(status)
+        if undelivered:
+            self._retry_later(undelivered)
+        logger.info("Notification digests sent", keys=len(due), sends=len(grouped))
+        return results
+
+    def _retry_later(self, windows: Dict[_Key, _Window]) -> None:
+        """Buffer failed digests again, or drop those that already failed once."""
+        deadline = time.monotonic() + self.window
+        dropped = 0
+        with self._condition:
+            for key, window in windows.items():
+                window.failures += 1
+                if window.failures > 1:
+                    dropped += 1
+                    continue
+                newer = self._windows.get(key)
+                if newer is not None:
+                    window.messages.extend(newer.messages)
+                window.deadline = deadline
+                self._windows[key] = window
+            self.dropped_digests += dropped
+            self._condition.notify()
+        if dropped:
+            logger.error("Dropped undeliverable digests", count=dropped, total_dropped=self.dropped_digests)
+
+    def close(self) -> None:
+        """Send everything still buffered and stop the background thread."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+        # Retry the digests whose send failed once more before giving up
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                if self._windows:
+                    timeout = max(0.0, min(w.deadline for w in self._windows.values()) - time.monotonic())
+                else:
+                    timeout = None
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+            self.flush(force=False)
+
+
+@lru_cache(maxsize=1)
+def get_notification_coalescer() -> Optional[NotificationCoalescer]:
+    """
+    Get the process-wide coalescer, or None if coalescing is disabled.
+
+    Buffered notifications are flushed when the process exits.
+    """
+    window = get_settings().notification_coalesce_window
+    if window <= 0:
+        return None
+    coalescer = NotificationCoalescer(get_notification_dispatcher(), window=window)
+    # Registered after the dispatcher, so it runs first at exit
+    atexit.register(coalescer.close)
+    return coalescer
@@ -0,0 +1,353 @@
+"""Concurrent notification delivery over pooled channel clients."""
+
+import asyncio
+import atexit
+import smtplib
+import threading
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from email.utils import formatdate
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from ..config import get_settings
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+CHANNELS = ("email", "slack", "webhook")
+
+# Many SMTP servers reject more than 100 RCPT TO commands per transaction
+SMTP_MAX_RECIPIENTS = 100
+
+Recipients = Union[List[str], Dict[str, List[str]]]
+
+
+class PersistentSMTP:
+    """
+    SMTP connection kept open across sends.
+
+    The connection is opened on first use and re-opened once if the server
+    dropped it. Sends are serialized because an SMTP session handles one
+    transaction at a time.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._conn: Optional[smtplib.SMTP] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password or "")
+        return conn
+
+    def send(self, message: EmailMessage, recipients: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Send one message to many envelope recipients.
+
+        Recipients are sent in transactions of up to ``SMTP_MAX_RECIPIENTS``
+        over the same connection.
+
+        Args:
+            message: Message to send
+            recipients: Envelope recipients
+
+        Returns:
+            Error per recipient, None for accepted recipients
+        """
+        refused: Dict[str, Tuple[int, bytes]] = {}
+        with self._lock:
+            for start in range(0, len(recipients), SMTP_MAX_RECIPIENTS):
+                refused.update(self._send_once(message, recipients[start:start + SMTP_MAX_RECIPIENTS]))
+        return {
+            recipient: (f"{refused[recipient][0]} {refused[recipient][1]!r}" if recipient in refused else None)
+            for recipient in recipients
+        }
+
+    def _send_once(self, message: EmailMessage, recipients: List[str]) -> Dict[str, Tuple[int, bytes]]:
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = self._connect()
+            try:
+                return self._conn.send_message(message, to_addrs=recipients)
+            except smtplib.SMTPServerDisconnected:
+                # Idle connections get dropped by the server; reconnect once
+                self._conn = None
+                if attempt:
+                    raise
+            except smtplib.SMTPRecipientsRefused as e:
+                return e.recipients
+        return {}
+
+    def close(self) -> None:
+        """Close the connection."""
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.quit()
+                except smtplib.SMTPException:
+                    pass
+                self._conn = None
+
+
+class NotificationDispatcher:
+    """
+    Deliver notifications to every channel and recipient concurrently.
+
+    The dispatcher runs its own event loop on a background thread so that
+    one pooled HTTP client and one SMTP connection are shared by all task
+    runs in the process, whichever thread or event loop they run on.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 100,
+        timeout: float = 10.0,
+        smtp: Optional[PersistentSMTP] = None,
+        sender: str = "customer-flows@localhost",
+        slack_token: Optional[str] = None,
+        slack_api_url: str = "https://slack.com/api",
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            max_concurrency: Maximum sends in flight across all dispatches
+            timeout: Per-request timeout in seconds
+            smtp: SMTP connection used for email; email fails without one
+            sender: From address for email
+            slack_token: Slack bot token for ``chat.postMessage``
+            slack_api_url: Slack Web API base URL
+        """
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.smtp = smtp
+        self.sender = sender
+        self.slack_token = slack_token
+        self.slack_api_url = slack_api_url.rstrip("/")
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="notification-loop", daemon=True)
+        self._thread.start()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._closed = False
+
+    def dispatch(
+        self,
+        message: str,
+        recipients: Recipients,
+        channels: List[str],
+        priority: str = "normal",
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Send a notification and wait for every delivery attempt.
+
+        Args:
+            message: Notification message
+            recipients: Recipients for every channel, or a list per channel
+            channels: Channels to use
+            priority: Notification priority
+
+        Returns:
+            Delivery status per channel, including per-recipient status
+        """
+        future = asyncio.run_coroutine_threadsafe(self._dispatch(message, recipients, channels, priority), self._loop)
+        return future.result()
+
+    async def dispatch_async(
+        self,
+        message: str,
+        recipients: Recipients,
+        channels: List[str],
+        priority: str = "normal",
+    ) -> Dict[str, Dict[str, Any]]:
+        """Awaitable variant of :meth:`dispatch` usable from any event loop."""
+        future = asyncio.run_coroutine_threadsafe(self._dispatch(message, recipients, channels, priority), self._loop)
+        return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        """Close pooled clients and stop the background loop."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._http is not None:
+            asyncio.run_coroutine_threadsafe(self._http.aclose(), self._loop).result()
+        if self.smtp is not None:
+            self.smtp.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _dispatch(
+        self,
+        message: str,
+        recipients: Recipients,
+        channels: List[str],
+        priority: str,
+    ) -> Dict[str, Dict[str, Any]]:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        sent_at = datetime.now(timezone.utc).isoformat()
+        senders = {
+            "email": self._send_email,
+            "slack": self._send_slack,
+            "webhook": self._send_webhook,
+        }
+        jobs = {}
+        for channel in channels:
+            targets = recipients.get(channel, []) if isinstance(recipients, dict) else recipients
+            if channel in senders:
+                jobs[channel] = senders[channel](message, list(targets), priority, sent_at)
+
+        results = dict(zip(jobs, await asyncio.gather(*jobs.values())))
+        delivery_status = {}
+        for channel in channels:
+            if channel not in results:
+                delivery_status[channel] = {
+                    "status": "unsupported",
+                    "details": f"Channel {channel} not implemented",
+                    "recipients": {},
+                }
+                continue
+            statuses = results[channel]
+            sent = sum(1 for status in statuses.values() if status["status"] == "sent")
+            delivery_status[channel] = {
+                "status": "sent" if sent == len(statuses) else ("partial" if sent else "failed"),
+                "details": f"Delivered to {sent} of {len(statuses)} recipients",
+                "recipients": statuses,
+            }
+        return delivery_status
+
+    async def _send_email(
+        self, message: str, recipients: List[str], priority: str, sent_at: str
+    ) -> Dict[str, Dict[str, Any]]:
+        if not recipients:
+            return {}
+        if self.smtp is None:
+            return {r: {"status": "failed", "error": "SMTP_HOST is not configured"} for r in recipients}
+
+        email = EmailMessage()
+        email["Subject"] = f"[{priority}] Customer flows notification"
+        email["From"] = self.sender
+        email["To"] = "undisclosed-recipients:;"
+        email["Date"] = formatdate(localtime=False)
+        email.set_content(message)
+
+        try:
+            async with self._semaphore:
+                errors = await asyncio.to_thread(self.smtp.send, email, recipients)
+        except Exception as e:
+            logger.warning("Email delivery failed", recipients=len(recipients), error=str(e))
+            return {r: {"status": "failed", "error": str(e)} for r in recipients}
+        return {
+            r: {"status": "failed", "error": error} if error else {"status": "sent"}
+            for r, error in errors.items()
+        }
+
+    async def _post(self, recipient: str, url: str, **kwargs: Any) -> Tuple[Dict[str, Any], Optional[httpx.Response]]:
+        try:
+            async with self._semaphore:
+                response = await self._http.post(url, **kwargs)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning("Notification delivery failed", recipient=recipient, error=str(e))
+            return {"status": "failed", "error": str(e)}, None
+        return {"status": "sent", "status_code": response.status_code}, response
+
+    async def _send_many(
+        self, recipients: List[str], send: Callable[[str], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        statuses = await asyncio.gather(*(send(recipient) for recipient in recipients))
+        return dict(zip(recipients, statuses))
+
+    async def _send_slack(
+        self, message: str, recipients: List[str], priority: str, sent_at: str
+    ) -> Dict[str, Dict[str, Any]]:
+        text = f"[{priority}] {message}"
+
+        async def send(recipient: str) -> Dict[str, Any]:
+            if recipient.startswith("https://"):
+                # Incoming webhook URL
+                status, _ = await self._post(recipient, recipient, json={"text": text})
+                return status
+            if not self.slack_token:
+                return {"status": "failed", "error": "SLACK_BOT_TOKEN is not configured"}
+            status, response = await self._post(
+                recipient,
+                f"{self.slack_api_url}/chat.postMessage",
+                json={"channel": recipient, "text": text},
+                headers={"Authorization": f"Bearer {self.slack_token}"},
+            )
+            if response is not None:
+                # The Web API reports failures in the body of a 200 response
+                try:
+                    body = response.json()
+                except ValueError:
+                    return {"status": "failed", "error": f"Invalid Slack response: {response.text[:200]!r}"}
+                if not isinstance(body, dict) or not body.get("ok", False):
+                    error = body.get("error") if isinstance(body, dict) else None
+                    return {"status": "failed", "error": error or "unknown Slack error"}
+            return status
+
+        return await self._send_many(recipients, send)
+
+    async def _send_webhook(
+        self, message: str, recipients: List[str], priority: str, sent_at: str
+    ) -> Dict[str, Dict[str, Any]]:
+        payload = {"message": message, "priority": priority, "sent_at": sent_at}
+
+        async def send(recipient: str) -> Dict[str, Any]:
+            status, _ = await self._post(recipient, recipient, json=payload)
+            return status
+
+        return await self._send_many(recipients, send)
+
+
+@lru_cache(maxsize=1)
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """Get the process-wide dispatcher configured from settings."""
+    settings = get_settings()
+    smtp = None
+    if settings.smtp_host:
+        smtp = PersistentSMTP(
+            settings.smtp_host,
+            settings.smtp_port,
+            username=settings.smtp_username,
+            password=settings.smtp_password,
+            starttls=settings.smtp_starttls,
+            timeout=settings.notification_timeout,
+        )
+    dispatcher = NotificationDispatcher(
+        max_concurrency=settings.notification_max_concurrency,
+        timeout=settings.notification_timeout,
+        smtp=smtp,
+        sender=settings.smtp_sender,
+        slack_token=settings.slack_bot_token,
+        slack_api_url=settings.slack_api_url,
+    )
+    atexit.register(dispatcher.close)
+    return dispatcher
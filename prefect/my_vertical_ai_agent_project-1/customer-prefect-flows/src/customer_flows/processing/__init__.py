@@ -0,0 +1,30 @@
+"""Text preprocessing helpers used by the Prefect tasks."""
+
+from .batch import iter_batches, preprocess_batch
+from .keywords import (
+    BoundedTermCounter,
+    IDFTable,
+    KeywordExtractor,
+    document_key,
+    extract_keywords,
+    get_keyword_extractor,
+)
+from .streaming import StreamingTextStats, iter_source_chunks, preprocess_stream
+from .text import ProcessedText, count_characters, remove_punctuation
+
+__all__ = [
+    "BoundedTermCounter",
+    "IDFTable",
+    "KeywordExtractor",
+    "ProcessedText",
+    "StreamingTextStats",
+    "count_characters",
+    "document_key",
+    "extract_keywords",
+    "get_keyword_extractor",
+    "iter_batches",
+    "iter_source_chunks",
+    "preprocess_batch",
+    "preprocess_stream",
+    "remove_punctuation",
+]
@@ -0,0 +1,378 @@
+"""Frequency-ranked keyword extraction with persistent corpus statistics."""
+
+import atexit
+import hashlib
+import heapq
+import json
+import math
+import os
+import string
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from ..config import get_settings
+from ..utils.logging import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = get_logger(__name__)
+
+KEYWORD_MIN_LENGTH = 5
+KEYWORD_LIMIT = 10
+DEFAULT_MAX_TERMS = 50_000
+DEFAULT_MAX_VOCABULARY = 100_000
+DEFAULT_REMEMBERED_DOCUMENTS = 10_000
+
+IDF_FORMAT_VERSION = 1
+
+_STRIP_CHARS = string.punctuation + "“”‘’"
+
+
+def normalize_term(word: str) -> str:
+    """Lower-case a token and strip surrounding punctuation."""
+    return word.strip(_STRIP_CHARS).lower()
+
+
+def document_key(term_counts: Mapping[str, int]) -> str:
+    """Digest of a document's term counts, identifying it across task retries."""
+    encoded = json.dumps(sorted(term_counts.items()), separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _top_items(counts: Mapping[str, int], k: int) -> List[Tuple[str, int]]:
+    """Return the ``k`` highest-valued items, earlier items winning ties."""
+    return heapq.nlargest(k, counts.items(), key=itemgetter(1))
+
+
+class BoundedTermCounter:
+    """
+    Term frequency counter with a capped vocabulary.
+    
+    When the vocabulary grows past ``max_terms`` the least frequent half is
+    dropped, so memory stays bounded regardless of input size. Counts are
+    exact until the first prune and approximate (heavy hitters) afterwards.
+    """
+    
+    def __init__(self, max_terms: int = DEFAULT_MAX_TERMS, min_length: int = KEYWORD_MIN_LENGTH):
+        """
+        Initialize the counter.
+        
+        Args:
+            max_terms: Maximum number of distinct terms to keep
+            min_length: Minimum term length to count
+        """
+        if max_terms < 1:
+            raise ValueError("max_terms must be at least 1")
+        self.max_terms = max_terms
+        self.min_length = min_length
+        self.counts: Dict[str, int] = {}
+        self.pruned_terms = 0
+    
+    def update(self, words: Iterable[str]) -> None:
+        """Count the qualifying terms of a token stream."""
+        counts = self.counts
+        min_length = self.min_length
+        for word in words:
+            if len(word) < min_length:
+                continue
+            term = normalize_term(word)
+            if len(term) >= min_length:
+                counts[term] = counts.get(term, 0) + 1
+        if len(counts) > self.max_terms:
+            self._prune()
+    
+    def _prune(self) -> None:
+        """Drop the least frequent terms down to half the cap."""
+        keep = _top_items(self.counts, max(1, self.max_terms // 2))
+        self.pruned_terms += len(self.counts) - len(keep)
+        self.counts = dict(keep)
+    
+    def most_common(self, k: int) -> List[Tuple[str, int]]:
+        """Return the ``k`` most frequent terms with their counts."""
+        return _top_items(self.counts, k)
+    
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class IDFTable:
+    """
+    Document frequencies for inverse document frequency weighting.
+    
+    Documents recorded with :meth:`add_documents` are kept as pending deltas
+    and merged into the JSON file at ``path`` on :meth:`save`, under a file
+    lock and with an atomic rename, so several workers can share one table
+    and the history never has to be rescanned. The vocabulary is capped at
+    ``max_terms`` by keeping the terms with the highest document frequency.
+    Documents added with a key are counted once among the last
+    ``remember`` keyed documents, so a retried task does not record the
+    same document twice.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[os.PathLike] = None,
+        max_terms: int = DEFAULT_MAX_VOCABULARY,
+        flush_every: int = 100,
+        flush_interval: float = 30.0,
+        remember: int = DEFAULT_REMEMBERED_DOCUMENTS,
+    ):
+        """
+        Initialize the table, loading persisted statistics if present.
+        
+        Args:
+            path: JSON file holding the statistics (in-memory only if None)
+            max_terms: Vocabulary cap
+            flush_every: Pending documents that trigger :meth:`maybe_save`
+            flush_interval: Seconds after which :meth:`maybe_save` flushes
+            remember: Keys of recently added documents kept for deduplication
+        """
+        self.path = Path(path) if path is not None else None
+        self.max_terms = max_terms
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.remember = remember
+        self.document_count = 0
+        self.document_frequency: Dict[str, int] = {}
+        self._pending_documents = 0
+        self._pending: Dict[str, int] = {}
+        self._last_save = time.monotonic()
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        if self.path is not None and self.path.exists():
+            self.document_count, self.document_frequency = self._read()
+    
+    def idf(self, term: str) -> float:
+        """Smoothed inverse document frequency of ``term``."""
+        return math.log((1 + self.document_count) / (1 + self.document_frequency.get(term, 0))) + 1.0
+    
+    def add_documents(self, documents: Iterable[Iterable[str]], keys: Optional[Sequence[str]] = None) -> None:
+        """
+        Record the distinct terms of each document.
+        
+        Args:
+            documents: One iterable of terms per document
+            keys: Key of each document (see :func:`document_key`); documents
+                whose key was added recently are skipped
+        """
+        with self._lock:
+            frequency = self.document_frequency
+            # In-memory tables have nothing to merge into, so skip the deltas
+            pending = self._pending if self.path is not None else {}
+            for position, terms in enumerate(documents):
+                if keys is not None and not self._remember(keys[position]):
+                    continue
+                self.document_count += 1
+                self._pending_documents += 1
+                for term in set(terms):
+                    frequency[term] = frequency.get(term, 0) + 1
+                    pending[term] = pending.get(term, 0) + 1
+            if len(frequency) > self.max_terms * 1.25:
+                self.document_frequency = self._cap(frequency)
+                self._pending = {term: n for term, n in pending.items() if term in self.document_frequency}
+    
+    def _remember(self, key: str) -> bool:
+        if key in self._recent:
+            self._recent.move_to_end(key)
+            return False
+        self._recent[key] = None
+        if len(self._recent) > self.remember:
+            self._recent.popitem(last=False)
+        return True
+    
+    def _cap(self, frequency: Dict[str, int]) -> Dict[str, int]:
+        if len(frequency) <= self.max_terms:
+            return frequency
+        return dict(_top_items(frequency, self.max_terms))
+    
+    def _read(self) -> Tuple[int, Dict[str, int]]:
+        with open(self.path, encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if payload.get("version") != IDF_FORMAT_VERSION:
+            raise ValueError(f"Unsupported IDF table version in {self.path}: {payload.get('version')}")
+        return payload["document_count"], payload["document_frequency"]
+    
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(self.path.with_suffix(self.path.suffix + ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def save(self) -> None:
+        """Merge pending statistics into the persisted table."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._pending_documents:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._file_lock():
+                # Merge our deltas into whatever other workers persisted meanwhile
+                if self.path.exists():
+                    document_count, frequency = self._read()
+                else:
+                    document_count, frequency = 0, {}
+                document_count += self._pending_documents
+                for term, n in self._pending.items():
+                    frequency[term] = frequency.get(term, 0) + n
+                frequency = self._cap(frequency)
+                
+                payload = {
+                    "version": IDF_FORMAT_VERSION,
+                    "document_count": document_count,
+                    "document_frequency": frequency,
+                }
+                fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                        json.dump(payload, handle, separators=(",", ":"))
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            
+            self.document_count = document_count
+            self.document_frequency = frequency
+            self._pending_documents = 0
+            self._pending = {}
+            self._last_save = time.monotonic()
+    
+    def maybe_save(self) -> None:
+        """Save if enough documents or time have accumulated since the last save."""
+        if self._pending_documents >= self.flush_every or (
+            self._pending_documents and time.monotonic() - self._last_save >= self.flush_interval
+        ):
+            self.save()
+
+
+class KeywordExtractor:
+    """Heap-based top-k keyword ranking by term frequency weighted with IDF."""
+    
+    def __init__(
+        self,
+        idf: Optional[IDFTable] = None,
+        limit: int = KEYWORD_LIMIT,
+        min_length: int = KEYWORD_MIN_LENGTH,
+        max_terms: int = DEFAULT_MAX_TERMS,
+    ):
+        """
+        Initialize the extractor.
+        
+        Args:
+            idf: Corpus statistics (an in-memory table if None)
+            limit: Default number of keywords to return
+            min_length: Minimum keyword length
+            max_terms: Vocabulary cap for per-document term counts
+        """
+        self.idf = idf if idf is not None else IDFTable()
+        self.limit = limit
+        self.min_length = min_length
+        self.max_terms = max_terms
+    
+    def count_terms(self, words: Iterable[str]) -> Dict[str, int]:
+        """Count the qualifying terms of one document."""
+        counter = BoundedTermCounter(self.max_terms, self.min_length)
+        counter.update(words)
+        return counter.counts
+    
+    def rank(self, term_counts: Mapping[str, int], k: Optional[int] = None) -> List[str]:
+        """
+        Return the top ``k`` terms by TF-IDF score.
+        
+        Args:
+            term_counts: Term frequencies of one document
+            k: Number of keywords (defaults to ``limit``)
+        
+        Returns:
+            Keywords ordered by descending score
+        """
+        idf = self.idf.idf
+        scored = ((term, count * idf(term)) for term, count in term_counts.items())
+        return [term for term, _ in heapq.nlargest(k or self.limit, scored, key=itemgetter(1))]
+    
+    def extract(self, words: Iterable[str], k: Optional[int] = None, learn: bool = False) -> List[str]:
+        """
+        Extract keywords from one document's tokens.
+        
+        Args:
+            words: Document tokens
+            k: Number of keywords (defaults to ``limit``)
+            learn: Whether to record the document in the IDF table first,
+                unless it was recorded recently
+        
+        Returns:
+            Keywords ordered by descending score
+        """
+        counts = self.count_terms(words)
+        if learn:
+            self.idf.add_documents([counts], keys=[document_key(counts)])
+        return self.rank(counts, k)
+    
+    def extract_many(
+        self, documents: Iterable[Iterable[str]], k: Optional[int] = None, learn: bool = False
+    ) -> List[List[str]]:
+        """
+        Extract keywords for a batch of documents.
+        
+        With ``learn`` the whole batch is recorded in the IDF table before any
+        document is ranked, so terms that are common within the batch are
+        down-weighted consistently.
+        
+        Args:
+            documents: Tokens of each document
+            k: Number of keywords per document
+            learn: Whether to record the batch in the IDF table, skipping
+                documents recorded recently
+        
+        Returns:
+            Keywords for each document in input order
+        """
+        all_counts = [self.count_terms(words) for words in documents]
+        if learn:
+            self.idf.add_documents(all_counts, keys=[document_key(counts) for counts in all_counts])
+        return [self.rank(counts, k) for counts in all_counts]
+
+
+@lru_cache()
+def get_keyword_extractor() -> KeywordExtractor:
+    """Get the process-wide extractor backed by the persisted IDF table."""
+    settings = get_settings()
+    path = settings.keyword_stats_path or os.path.join(settings.storage_dir, "keyword_idf.json")
+    try:
+        idf = IDFTable(path, max_terms=settings.keyword_max_vocabulary)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not load keyword statistics, starting empty", path=path, error=str(e))
+        idf = IDFTable(max_terms=settings.keyword_max_vocabulary)
+    atexit.register(idf.save)
+    return KeywordExtractor(idf)
+
+
+def extract_keywords(words: Sequence[str], limit: int = KEYWORD_LIMIT) -> List[str]:
+    """
+    Rank keywords of a token sequence against the shared corpus statistics.
+    
+    Args:
+        words: Document tokens
+        limit: Maximum number of keywords to return
+    
+    Returns:
+        Keywords ordered by descending TF-IDF score
+    """
+    return get_keyword_extractor().extract(words, k=limit)
@@ -0,0 +1,195 @@
+"""Bounded-memory preprocessing for files and byte streams."""
+
+import codecs
+import mmap
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Union
+
+from ..utils.logging import get_logger
+from .keywords import DEFAULT_MAX_TERMS, KEYWORD_LIMIT, BoundedTermCounter, document_key, get_keyword_extractor
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Tokens longer than this are truncated when carried across chunks
+_MAX_CARRY_LENGTH = 256
+
+StreamSource = Union[str, os.PathLike, bytes, BinaryIO, Iterable[bytes]]
+
+
+class StreamingTextStats:
+    """
+    Incremental text statistics over a sequence of byte chunks.
+    
+    Tracks word state and partial UTF-8 sequences across chunk boundaries, so
+    the totals equal those of the concatenated text while only one chunk is
+    held in memory at a time.
+    """
+    
+    def __init__(self, with_keywords: bool = False, max_terms: int = DEFAULT_MAX_TERMS):
+        """
+        Initialize the accumulator.
+        
+        Args:
+            with_keywords: Whether to collect term frequencies
+            max_terms: Vocabulary cap for term frequencies
+        """
+        self.length = 0
+        self.word_count = 0
+        self.character_count = 0
+        self.byte_count = 0
+        self.chunk_count = 0
+        self.terms = BoundedTermCounter(max_terms) if with_keywords else None
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._in_word = False
+        self._carry = ""
+    
+    def feed(self, data: bytes) -> None:
+        """Add the next chunk of UTF-8 encoded input."""
+        self.byte_count += len(data)
+        self.chunk_count += 1
+        self._add_text(self._decoder.decode(data))
+    
+    def close(self) -> None:
+        """Flush any buffered partial character or token."""
+        self._add_text(self._decoder.decode(b"", final=True))
+        if self.terms is not None and self._carry:
+            self.terms.update((self._carry,))
+        self._carry = ""
+        self._in_word = False
+    
+    def _add_text(self, text: str) -> None:
+        if not text:
+            return
+        
+        self.length += len(text)
+        self.character_count += len(text) - text.count(" ")
+        
+        words = text.split()
+        continues_word = self._in_word and not text[0].isspace()
+        ends_in_word = not text[-1].isspace()
+        
+        # The first token of this chunk is the tail of the previous one
+        self.word_count += len(words) - (1 if continues_word else 0)
+        
+        if self.terms is not None:
+            if continues_word:
+                words[0] = self._carry + words[0]
+            elif self._carry:
+                self.terms.update((self._carry,))
+            self._carry = words.pop()[:_MAX_CARRY_LENGTH] if ends_in_word else ""
+            self.terms.update(words)
+        
+        self._in_word = ends_in_word
+
+
+def _iter_file_chunks(path: Path, chunk_size: int) -> Iterator[bytes]:
+    """Yield file contents in chunks, memory-mapping regular files."""
+    with open(path, "rb") as handle:
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files, pipes and special files cannot be mapped
+            while chunk := handle.read(chunk_size):
+                yield chunk
+            return
+        
+        with mapped:
+            # Page-aligned chunks let us release pages once they are consumed
+            step = max(mmap.PAGESIZE, chunk_size - chunk_size % mmap.PAGESIZE)
+            can_release = hasattr(mapped, "madvise") and hasattr(mmap, "MADV_DONTNEED")
+            if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            
+            for offset in range(0, len(mapped), step):
+                yield mapped[offset:offset + step]
+                if can_release:
+                    mapped.madvise(mmap.MADV_DONTNEED, offset, min(step, len(mapped) - offset))
+
+
+def iter_source_chunks(source: StreamSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield byte chunks from a path, bytes object, binary file or byte iterator.
+    
+    Args:
+        source: Input source
+        chunk_size: Target chunk size in bytes for paths and file objects
+        
+    Returns:
+        Iterator over byte chunks
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    
+    if isinstance(source, (str, os.PathLike)):
+        yield from _iter_file_chunks(Path(source), chunk_size)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+    elif hasattr(source, "read"):
+        while chunk := source.read(chunk_size):
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def preprocess_stream(source: StreamSource, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Compute preprocessing statistics for a file or byte stream.
+    
+    Memory use is bounded by ``options["chunk_size"]`` and the keyword
+    vocabulary cap ``options["max_terms"]``, not by the input size. Derived
+    string options (``uppercase``, ``lowercase``, ``remove_punctuation``)
+    need the whole text and are ignored in this mode. The stream counts as
+    one document for the keyword statistics.
+    
+    Args:
+        source: File path, bytes, binary file object or iterator of bytes
+        options: Processing options dictionary
+        
+    Returns:
+        Processed statistics with metadata
+    """
+    options = options or {}
+    with_keywords = options.get("extract_keywords", False)
+    
+    ignored = [name for name in ("uppercase", "lowercase", "remove_punctuation") if options.get(name)]
+    if ignored:
+        logger.warning("Derived text options are not supported for streamed input", ignored=ignored)
+    
+    stats = StreamingTextStats(
+        with_keywords=with_keywords,
+        max_terms=options.get("max_terms", DEFAULT_MAX_TERMS),
+    )
+    for chunk in iter_source_chunks(source, options.get("chunk_size", DEFAULT_CHUNK_SIZE)):
+        stats.feed(chunk)
+    stats.close()
+    
+    processed: Dict[str, Any] = {
+        "length": stats.length,
+        "word_count": stats.word_count,
+        "character_count": stats.character_count,
+        "byte_count": stats.byte_count,
+        "processed_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if stats.terms is not None:
+        extractor = get_keyword_extractor()
+        counts = stats.terms.counts
+        if options.get("update_keyword_stats", True):
+            extractor.idf.add_documents([counts], keys=[document_key(counts)])
+            extractor.idf.save()
+        keywords = extractor.rank(counts, options.get("keyword_limit", KEYWORD_LIMIT))
+        processed["keywords"] = keywords
+        processed["keyword_counts"] = {term: counts[term] for term in keywords}
+    
+    processed["metadata"] = {
+        "processor": "streaming_preprocessor",
+        "version": "1.0.0",
+        "options_applied": list(options.keys()),
+        "chunk_count": stats.chunk_count,
+        "source": str(source) if isinstance(source, (str, os.PathLike)) else type(source).__name__,
+    }
+    return processed
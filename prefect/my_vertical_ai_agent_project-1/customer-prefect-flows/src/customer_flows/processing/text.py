@@ -0,0 +1,131 @@
+"""Text statistics shared by the preprocessing tasks."""
+
+import string
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence
+
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+
+def count_characters(text: str) -> int:
+    """
+    Count non-space characters without building a stripped copy of the text.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Number of characters other than the space character
+    """
+    return len(text) - text.count(" ")
+
+
+def remove_punctuation(text: str) -> str:
+    """Return ``text`` with ASCII punctuation removed."""
+    return text.translate(_PUNCTUATION_TABLE)
+
+
+# Derived string fields, built only when a caller reads them
+DERIVED_FIELDS: Dict[str, Callable[[str], str]] = {
+    "uppercase": str.upper,
+    "lowercase": str.lower,
+    "clean_text": remove_punctuation,
+}
+
+
+class ProcessedText(Mapping[str, Any]):
+    """
+    Lazy preprocessing result for a single document.
+
+    Counters are computed from one tokenization of the text when the object is
+    created. Derived strings (``uppercase``, ``lowercase``, ``clean_text``) are
+    only built the first time they are read and are never pickled, so passing
+    the result between Prefect tasks costs one copy of the text plus a few
+    integers. The object behaves like the read-only dictionary the tasks used
+    to return.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        derived: Sequence[str] = (),
+        keyword_extractor: Optional[Callable[[List[str]], List[str]]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        processed_at: Optional[str] = None,
+    ):
+        """
+        Scan the text and record its counters.
+
+        Args:
+            text: Original document text
+            derived: Names of derived string fields to expose
+            keyword_extractor: Callable ranking keywords from the scanned
+                tokens; keywords are only computed when it is given
+            metadata: Processing metadata to include in the result
+            processed_at: ISO timestamp; defaults to the current UTC time
+        """
+        unknown = set(derived) - DERIVED_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"Unsupported derived fields: {sorted(unknown)}")
+
+        self.original = text
+        self.derived_fields = tuple(derived)
+        self._cache: Dict[str, str] = {}
+
+        words = text.split()
+        self.counters: Dict[str, Any] = {
+            "length": len(text),
+            "word_count": len(words),
+            "character_count": count_characters(text),
+            "processed_at": processed_at or datetime.now(timezone.utc).isoformat(),
+        }
+        if keyword_extractor is not None:
+            self.counters["keywords"] = keyword_extractor(words)
+        if metadata is not None:
+            self.counters["metadata"] = metadata
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "original":
+            return self.original
+        if key in self.counters:
+            return self.counters[key]
+        if key in self.derived_fields:
+            if key not in self._cache:
+                self._cache[key] = DERIVED_FIELDS[key](self.original)
+            return self._cache[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield "original"
+        yield from self.counters
+        yield from self.derived_fields
+
+    def __len__(self) -> int:
+        return 1 + len(self.counters) + len(self.derived_fields)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_cache"] = {}
+        return state
+
+    def __repr__(self) -> str:
+        return (
+            f"ProcessedText(length={self.counters['length']}, "
+            f"word_count={self.counters['word_count']}, derived={list(self.derived_fields)})"
+        )
+
+    def to_dict(self, include_derived: bool = False) -> Dict[str, Any]:
+        """
+        Convert the result into a plain dictionary.
+
+        Args:
+            include_derived: Whether to build and include derived strings
+
+        Returns:
+            Dictionary with the original text and counters, plus derived
+            strings when requested
+        """
+        result = {"original": self.original, **self.counters}
+        if include_derived:
+            result.update((name, self[name]) for name in self.derived_fields)
+        return result
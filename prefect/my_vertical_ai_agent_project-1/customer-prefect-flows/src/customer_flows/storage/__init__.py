@@ -0,0 +1,67 @@
+"""Result storage backends."""
+
+from .archive import ArchiveBackend, iter_archive, read_manifest, remove_segment
+from .backends import LocalBackend, S3Backend, StorageBackend, commit_backends, get_backend, get_s3_client
+from .checkpoints import CheckpointStore, get_checkpoint_store
+from .cleanup import MAX_REPORTED_FAILURES, CleanupEngine, classify_resource
+from .content_store import (
+    ContentAddressedStore,
+    StoredBlob,
+    canonical_json,
+    content_digest,
+    get_content_store,
+)
+from .database import DatabaseBackend, get_connection_pool
+from .index import ResultIndex, get_result_index, result_flow_name
+from .payloads import PayloadRef, get_payload_store, load_payload, offload_payload, payload_available, read_input
+from .persistence import (
+    PersistenceError,
+    WriteBehindQueue,
+    get_write_behind_queue,
+    persist_payload,
+    write_concurrently,
+)
+from .retention import RetentionPolicy, enforce_retention, rebuild_index, select_expired
+
+__all__ = [
+    "MAX_REPORTED_FAILURES",
+    "ArchiveBackend",
+    "CheckpointStore",
+    "CleanupEngine",
+    "ContentAddressedStore",
+    "DatabaseBackend",
+    "LocalBackend",
+    "PayloadRef",
+    "PersistenceError",
+    "ResultIndex",
+    "RetentionPolicy",
+    "S3Backend",
+    "StorageBackend",
+    "StoredBlob",
+    "WriteBehindQueue",
+    "canonical_json",
+    "classify_resource",
+    "commit_backends",
+    "content_digest",
+    "enforce_retention",
+    "get_backend",
+    "get_checkpoint_store",
+    "get_connection_pool",
+    "get_payload_store",
+    "get_content_store",
+    "get_result_index",
+    "get_s3_client",
+    "get_write_behind_queue",
+    "iter_archive",
+    "load_payload",
+    "offload_payload",
+    "payload_available",
+    "persist_payload",
+    "read_input",
+    "read_manifest",
+    "rebuild_index",
+    "remove_segment",
+    "result_flow_name",
+    "select_expired",
+    "write_concurrently",
+]
@@ -0,0 +1,412 @@
+"""Compressed, partitioned result archive for analytics scans."""
+
+import atexit
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from ..utils.logging import get_logger
+from .backends import StorageBackend
+from .index import KIND_SEGMENT, ResultIndex, result_flow_name
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+CODEC_SUFFIXES = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz"}
+
+
+def _compress(codec: str, data: bytes, level: int) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=level)
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("The zstd archive codec requires zstandard (pip install zstandard)") from e
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+class _BoundedReader(io.RawIOBase):
+    """Read a file only up to the size committed in the manifest."""
+
+    def __init__(self, path: Path, limit: int):
+        self._file = open(path, "rb")
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        n = self._file.readinto(memoryview(buffer)[: self._remaining])
+        self._remaining -= n
+        return n
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def _open_decompressed(codec: str, path: Path, size: int) -> io.BufferedIOBase:
+    raw = io.BufferedReader(_BoundedReader(path, size))
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    import zstandard
+
+    # Segments are a sequence of independent frames, one per flush
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True))
+
+
+@contextmanager
+def _partition_lock(path: Path) -> Iterator[None]:
+    """Serialize changes to a partition across processes."""
+    if fcntl is None:
+        yield
+        return
+    with open(path / ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _segment_file(number: int, codec: str) -> str:
+    return f"part-{number:05d}{CODEC_SUFFIXES[codec]}"
+
+
+class _Partition:
+    """Append state for one ``flow=<name>/date=<day>`` directory."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lines: List[bytes] = []
+        self.size = 0
+        self.first_buffered: Optional[float] = None
+
+
+class ArchiveBackend(StorageBackend):
+    """
+    Backend appending results to compressed, partitioned JSONL segments.
+
+    Results are laid out as ``<root>/flow=<name>/date=<YYYY-MM-DD>/`` with
+    numbered ``part-NNNNN.jsonl.zst`` segments and a ``manifest.json``
+    listing each segment's record count, size and time range. Records are
+    buffered per partition and appended as one compressed frame when
+    ``frame_bytes`` of JSON is pending or ``flush_interval`` seconds have
+    passed; a segment is closed once it reaches ``segment_bytes``.
+
+    ``write`` returns the eventual location of a record that is still only
+    buffered; records of a failed flush stay buffered for the next one.
+    ``commit`` flushes them, and is meant to be called once per flow run
+    (see ``commit_backends``) rather than per record, so frames stay large.
+    """
+
+    name = "archive"
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        codec: str = "zstd",
+        level: int = 3,
+        segment_bytes: int = 128 * 1024 * 1024,
+        frame_bytes: int = 1024 * 1024,
+        flush_interval: float = 5.0,
+        flow_name: Optional[str] = None,
+        index: Optional[ResultIndex] = None,
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            root: Archive root directory
+            codec: ``zstd`` or ``gzip``
+            level: Compression level
+            segment_bytes: Compressed size at which a segment is rolled over
+            frame_bytes: Uncompressed bytes buffered per compressed frame
+            flush_interval: Maximum seconds a record stays buffered
+            flow_name: Partition name; read from each result's metadata if omitted
+            index: Result index that segments are recorded in for retention
+        """
+        if codec not in CODEC_SUFFIXES:
+            raise ValueError(f"Unsupported archive codec: {codec!r}")
+        if codec == "zstd":
+            _compress(codec, b"", level)  # Fail early if zstandard is missing
+
+        self.root = Path(root)
+        self.codec = codec
+        self.level = level
+        self.segment_bytes = segment_bytes
+        self.frame_bytes = frame_bytes
+        self.flush_interval = flush_interval
+        self.flow_name = flow_name
+        self.index = index
+
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name="archive-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    @property
+    def identity(self) -> str:
+        partition = f"?flow={self.flow_name}" if self.flow_name else ""
+        return f"{self.name}:{self.root.resolve()}{partition}"
+
+    def partition_path(self, flow_name: str, day: Union[date, str]) -> Path:
+        """Return the directory holding one flow's results for one day."""
+        day = day.isoformat() if isinstance(day, date) else day
+        return self.root / f"flow={flow_name}" / f"date={day}"
+
+    def location(self, digest: str) -> str:
+        # The partition depends on the payload, so only the root is known here
+        return f"{self.root.resolve().as_uri()}#{digest}"
+
+    def write(self, digest: str, payload: bytes) -> str:
+        return self.append(digest, payload, self.flow_name or result_flow_name(payload))
+
+    def append(
+        self,
+        digest: str,
+        payload: bytes,
+        flow_name: str,
+        archived_at: Optional[datetime] = None,
+    ) -> str:
+        """
+        Buffer a result for its flow's partition.
+
+        Args:
+            digest: SHA-256 hex digest of ``payload``
+            payload: Canonical JSON bytes
+            flow_name: Flow partition
+            archived_at: Timestamp selecting the date partition (defaults to now)
+
+        Returns:
+            Partition URI with the digest as fragment
+        """
+        archived_at = archived_at or datetime.now(timezone.utc)
+        line = (
+            b'{"digest":"' + digest.encode("ascii")
+            + b'","archived_at":"' + archived_at.isoformat().encode("ascii")
+            + b'","result":' + payload + b"}\n"
+        )
+
+        key = (flow_name, archived_at.date().isoformat())
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                partition = self._partitions[key] = _Partition(self.partition_path(*key))
+            partition.lines.append(line)
+            partition.size += len(line)
+            if partition.first_buffered is None:
+                partition.first_buffered = time.monotonic()
+            full = partition.size >= self.frame_bytes
+
+        if full:
+            self._flush_partition(key)
+        return f"{partition.path.resolve().as_uri()}#{digest}"
+
+    def commit(self) -> None:
+        self.flush()
+
+    def flush(self) -> None:
+        """Append every buffered record to its partition."""
+        with self._lock:
+            keys = list(self._partitions)
+        for key in keys:
+            self._flush_partition(key)
+
+    def close(self) -> None:
+        """Flush buffered records and stop the background flusher."""
+        if not self._closed.is_set():
+            self._closed.set()
+            self.flush()
+
+    def _run(self) -> None:
+        while not self._closed.wait(min(self.flush_interval, 1.0)):
+            now = time.monotonic()
+            with self._lock:
+                due = [
+                    key for key, partition in self._partitions.items()
+                    if partition.first_buffered is not None and now - partition.first_buffered >= self.flush_interval
+                ]
+            for key in due:
+                try:
+                    self._flush_partition(key)
+                except Exception as e:
+                    logger.error("Archive flush failed", partition=str(self._partitions[key].path), error=str(e))
+
+    def _flush_partition(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            partition = self._partitions.get(key)
+            if partition is None or not partition.lines:
+                return
+            lines, size, first_buffered = partition.lines, partition.size, partition.first_buffered
+            partition.lines, partition.size, partition.first_buffered = [], 0, None
+
+        try:
+            segment = self._append_frame(partition, key, lines)
+        except Exception:
+            # Put the records back ahead of any buffered since
+            with self._lock:
+                partition.lines[:0] = lines
+                partition.size += size
+                partition.first_buffered = first_buffered
+            raise
+
+        if self.index is not None:
+            self.index.record(partition.path / segment["file"], segment["bytes"], flow=key[0], kind=KIND_SEGMENT)
+
+    def _append_frame(self, partition: _Partition, key: Tuple[str, str], lines: List[bytes]) -> Dict[str, Any]:
+        frame = _compress(self.codec, b"".join(lines), self.level)
+        now = datetime.now(timezone.utc).isoformat()
+
+        partition.path.mkdir(parents=True, exist_ok=True)
+        with _partition_lock(partition.path):
+            manifest = read_manifest(partition.path) or {
+                "version": MANIFEST_VERSION,
+                "flow_name": key[0],
+                "date": key[1],
+                "codec": self.codec,
+                "segments": [],
+            }
+            if manifest["codec"] != self.codec:
+                raise ValueError(f"Partition {partition.path} is archived with {manifest['codec']}")
+            segments = manifest["segments"]
+            if not segments or segments[-1]["bytes"] >= self.segment_bytes:
+                # Number after the last segment; retention may have removed earlier ones
+                number = int(segments[-1]["file"][5:10]) + 1 if segments else 0
+                segments.append({
+                    "file": _segment_file(number, self.codec),
+                    "records": 0,
+                    "bytes": 0,
+                    "first_archived_at": now,
+                })
+            segment = segments[-1]
+
+            with open(partition.path / segment["file"], "ab") as f:
+                # Drop any torn frame from a writer that died before its manifest update
+                f.truncate(segment["bytes"])
+                f.write(frame)
+                f.flush()
+                os.fsync(f.fileno())
+
+            segment["records"] += len(lines)
+            segment["bytes"] += len(frame)
+            segment["last_archived_at"] = now
+            manifest["records"] = sum(s["records"] for s in segments)
+            manifest["updated_at"] = now
+            _write_manifest(partition.path, manifest)
+
+        logger.debug("Archive frame appended", partition=str(partition.path), records=len(lines), bytes=len(frame))
+        return segment
+
+
+def read_manifest(partition_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Read a partition manifest, or return None if the partition is empty."""
+    path = Path(partition_path) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(partition_path: Path, manifest: Dict[str, Any]) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=partition_path, prefix=f".{MANIFEST_NAME}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, partition_path / MANIFEST_NAME)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def remove_segment(segment_path: Union[str, Path]) -> int:
+    """
+    Delete a segment and drop it from its partition manifest.
+
+    The manifest is removed with its last segment.
+
+    Args:
+        segment_path: Segment file
+
+    Returns:
+        Bytes freed, or 0 if the segment was not listed
+    """
+    segment_path = Path(segment_path)
+    partition_path = segment_path.parent
+    if not partition_path.exists():
+        return 0
+    with _partition_lock(partition_path):
+        manifest = read_manifest(partition_path)
+        if manifest is None:
+            return 0
+        kept = [segment for segment in manifest["segments"] if segment["file"] != segment_path.name]
+        if len(kept) == len(manifest["segments"]):
+            return 0
+        # Update the manifest first so readers never see a listed, missing file
+        if kept:
+            manifest["segments"] = kept
+            manifest["records"] = sum(s["records"] for s in kept)
+            manifest["updated_at"] = datetime.now(timezone.utc).isoformat()
+            _write_manifest(partition_path, manifest)
+        else:
+            (partition_path / MANIFEST_NAME).unlink()
+        size = segment_path.stat().st_size if segment_path.exists() else 0
+        segment_path.unlink(missing_ok=True)
+    return size
+
+
+def iter_archive(
+    root: Union[str, Path],
+    flow_name: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream archived records, selecting partitions by flow and date.
+
+    Only segments listed in partition manifests are read, and only up to
+    their committed size, so a month of one flow's results is a scan of a
+    few large compressed files.
+
+    Args:
+        root: Archive root directory
+        flow_name: Only read this flow's partitions
+        start: First day to include
+        end: Last day to include
+
+    Yields:
+        Archived records with ``digest``, ``archived_at`` and ``result``
+    """
+    root = Path(root)
+    flow_dirs = [root / f"flow={flow_name}"] if flow_name else sorted(root.glob("flow=*"))
+    for flow_dir in flow_dirs:
+        for partition_path in sorted(flow_dir.glob("date=*")):
+            day = date.fromisoformat(partition_path.name.split("=", 1)[1])
+            if (start and day < start) or (end and day > end):
+                continue
+            manifest = read_manifest(partition_path)
+            if manifest is None:
+                continue
+            for segment in manifest["segments"]:
+                segment_path = partition_path / segment["file"]
+                with _open_decompressed(manifest["codec"], segment_path, segment["bytes"]) as f:
+                    for line in f:
+                        yield json.loads(line)
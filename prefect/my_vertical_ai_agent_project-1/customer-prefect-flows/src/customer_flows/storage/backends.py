@@ -0,0 +1,249 @@
+"""Storage backends used by result persistence."""
+
+import json
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import get_settings
+from ..utils.logging import get_logger
+from .content_store import ContentAddressedStore, get_content_store
+from .index import KIND_BLOB, ResultIndex, get_result_index, result_flow_name
+
+logger = get_logger(__name__)
+
+
+@lru_cache(maxsize=8)
+def get_s3_client(endpoint_url: Optional[str] = None) -> Any:
+    """
+    Get a process-wide boto3 S3 client.
+
+    boto3 clients are thread-safe and pool their HTTP connections, so one
+    client per endpoint is shared by every backend and cleanup run.
+
+    Args:
+        endpoint_url: Custom endpoint for S3-compatible services
+
+    Returns:
+        A boto3 S3 client
+    """
+    try:
+        import boto3
+    except ImportError as e:
+        raise ImportError("S3 storage requires boto3 (pip install boto3)") from e
+    return boto3.client("s3", endpoint_url=endpoint_url)
+
+
+class StorageBackend(ABC):
+    """A destination for content-addressed result payloads."""
+
+    name: str = "backend"
+
+    @property
+    def identity(self) -> str:
+        """Key telling apart backends of the same kind, e.g. two buckets or databases."""
+        return self.name
+
+    @abstractmethod
+    def location(self, digest: str) -> str:
+        """Return the location a payload with ``digest`` is (or will be) stored at."""
+
+    @abstractmethod
+    def write(self, digest: str, payload: bytes) -> str:
+        """
+        Store a payload.
+
+        Args:
+            digest: SHA-256 hex digest of ``payload``
+            payload: Canonical JSON bytes
+
+        Returns:
+            Storage location
+        """
+
+    def commit(self) -> None:
+        """Make the writes returned so far durable, for backends that buffer them."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class LocalBackend(StorageBackend):
+    """Backend writing to a local content-addressed store."""
+
+    name = "local"
+
+    def __init__(self, store: Optional[ContentAddressedStore] = None, index: Optional[ResultIndex] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            store: Content-addressed store; the shared result store if omitted
+            index: Result index that blobs are recorded in for retention
+        """
+        self.store = store or get_content_store()
+        self.index = index
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name}:{self.store.root.resolve()}"
+
+    def location(self, digest: str) -> str:
+        return self.store.path_for(digest).resolve().as_uri()
+
+    def write(self, digest: str, payload: bytes) -> str:
+        blob = self.store.put_bytes(payload, digest)
+        # Recorded even when deduplicated, so retention ages it from this write
+        if self.index is not None:
+            self.index.record(blob.path, blob.size, flow=result_flow_name(payload), kind=KIND_BLOB)
+        return blob.uri
+
+
+class S3Backend(StorageBackend):
+    """
+    Backend writing to an S3-compatible object store.
+
+    Objects are keyed by digest, so an existing key is never uploaded again.
+    Any client exposing boto3's ``head_object``/``put_object`` interface can
+    be injected, e.g. a filesystem-backed stand-in in tests or a MinIO client.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "customer-flows/results",
+        client: Any = None,
+        endpoint_url: Optional[str] = None,
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            bucket: Bucket name
+            prefix: Key prefix for result objects
+            client: S3 client; a boto3 client is created if omitted
+            endpoint_url: Custom endpoint for S3-compatible services
+        """
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = client if client is not None else get_s3_client(endpoint_url)
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name}:{self.bucket}/{self.prefix}"
+
+    def key_for(self, digest: str) -> str:
+        return f"{self.prefix}/{digest}.json"
+
+    def location(self, digest: str) -> str:
+        return f"s3://{self.bucket}/{self.key_for(digest)}"
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception as e:
+            code = (getattr(e, "response", None) or {}).get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def write(self, digest: str, payload: bytes) -> str:
+        key = self.key_for(digest)
+        if not self._exists(key):
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=payload, ContentType="application/json")
+        return self.location(digest)
+
+
+def _create_backend(name: str, config: Dict[str, Any]) -> Optional[StorageBackend]:
+    settings = get_settings()
+    if name == "local":
+        store = ContentAddressedStore(config["local_path"]) if config.get("local_path") else None
+        return LocalBackend(store, index=get_result_index())
+    if name == "s3":
+        bucket = config.get("s3_bucket") or settings.s3_bucket
+        if not bucket:
+            raise ValueError("The s3 backend requires storage_config['s3_bucket'] or S3_BUCKET")
+        return S3Backend(
+            bucket,
+            prefix=config.get("s3_prefix") or settings.s3_prefix,
+            endpoint_url=config.get("s3_endpoint_url") or settings.s3_endpoint_url,
+        )
+    if name == "database":
+        from .database import DatabaseBackend
+
+        url = config.get("database_url") or settings.database_url
+        if not url:
+            raise ValueError("The database backend requires storage_config['database_url'] or DATABASE_URL")
+        return DatabaseBackend(
+            url,
+            batch_size=config.get("database_batch_size", settings.database_batch_size),
+            flush_interval=config.get("database_flush_interval", settings.database_flush_interval),
+            pool_size=settings.database_pool_size,
+            wait_for_commit=config.get("database_wait_for_commit", settings.database_wait_for_commit),
+        )
+    if name == "archive":
+        from .archive import ArchiveBackend
+
+        return ArchiveBackend(
+            config.get("archive_path") or settings.archive_dir or Path(settings.storage_dir) / "archive",
+            codec=config.get("archive_codec", settings.archive_codec),
+            segment_bytes=config.get("archive_segment_bytes", settings.archive_segment_bytes),
+            flow_name=config.get("flow_name"),
+            index=get_result_index(),
+        )
+    return None
+
+
+# Every backend created by get_backend, for commit_backends
+_BACKENDS: List[StorageBackend] = []
+
+
+@lru_cache(maxsize=32)
+def _create_backend_cached(name: str, config_key: str) -> Optional[StorageBackend]:
+    backend = _create_backend(name, json.loads(config_key))
+    if backend is not None:
+        _BACKENDS.append(backend)
+    return backend
+
+
+def commit_backends() -> None:
+    """
+    Commit the buffered writes of every process-wide backend.
+
+    Call once a flow run has persisted its results, so their rows and
+    archive frames are durable without committing each write separately.
+
+    Raises:
+        Exception: The first commit failure, after every backend was tried
+    """
+    errors = []
+    for backend in list(_BACKENDS):
+        try:
+            backend.commit()
+        except Exception as e:
+            logger.error("Storage backend commit failed", backend=backend.name, error=str(e))
+            errors.append(e)
+    if errors:
+        raise errors[0]
+
+
+def get_backend(name: str, config: Optional[Dict[str, Any]] = None) -> Optional[StorageBackend]:
+    """
+    Get a process-wide backend instance for a storage configuration.
+
+    Backends (and their clients and connections) are created once per
+    distinct configuration and reused across task runs.
+
+    Args:
+        name: Backend name
+        config: Storage configuration options
+
+    Returns:
+        The backend, or None if ``name`` is not supported
+    """
+    options = {key: value for key, value in (config or {}).items() if key != "backends"}
+    return _create_backend_cached(name, json.dumps(options, sort_keys=True, default=str))
@@ -0,0 +1,138 @@
+"""Step checkpoints that let interrupted flow runs resume."""
+
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, List, Optional, Tuple, Union
+
+from ..config import get_settings
+
+CHECKPOINT_SUFFIX = ".pkl"
+
+
+class CheckpointStore:
+    """
+    Completed step outputs of flow runs, keyed by run key and step name.
+
+    Each step is pickled to ``<root>/<run key>/<step>.pkl``. Checkpoints
+    are written to a temporary file and renamed into place, so a run that
+    dies while saving leaves either the complete checkpoint or none.
+    Successful runs clear their checkpoints; ``sweep`` removes those of
+    runs that failed and were never resumed.
+    """
+
+    def __init__(self, root: Union[str, os.PathLike], fsync: bool = True):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding one subdirectory per run key
+            fsync: Whether to fsync checkpoints before renaming them into place
+        """
+        self.root = Path(root)
+        self.fsync = fsync
+
+    def _path(self, run_key: str, step: str) -> Path:
+        return self.root / run_key / f"{step}{CHECKPOINT_SUFFIX}"
+
+    def load(self, run_key: str, step: str) -> Tuple[bool, Any]:
+        """
+        Load a step's checkpoint.
+
+        Args:
+            run_key: Run key
+            step: Step name
+
+        Returns:
+            Tuple of whether the checkpoint exists and its value
+        """
+        try:
+            with open(self._path(run_key, step), "rb") as f:
+                return True, pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+
+    def save(self, run_key: str, step: str, value: Any) -> Path:
+        """
+        Save a step's output.
+
+        Args:
+            run_key: Run key
+            step: Step name
+            value: Picklable step output
+
+        Returns:
+            Checkpoint path
+        """
+        path = self._path(run_key, step)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{step}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+                if self.fsync:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return path
+
+    def completed_steps(self, run_key: str) -> List[str]:
+        """Return the names of the steps checkpointed for a run."""
+        run_dir = self.root / run_key
+        if not run_dir.exists():
+            return []
+        return sorted(path.stem for path in run_dir.glob(f"*{CHECKPOINT_SUFFIX}"))
+
+    def clear(self, run_key: str) -> None:
+        """Delete every checkpoint of a run."""
+        shutil.rmtree(self.root / run_key, ignore_errors=True)
+
+    def sweep(self, max_age_seconds: float, now: Optional[float] = None, dry_run: bool = False) -> List[str]:
+        """
+        Delete the checkpoints of runs that saved no step for a while.
+
+        Only runs that failed or were abandoned keep checkpoints, so the
+        store holds few run directories and is simply listed.
+
+        Args:
+            max_age_seconds: Age of a run's newest checkpoint above which it is deleted
+            now: Current Unix time (defaults to now)
+            dry_run: Only report the runs that would be deleted
+
+        Returns:
+            Run keys whose checkpoints were (or would be) deleted
+        """
+        if not self.root.exists():
+            return []
+        cutoff = (now if now is not None else time.time()) - max_age_seconds
+        expired = []
+        for run_dir in self.root.iterdir():
+            if not run_dir.is_dir():
+                continue
+            try:
+                # Saving renames a checkpoint into the directory, which updates its mtime
+                last_saved = max([run_dir.stat().st_mtime] + [p.stat().st_mtime for p in run_dir.iterdir()])
+            except FileNotFoundError:
+                continue
+            if last_saved < cutoff:
+                expired.append(run_dir.name)
+                if not dry_run:
+                    self.clear(run_dir.name)
+        return sorted(expired)
+
+
+@lru_cache(maxsize=1)
+def get_checkpoint_store() -> CheckpointStore:
+    """Get the process-wide store at ``<storage_dir>/checkpoints``."""
+    return CheckpointStore(Path(get_settings().storage_dir) / "checkpoints")
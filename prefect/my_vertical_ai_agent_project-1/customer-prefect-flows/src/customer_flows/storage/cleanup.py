@@ -0,0 +1,240 @@
+"""Type-aware, batched cleanup of stored resources."""
+
+import os
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+from ..config import get_settings
+from ..utils.logging import get_logger
+from .backends import get_s3_client
+from .database import POSTGRES, RESULTS_TABLE, SQLITE, get_connection_pool, parse_database_url
+
+logger = get_logger(__name__)
+
+S3_DELETE_BATCH = 1000
+DB_DELETE_BATCH = 500
+FILE_DELETE_BATCH = 5000
+MAX_REPORTED_FAILURES = 1000
+
+# Tables that may be cleaned through db:// identifiers and their key column
+DELETABLE_TABLES = {RESULTS_TABLE: "digest"}
+
+_Failure = Tuple[str, str]
+
+
+def classify_resource(resource_id: str) -> Tuple[str, str, str]:
+    """
+    Classify a resource identifier.
+
+    Args:
+        resource_id: ``file://`` URI or path, ``s3://bucket/key`` (a trailing
+            ``/`` selects a prefix) or ``db://table/id``
+
+    Returns:
+        Tuple of resource type, group (bucket or table) and item (path, key,
+        prefix or row id)
+    """
+    parsed = urlparse(resource_id)
+    if parsed.scheme in ("", "file"):
+        return "file", "", unquote(parsed.path) if parsed.scheme else resource_id
+    if parsed.scheme == "s3":
+        key = parsed.path.lstrip("/")
+        return ("s3_prefix" if key.endswith("/") or not key else "s3"), parsed.netloc, key
+    if parsed.scheme == "db":
+        return "db", parsed.netloc, parsed.path.lstrip("/")
+    return "unsupported", parsed.scheme, resource_id
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class CleanupEngine:
+    """
+    Delete resources grouped by type with batch operations.
+
+    Local files are unlinked in parallel chunks, S3 objects and prefixes are
+    removed with ``DeleteObjects`` calls of up to 1000 keys, and database rows
+    with chunked ``DELETE ... WHERE id IN (...)`` statements. Batches of all
+    types run concurrently; only aggregate counts and failures are kept.
+
+    Local paths are only deleted below ``local_root`` (after resolving
+    symlinks and ``..``), and directories only with ``allow_directories``;
+    anything else is reported as a failure.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any = None,
+        database_url: Optional[str] = None,
+        max_workers: int = 8,
+        max_reported_failures: int = MAX_REPORTED_FAILURES,
+        local_root: Optional[Union[str, Path]] = None,
+        allow_directories: bool = False,
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            s3_client: S3 client; the shared boto3 client is used if omitted
+            database_url: Database holding ``db://`` resources
+            max_workers: Batches deleted concurrently
+            max_reported_failures: Failures listed individually in the result
+            local_root: Directory local deletions are confined to (defaults to
+                ``settings.storage_dir``)
+            allow_directories: Whether local directories are removed recursively
+        """
+        self._s3_client = s3_client
+        self.local_root = Path(local_root or get_settings().storage_dir).resolve()
+        self.allow_directories = allow_directories
+        self.database_url = database_url
+        self.max_workers = max_workers
+        self.max_reported_failures = max_reported_failures
+
+    @property
+    def s3_client(self) -> Any:
+        if self._s3_client is None:
+            self._s3_client = get_s3_client()
+        return self._s3_client
+
+    def run(self, resource_ids: List[str]) -> Dict[str, Any]:
+        """
+        Delete resources.
+
+        Args:
+            resource_ids: Resource identifiers
+
+        Returns:
+            Summary with counts per type and the failed resources
+        """
+        groups: Dict[Tuple[str, str], List[str]] = defaultdict(list)
+        for resource_id in resource_ids:
+            kind, group, item = classify_resource(resource_id)
+            groups[(kind, group)].append(item)
+
+        batches: List[Tuple[str, Callable[[], Tuple[int, List[_Failure]]]]] = []
+        for (kind, group), items in groups.items():
+            batches.extend((kind, job) for job in self._plan(kind, group, items))
+
+        counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"cleaned": 0, "failed": 0})
+        failures: List[_Failure] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cleanup") as executor:
+            futures = {executor.submit(job): kind for kind, job in batches}
+            for future in as_completed(futures):
+                kind = futures[future]
+                cleaned, failed = future.result()
+                counts[kind]["cleaned"] += cleaned
+                counts[kind]["failed"] += len(failed)
+                failures.extend(failed)
+
+        total_failed = len(failures)
+        return {
+            "failed_cleanups": [
+                {"resource_id": resource_id, "error": error}
+                for resource_id, error in failures[: self.max_reported_failures]
+            ],
+            "cleanup_summary": {
+                "total_resources": len(resource_ids),
+                "successfully_cleaned": sum(c["cleaned"] for c in counts.values()),
+                "failed_cleanups": total_failed,
+                "unreported_failures": max(0, total_failed - self.max_reported_failures),
+                "by_type": dict(counts),
+            },
+            "cleaned_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def _plan(self, kind: str, group: str, items: List[str]) -> List[Callable[[], Tuple[int, List[_Failure]]]]:
+        if kind == "file":
+            return [lambda chunk=chunk: self._delete_files(chunk) for chunk in _chunks(items, FILE_DELETE_BATCH)]
+        if kind == "s3":
+            return [
+                lambda chunk=chunk: self._delete_keys(group, chunk)
+                for chunk in _chunks(items, S3_DELETE_BATCH)
+            ]
+        if kind == "s3_prefix":
+            return [lambda prefix=prefix: self._delete_prefix(group, prefix) for prefix in items]
+        if kind == "db":
+            return [lambda chunk=chunk: self._delete_rows(group, chunk) for chunk in _chunks(items, DB_DELETE_BATCH)]
+        return [lambda: (0, [(item, f"Unsupported resource type: {group or 'unknown'}") for item in items])]
+
+    def _delete_files(self, paths: List[str]) -> Tuple[int, List[_Failure]]:
+        cleaned, failures = 0, []
+        for path in paths:
+            resolved = Path(path).resolve()
+            if resolved == self.local_root or not resolved.is_relative_to(self.local_root):
+                failures.append((path, f"Outside the storage root {self.local_root}"))
+                continue
+            try:
+                try:
+                    os.unlink(resolved)
+                except (IsADirectoryError, PermissionError):
+                    if not resolved.is_dir():
+                        raise
+                    if not self.allow_directories:
+                        failures.append((path, "Is a directory; directory cleanup is not allowed"))
+                        continue
+                    shutil.rmtree(resolved)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                failures.append((path, str(e)))
+                continue
+            cleaned += 1
+        return cleaned, failures
+
+    def _delete_keys(self, bucket: str, keys: List[str]) -> Tuple[int, List[_Failure]]:
+        try:
+            response = self.s3_client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+        except Exception as e:
+            return 0, [(f"s3://{bucket}/{key}", str(e)) for key in keys]
+        failures = [
+            (f"s3://{bucket}/{error['Key']}", f"{error.get('Code')}: {error.get('Message')}")
+            for error in response.get("Errors", [])
+        ]
+        return len(keys) - len(failures), failures
+
+    def _delete_prefix(self, bucket: str, prefix: str) -> Tuple[int, List[_Failure]]:
+        cleaned, failures, token = 0, [], None
+        while True:
+            kwargs = {"Bucket": bucket, "Prefix": prefix}
+            if token:
+                kwargs["ContinuationToken"] = token
+            try:
+                page = self.s3_client.list_objects_v2(**kwargs)
+            except Exception as e:
+                return cleaned, failures + [(f"s3://{bucket}/{prefix}", str(e))]
+            keys = [obj["Key"] for obj in page.get("Contents", [])]
+            if keys:
+                page_cleaned, page_failures = self._delete_keys(bucket, keys)
+                cleaned += page_cleaned
+                failures.extend(page_failures)
+            if not page.get("IsTruncated"):
+                return cleaned, failures
+            token = page["NextContinuationToken"]
+
+    def _delete_rows(self, table: str, ids: List[str]) -> Tuple[int, List[_Failure]]:
+        resource_ids = [f"db://{table}/{row_id}" for row_id in ids]
+        if table not in DELETABLE_TABLES:
+            return 0, [(resource_id, f"Table {table!r} cannot be cleaned") for resource_id in resource_ids]
+        if not self.database_url:
+            return 0, [(resource_id, "DATABASE_URL is not configured") for resource_id in resource_ids]
+
+        dialect = SQLITE if parse_database_url(self.database_url)[0] == "sqlite" else POSTGRES
+        placeholders = ", ".join([dialect.placeholder] * len(ids))
+        statement = f"DELETE FROM {table} WHERE {DELETABLE_TABLES[table]} IN ({placeholders})"
+        try:
+            with get_connection_pool(self.database_url, get_settings().database_pool_size).connection() as conn:
+                conn.cursor().execute(statement, ids)
+        except Exception as e:
+            return 0, [(resource_id, str(e)) for resource_id in resource_ids]
+        # Rows that were already gone count as cleaned, like missing files
+        return len(ids), []
@@ -0,0 +1,179 @@
+"""Content-addressed local blob store for flow results."""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path, PurePath
+from typing import Any, Mapping, Optional, Union
+from uuid import UUID
+
+from ..config import get_settings
+
+
+def _json_default(value: Any) -> Any:
+    """
+    Encode values the json module does not handle natively.
+
+    Only types with a deterministic encoding are accepted. Falling back to
+    ``str`` would let default reprs (which embed memory addresses) and
+    lossy string forms into digests and cache keys.
+
+    Raises:
+        TypeError: If ``value`` has no canonical encoding
+    """
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (PurePath, UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} has no canonical JSON encoding")
+
+
+def canonical_json(value: Any) -> bytes:
+    """
+    Serialize a value to canonical JSON bytes.
+
+    Keys are sorted and whitespace is fixed, so equal values always produce
+    identical bytes and therefore identical digests.
+
+    Args:
+        value: JSON-compatible value
+
+    Returns:
+        UTF-8 encoded canonical JSON
+
+    Raises:
+        TypeError: If ``value`` contains an object with no canonical encoding
+    """
+    return json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default
+    ).encode("utf-8")
+
+
+def content_digest(data: bytes) -> str:
+    """Return the full SHA-256 hex digest of ``data``."""
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    """Location of a blob in the content-addressed store."""
+
+    digest: str
+    path: Path
+    size: int
+    written: bool
+
+    @property
+    def uri(self) -> str:
+        return self.path.resolve().as_uri()
+
+
+class ContentAddressedStore:
+    """
+    Local blob store keyed by the SHA-256 digest of each blob.
+
+    Blobs live in a sharded layout (``ab/cd/abcd....json``) so no directory
+    grows too large. Writes go to a temporary file in the target directory
+    and are renamed into place, so readers never observe partial blobs. A
+    blob that already exists is not rewritten: storing identical content
+    again costs a hash and a stat call.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, os.PathLike],
+        shard_depth: int = 2,
+        shard_width: int = 2,
+        suffix: str = ".json",
+        fsync: bool = True,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            root: Root directory of the store
+            shard_depth: Number of directory levels
+            shard_width: Hex characters per directory level
+            suffix: File suffix for blobs
+            fsync: Whether to fsync blobs before renaming them into place
+        """
+        self.root = Path(root)
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+        self.suffix = suffix
+        self.fsync = fsync
+
+    def path_for(self, digest: str) -> Path:
+        """Return the path of the blob with the given digest."""
+        width = self.shard_width
+        shards = [digest[i * width:(i + 1) * width] for i in range(self.shard_depth)]
+        return self.root.joinpath(*shards, digest + self.suffix)
+
+    def exists(self, digest: str) -> bool:
+        """Return whether a blob with the given digest is stored."""
+        return self.path_for(digest).exists()
+
+    def put_bytes(self, data: bytes, digest: Optional[str] = None) -> StoredBlob:
+        """
+        Store raw bytes unless a blob with the same digest exists.
+
+        Args:
+            data: Blob contents
+            digest: Precomputed SHA-256 digest of ``data``
+
+        Returns:
+            The stored blob
+        """
+        digest = digest or content_digest(data)
+        path = self.path_for(digest)
+        if path.exists():
+            return StoredBlob(digest, path, len(data), written=False)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{digest[:16]}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+                if self.fsync:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return StoredBlob(digest, path, len(data), written=True)
+
+    def put(self, value: Any) -> StoredBlob:
+        """Store a value as canonical JSON."""
+        return self.put_bytes(canonical_json(value))
+
+    def get_bytes(self, digest: str) -> bytes:
+        """Read the blob with the given digest."""
+        return self.path_for(digest).read_bytes()
+
+    def get(self, digest: str) -> Any:
+        """Read and decode a JSON blob."""
+        return json.loads(self.get_bytes(digest))
+
+
+@lru_cache()
+def get_content_store() -> ContentAddressedStore:
+    """Get the process-wide result store under ``settings.storage_dir``."""
+    return ContentAddressedStore(Path(get_settings().storage_dir) / "results")
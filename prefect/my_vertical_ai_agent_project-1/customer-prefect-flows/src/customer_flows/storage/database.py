@@ -0,0 +1,331 @@
+"""Pooled, micro-batched database backend for result payloads."""
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from ..utils.logging import get_logger
+from .backends import StorageBackend
+
+logger = get_logger(__name__)
+
+RESULTS_TABLE = "results"
+
+
+class SQLiteConnectionPool:
+    """
+    Small pool of SQLite connections shared across threads.
+
+    Connections are opened lazily up to ``size`` and keep their own prepared
+    statement cache, so repeated inserts are compiled once per connection.
+    """
+
+    def __init__(self, path: str, size: int = 5):
+        """
+        Initialize the pool.
+
+        Args:
+            path: Database file path or ``:memory:``
+            size: Maximum number of open connections
+        """
+        self.path = path
+        # Every in-memory connection is a separate database
+        self.size = 1 if path == ":memory:" else size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, cached_statements=256)
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, committing on success and rolling back on error."""
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close every connection opened by the pool."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class _Dialect:
+    """SQL differences between the supported databases."""
+
+    def __init__(self, payload_type: str, placeholder: str, payload_cast: str = ""):
+        self.placeholder = placeholder
+        self.create_table = (
+            f"CREATE TABLE IF NOT EXISTS {RESULTS_TABLE} ("
+            "digest TEXT PRIMARY KEY, "
+            f"payload {payload_type} NOT NULL, "
+            "created_at TEXT NOT NULL)"
+        )
+        self.insert = (
+            f"INSERT INTO {RESULTS_TABLE} (digest, payload, created_at) "
+            f"VALUES ({placeholder}, {placeholder}{payload_cast}, {placeholder}) "
+            "ON CONFLICT (digest) DO NOTHING"
+        )
+
+
+SQLITE = _Dialect(payload_type="TEXT", placeholder="?")
+POSTGRES = _Dialect(payload_type="JSONB", placeholder="%s", payload_cast="::jsonb")
+
+
+def parse_database_url(url: str) -> Tuple[str, str]:
+    """
+    Split a database URL into its dialect and connection target.
+
+    Args:
+        url: ``sqlite:///path.db``, ``sqlite:///:memory:`` or ``postgresql://...``
+
+    Returns:
+        Tuple of dialect name (``sqlite`` or ``postgresql``) and target
+    """
+    scheme, sep, rest = url.partition("://")
+    if not sep:
+        raise ValueError(f"Invalid database URL: {url!r}")
+    scheme = scheme.split("+", 1)[0].lower()
+
+    if scheme == "sqlite":
+        # sqlite:///relative.db, sqlite:////absolute.db, sqlite:// for memory
+        path = rest[1:] if rest.startswith("/") else rest
+        return "sqlite", path or ":memory:"
+    if scheme in ("postgresql", "postgres"):
+        return "postgresql", f"postgresql://{rest}"
+    raise ValueError(f"Unsupported database URL scheme: {scheme!r}")
+
+
+@lru_cache(maxsize=8)
+def get_connection_pool(url: str, size: int = 5) -> Any:
+    """
+    Get the process-wide connection pool for a database URL.
+
+    Args:
+        url: Database URL
+        size: Maximum number of pooled connections
+
+    Returns:
+        A pool exposing a ``connection()`` context manager
+    """
+    dialect, target = parse_database_url(url)
+    if dialect == "sqlite":
+        pool = SQLiteConnectionPool(target, size=size)
+    else:
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as e:
+            raise ImportError(
+                "Postgres persistence requires psycopg (pip install 'psycopg[binary,pool]')"
+            ) from e
+        # prepare_threshold=0 prepares statements server-side on first use
+        pool = ConnectionPool(target, min_size=1, max_size=size, kwargs={"prepare_threshold": 0}, open=True)
+    atexit.register(pool.close)
+    return pool
+
+
+class DatabaseBackend(StorageBackend):
+    """
+    Backend storing result payloads as JSON rows.
+
+    Writes are buffered and inserted with one ``executemany`` per batch,
+    flushed when ``batch_size`` rows are pending or ``flush_interval``
+    seconds after the first pending row. By default writes return once
+    buffered, so sequential writers never wait out the interval and one
+    batch collects every row written meanwhile; rows of a failed batch stay
+    buffered for the next flush and pending rows are flushed on close. With
+    ``wait_for_commit`` each write blocks until its batch is committed, so
+    only concurrent writers share a round trip and every write pays up to
+    ``flush_interval`` of latency. Persistence commits the pending rows
+    before reporting a result as written, so those writes batch with
+    whatever else is pending rather than waiting for the interval.
+    """
+
+    name = "database"
+
+    def __init__(
+        self,
+        url: str,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        pool_size: int = 5,
+        wait_for_commit: bool = False,
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            url: Database URL
+            batch_size: Rows per bulk insert
+            flush_interval: Maximum seconds a row waits before being flushed
+            pool_size: Maximum pooled connections
+            wait_for_commit: Whether writes block until committed
+        """
+        dialect, _ = parse_database_url(url)
+        # Spilled writes are keyed by identity, so keep the password out of it
+        parts = urlsplit(url)
+        safe_url = url
+        if parts.password:
+            safe_url = urlunsplit(parts._replace(netloc=parts.netloc.replace(f":{parts.password}@", "@", 1)))
+        self._identity = f"{self.name}:{safe_url}"
+        self.dialect = SQLITE if dialect == "sqlite" else POSTGRES
+        self.pool = get_connection_pool(url, pool_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.wait_for_commit = wait_for_commit
+        self.batches_flushed = 0
+
+        self._pending: List[Tuple[Tuple[str, str, str], Future]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        with self.pool.connection() as conn:
+            conn.execute(self.dialect.create_table)
+
+        self._flusher = threading.Thread(target=self._run, name="database-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    @property
+    def identity(self) -> str:
+        return self._identity
+
+    def location(self, digest: str) -> str:
+        return f"db://{RESULTS_TABLE}/{digest}"
+
+    def write(self, digest: str, payload: bytes) -> str:
+        future = self._enqueue([(digest, payload)])[0]
+        if self.wait_for_commit:
+            future.result()
+        return self.location(digest)
+
+    def write_many(self, items: Iterable[Tuple[str, bytes]]) -> List[str]:
+        """
+        Store many payloads, waiting for them to commit if configured to.
+
+        Args:
+            items: ``(digest, payload)`` pairs
+
+        Returns:
+            Storage locations in input order
+        """
+        items = list(items)
+        futures = self._enqueue(items)
+        if self.wait_for_commit:
+            wait(futures)
+            for future in futures:
+                future.result()
+        return [self.location(digest) for digest, _ in items]
+
+    def _enqueue(self, items: List[Tuple[str, bytes]]) -> List[Future]:
+        if self._closed:
+            raise RuntimeError("Database backend is closed")
+        created_at = datetime.now(timezone.utc).isoformat()
+        futures = []
+        with self._lock:
+            for digest, payload in items:
+                future: Future = Future()
+                self._pending.append(((digest, payload.decode("utf-8"), created_at), future))
+                futures.append(future)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+        else:
+            self._wakeup.set()
+        return futures
+
+    def commit(self) -> None:
+        self.flush()
+
+    def flush(self) -> int:
+        """
+        Insert every pending row.
+
+        Returns:
+            Number of rows flushed
+        """
+        flushed = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch, self._pending = self._pending[: self.batch_size], self._pending[self.batch_size :]
+                if not batch:
+                    return flushed
+                try:
+                    with self.pool.connection() as conn:
+                        conn.cursor().executemany(self.dialect.insert, [row for row, _ in batch])
+                except Exception as e:
+                    logger.error("Database batch insert failed", rows=len(batch), error=str(e))
+                    for _, future in batch:
+                        future.set_exception(e)
+                    if not self.wait_for_commit:
+                        # Nobody is waiting on these rows; keep them for the next flush
+                        with self._lock:
+                            self._pending[:0] = [(row, Future()) for row, _ in batch]
+                    raise
+                for _, future in batch:
+                    future.set_result(None)
+                self.batches_flushed += 1
+                flushed += len(batch)
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                return
+            # Give concurrent writers a chance to join the batch
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                # Already logged and reported to any waiting writers
+                pass
+
+    def close(self) -> None:
+        """Flush pending rows and stop the background flusher."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Dropping unflushed database rows", rows=len(self._pending), error=str(e))
+        self._closed = True
+        self._wakeup.set()
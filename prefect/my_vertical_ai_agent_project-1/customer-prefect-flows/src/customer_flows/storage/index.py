@@ -0,0 +1,158 @@
+"""Index of stored result files used for retention."""
+
+import json
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+from ..config import get_settings
+
+DEFAULT_FLOW = "unknown"
+
+KIND_BLOB = "blob"
+KIND_SEGMENT = "segment"
+KIND_PAYLOAD = "payload"
+
+# Flow name of offloaded task payloads, which may be shared by several flows
+PAYLOAD_FLOW = "payloads"
+
+
+def result_flow_name(payload: bytes) -> str:
+    """
+    Find the flow name recorded in a serialized flow result.
+
+    Args:
+        payload: JSON bytes of a flow result
+
+    Returns:
+        The flow name from ``flow_metadata`` or ``metadata``, or ``unknown``
+    """
+    try:
+        result = json.loads(payload)
+    except ValueError:
+        return DEFAULT_FLOW
+    if isinstance(result, dict):
+        for key in ("flow_metadata", "metadata"):
+            meta = result.get(key)
+            if isinstance(meta, dict) and meta.get("flow_name"):
+                return str(meta["flow_name"])
+    return DEFAULT_FLOW
+
+
+class ResultIndex:
+    """
+    SQLite index of stored result files.
+
+    Each entry records a file's path, size, creation time, flow and kind
+    (a content-addressed ``blob``, an archive ``segment`` or an offloaded
+    task ``payload``), so retention
+    can select the oldest entries with indexed queries instead of walking
+    the storage tree.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open (and create if needed) the index.
+
+        Args:
+            path: Index database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "path TEXT PRIMARY KEY, "
+                "size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "flow TEXT NOT NULL, "
+                "kind TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at, path)")
+
+    def record(
+        self,
+        path: Union[str, Path],
+        size: int,
+        flow: str = DEFAULT_FLOW,
+        kind: str = KIND_BLOB,
+        created_at: Optional[float] = None,
+    ) -> None:
+        """
+        Add a file to the index, or update the size and age of an indexed file.
+
+        Content-addressed files are recorded on every write, including
+        writes deduplicated against an existing file, so an entry ages from
+        the last time its content was stored.
+
+        Args:
+            path: File path
+            size: File size in bytes
+            flow: Flow that produced the file
+            kind: ``blob``, ``segment`` or ``payload``
+            created_at: Time the file was (last) stored as a Unix timestamp (defaults to now)
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO entries (path, size, created_at, flow, kind) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET size = excluded.size, created_at = excluded.created_at",
+                (str(Path(path).resolve()), size, created_at if created_at is not None else time.time(), flow, kind),
+            )
+
+    def remove(self, paths: Iterable[str]) -> None:
+        """Drop entries from the index."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM entries WHERE path = ?", ((path,) for path in paths))
+
+    def totals(self, flow: Optional[str] = None) -> Dict[str, int]:
+        """Return the number of entries and their total size."""
+        where, params = ("WHERE flow = ?", (flow,)) if flow else ("", ())
+        with self._lock:
+            row = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries {where}", params).fetchone()
+        return {"entries": row[0], "bytes": row[1]}
+
+    def oldest(self, flow: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate entries from oldest to newest.
+
+        Entries are fetched in keyset-paginated batches, so stopping early
+        reads only the part of the index that was needed.
+
+        Args:
+            flow: Only iterate this flow's entries
+            batch_size: Entries fetched per query
+        """
+        last = (-1.0, "")
+        flow_filter = "AND flow = ?" if flow else ""
+        while True:
+            params = [last[0], last[0], last[1]] + ([flow] if flow else []) + [batch_size]
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT path, size, created_at, flow, kind FROM entries "
+                    "WHERE (created_at > ? OR (created_at = ? AND path > ?)) "
+                    f"{flow_filter} ORDER BY created_at, path LIMIT ?",
+                    params,
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            last = (rows[-1]["created_at"], rows[-1]["path"])
+
+    def close(self) -> None:
+        """Close the index database."""
+        with self._lock:
+            self._conn.close()
+
+
+@lru_cache(maxsize=1)
+def get_result_index() -> ResultIndex:
+    """Get the process-wide index at ``<storage_dir>/index.db``."""
+    return ResultIndex(Path(get_settings().storage_dir) / "index.db")
@@ -0,0 +1,174 @@
+"""Pass large task payloads by reference instead of by value."""
+
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+from ..config import get_settings
+from .backends import get_s3_client
+from .content_store import ContentAddressedStore
+from .index import KIND_PAYLOAD, PAYLOAD_FLOW, get_result_index
+
+
+@dataclass(frozen=True)
+class PayloadRef:
+    """
+    Handle to a payload held in the local payload store.
+
+    Handles pickle to a digest and a few integers, so Prefect persists and
+    checkpoints them instead of the payload. The payload is only read when
+    a task calls ``load``.
+    """
+
+    digest: str
+    size: int
+    type_name: str
+
+    def load(self) -> Any:
+        """Read the payload; repeated loads of a recent payload share one copy."""
+        return _load_blob(self.digest)
+
+    def exists(self) -> bool:
+        """Return whether the payload is still stored (retention may expire it)."""
+        return get_payload_store().exists(self.digest)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "payload_ref": self.digest,
+            "size": self.size,
+            "type": self.type_name,
+            "uri": get_payload_store().path_for(self.digest).resolve().as_uri(),
+        }
+
+
+@lru_cache()
+def get_payload_store() -> ContentAddressedStore:
+    """Get the process-wide payload store at ``<storage_dir>/payloads``."""
+    return ContentAddressedStore(Path(get_settings().storage_dir) / "payloads", suffix=".pkl")
+
+
+_MISSING = object()
+
+
+class _PayloadCache:
+    """Recently loaded payloads, bounded by their total pickled size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Any:
+        """Return a cached payload, or ``_MISSING``."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return _MISSING
+            self._entries.move_to_end(digest)
+            return entry[0]
+
+    def put(self, digest: str, value: Any, size: int) -> None:
+        """Cache a payload, evicting the least recently used ones to fit."""
+        # A payload taking most of the budget would only evict everything else
+        if size > self.max_bytes // 2:
+            return
+        with self._lock:
+            if digest in self._entries:
+                return
+            self._entries[digest] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+
+@lru_cache(maxsize=1)
+def _get_payload_cache() -> _PayloadCache:
+    return _PayloadCache(get_settings().payload_cache_bytes)
+
+
+def _load_blob(digest: str) -> Any:
+    cache = _get_payload_cache()
+    value = cache.get(digest)
+    if value is _MISSING:
+        data = get_payload_store().get_bytes(digest)
+        value = pickle.loads(data)
+        cache.put(digest, value, len(data))
+    return value
+
+
+def offload_payload(value: Any, threshold: Optional[int] = None) -> Any:
+    """
+    Replace a large value with a reference to a stored copy.
+
+    Identical payloads are stored once, so offloading the same value from
+    a retried task or another flow run costs a hash and a stat call. Every
+    offload records the payload in the result index under the ``payloads``
+    flow, so retention expires payloads that were not offloaded again for
+    its maximum age; keep that age above the longest flow run.
+
+    Args:
+        value: Picklable value
+        threshold: Pickled size in bytes above which the value is stored;
+            defaults to ``PAYLOAD_REF_THRESHOLD``. None in the settings
+            disables offloading.
+
+    Returns:
+        A ``PayloadRef`` for large values, otherwise ``value`` itself
+    """
+    if threshold is None:
+        threshold = get_settings().payload_ref_threshold
+    if threshold is None or isinstance(value, PayloadRef):
+        return value
+
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) <= threshold:
+        return value
+    blob = get_payload_store().put_bytes(data)
+    get_result_index().record(blob.path, blob.size, flow=PAYLOAD_FLOW, kind=KIND_PAYLOAD)
+    return PayloadRef(blob.digest, blob.size, type(value).__name__)
+
+
+def payload_available(value: Any) -> bool:
+    """Return False for a ``PayloadRef`` whose payload expired, otherwise True."""
+    return value.exists() if isinstance(value, PayloadRef) else True
+
+
+def load_payload(value: Any) -> Any:
+    """Return the payload behind a ``PayloadRef``, or ``value`` unchanged."""
+    return value.load() if isinstance(value, PayloadRef) else value
+
+
+def read_input(input_data: str) -> str:
+    """
+    Resolve a flow input given as text or as a URI.
+
+    ``file://`` URIs are read from the local filesystem and ``s3://`` URIs
+    from the configured S3-compatible store, so large documents never pass
+    through the Prefect API as parameters. Any other string is the input
+    itself.
+
+    Args:
+        input_data: Inline text, ``file://`` URI or ``s3://bucket/key`` URI
+
+    Returns:
+        Input text
+    """
+    # Only parse the supported schemes; inline documents can be large
+    if not input_data.startswith(("file://", "s3://")):
+        return input_data
+    parsed = urlparse(input_data)
+    if parsed.scheme == "file":
+        return Path(url2pathname(parsed.path)).read_text(encoding="utf-8")
+    if parsed.scheme == "s3":
+        client = get_s3_client(get_settings().s3_endpoint_url)
+        response = client.get_object(Bucket=parsed.netloc, Key=unquote(parsed.path.lstrip("/")))
+        return response["Body"].read().decode("utf-8")
+    return input_data
@@ -0,0 +1,348 @@
+"""Concurrent result persistence with an optional write-behind queue."""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from ..config import get_settings
+from ..utils.logging import get_logger
+from .backends import StorageBackend
+
+logger = get_logger(__name__)
+
+_PendingWrite = Tuple[str, str, bytes]
+
+
+class PersistenceError(RuntimeError):
+    """Raised when one or more storage backends fail to persist a payload."""
+
+    def __init__(self, failures: Dict[str, BaseException]):
+        self.failures = failures
+        details = ", ".join(f"{name}: {error}" for name, error in failures.items())
+        super().__init__(f"Persistence failed for backend(s) {details}")
+
+
+@lru_cache(maxsize=1)
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the process-wide thread pool used for backend writes."""
+    executor = ThreadPoolExecutor(
+        max_workers=get_settings().persistence_max_workers,
+        thread_name_prefix="persist",
+    )
+    atexit.register(executor.shutdown, wait=True)
+    return executor
+
+
+def _write(backend: StorageBackend, digest: str, payload: bytes, commit: bool) -> str:
+    location = backend.write(digest, payload)
+    if commit:
+        backend.commit()
+    return location
+
+
+def write_concurrently(
+    backends: List[StorageBackend],
+    digest: str,
+    payload: bytes,
+    commit: bool = False,
+) -> Dict[str, str]:
+    """
+    Write a payload to several backends at once.
+
+    Every write is allowed to finish before failures are reported, so a slow
+    or broken backend never leaves the others half-done. Backends that
+    buffer writes (database, archive) batch them with other writes and
+    commit on their own schedule unless ``commit`` is set.
+
+    Args:
+        backends: Backends to write to
+        digest: SHA-256 hex digest of ``payload``
+        payload: Canonical JSON bytes
+        commit: Commit buffering backends before returning, for callers
+            that read the result back right away
+
+    Returns:
+        Storage location per backend name
+
+    Raises:
+        PersistenceError: If any backend failed
+    """
+    if len(backends) == 1:
+        backend = backends[0]
+        try:
+            return {backend.name: _write(backend, digest, payload, commit)}
+        except Exception as e:
+            raise PersistenceError({backend.name: e}) from e
+
+    executor = _get_executor()
+    futures = {
+        backend.name: executor.submit(_write, backend, digest, payload, commit) for backend in backends
+    }
+    wait(futures.values())
+
+    failures = {name: future.exception() for name, future in futures.items() if future.exception()}
+    if failures:
+        raise PersistenceError(failures)
+    return {name: future.result() for name, future in futures.items()}
+
+
+class WriteBehindQueue:
+    """
+    Background writer for secondary storage backends.
+
+    Each write is committed before it counts as flushed, and a failed write
+    or commit is retried with exponential backoff. Writes that are still
+    pending at shutdown, or that exhaust their retries, are appended to a
+    JSONL spill file and replayed the next time the queue starts, so an
+    acknowledged result is never lost with the process. Backends are keyed
+    by ``StorageBackend.identity``, so two buckets or databases of the same
+    kind keep their own writes, including in the spill file.
+    """
+
+    def __init__(
+        self,
+        spill_path: Union[str, Path],
+        workers: int = 2,
+        max_attempts: int = 5,
+        retry_delay: float = 0.5,
+    ):
+        """
+        Initialize and start the queue.
+
+        Args:
+            spill_path: JSONL file holding writes not yet flushed
+            workers: Number of background writer threads
+            max_attempts: Attempts per write before it is spilled
+            retry_delay: Initial backoff between attempts in seconds
+        """
+        self.spill_path = Path(spill_path)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._backends: Dict[str, StorageBackend] = {}
+        self._queue: "queue.Queue[Optional[_PendingWrite]]" = queue.Queue()
+        self._failed: List[_PendingWrite] = []
+        self._inflight: Dict[int, _PendingWrite] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"write-behind-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def register(self, backend: StorageBackend) -> bool:
+        """
+        Make a backend available to queued and spilled writes.
+
+        Returns:
+            True if no backend with this identity was registered before
+        """
+        with self._lock:
+            is_new = backend.identity not in self._backends
+            self._backends[backend.identity] = backend
+        if is_new:
+            self.replay()
+        return is_new
+
+    def submit(self, backend: StorageBackend, digest: str, payload: bytes) -> None:
+        """
+        Queue a write.
+
+        Args:
+            backend: Backend to write to
+            digest: SHA-256 hex digest of ``payload``
+            payload: Canonical JSON bytes
+        """
+        if backend.identity not in self._backends:
+            self.register(backend)
+        item = (backend.identity, digest, payload)
+        if self._closed:
+            self._spill([item])
+        else:
+            self._queue.put(item)
+
+    def replay(self) -> int:
+        """
+        Re-queue writes spilled by a previous process.
+
+        Entries for backends that have not been registered stay spilled.
+
+        Returns:
+            Number of writes re-queued
+        """
+        with self._lock:
+            if self._closed or not self.spill_path.exists():
+                return 0
+            replaying = self.spill_path.with_suffix(".replaying")
+            os.replace(self.spill_path, replaying)
+
+        requeued, unknown = 0, []
+        with open(replaying, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                item = (entry["backend"], entry["digest"], entry["payload"].encode("utf-8"))
+                if item[0] in self._backends:
+                    self._queue.put(item)
+                    requeued += 1
+                else:
+                    unknown.append(item)
+        if unknown:
+            self._spill(unknown)
+        replaying.unlink()
+
+        logger.info("Replayed spilled writes", requeued=requeued, still_spilled=len(unknown))
+        return requeued
+
+    def join(self) -> None:
+        """Block until every queued write has been attempted."""
+        self._queue.join()
+
+    def pending(self) -> int:
+        """Return the number of writes not yet flushed."""
+        return self._queue.qsize() + len(self._inflight) + len(self._failed)
+
+    def shutdown(self, timeout: float = 10.0) -> int:
+        """
+        Stop the queue, flushing what finishes within ``timeout``.
+
+        Args:
+            timeout: Seconds to wait for in-flight writes
+
+        Returns:
+            Number of writes spilled to disk
+        """
+        if self._closed:
+            return 0
+        self._closed = True
+
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        with self._lock:
+            # Writes still in flight may or may not land; spilling them too is
+            # safe because every backend write is idempotent per digest
+            leftover = list(self._failed) + list(self._inflight.values())
+            self._failed.clear()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftover.append(item)
+
+        if leftover:
+            self._spill(leftover)
+            logger.warning("Spilled pending writes", count=len(leftover), path=str(self.spill_path))
+        return len(leftover)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                with self._lock:
+                    self._inflight[id(item)] = item
+                self._write(item)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, item: _PendingWrite) -> None:
+        identity, digest, payload = item
+        delay = self.retry_delay
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                backend = self._backends[identity]
+                backend.write(digest, payload)
+                # A buffering backend has only accepted the write until it commits
+                backend.commit()
+                with self._lock:
+                    self._inflight.pop(id(item), None)
+                return
+            except Exception as e:
+                logger.warning("Write-behind attempt failed", backend=identity, digest=digest, attempt=attempt, error=str(e))
+                if attempt == self.max_attempts or self._closed:
+                    break
+                time.sleep(delay)
+                delay *= 2
+        with self._lock:
+            if self._inflight.pop(id(item), None) is not None:
+                self._failed.append(item)
+
+    def _spill(self, items: List[_PendingWrite]) -> None:
+        with self._lock:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for identity, digest, payload in items:
+                    f.write(json.dumps({"backend": identity, "digest": digest, "payload": payload.decode("utf-8")}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+@lru_cache(maxsize=1)
+def get_write_behind_queue() -> WriteBehindQueue:
+    """Get the process-wide write-behind queue, spilling under ``settings.storage_dir``."""
+    write_queue = WriteBehindQueue(Path(get_settings().storage_dir) / "write_behind" / "spill.jsonl")
+    atexit.register(write_queue.shutdown)
+    return write_queue
+
+
+def persist_payload(
+    backends: List[StorageBackend],
+    digest: str,
+    payload: bytes,
+    write_behind: bool = False,
+    primary: Optional[str] = None,
+    commit: bool = False,
+) -> Dict[str, str]:
+    """
+    Persist a payload to several backends.
+
+    Without write-behind all backends are written concurrently and the call
+    returns once every write was accepted. With write-behind only the primary
+    backend is written before returning; the others are queued and their
+    eventual locations are returned immediately. Buffering backends are
+    only committed with ``commit``; otherwise call ``commit_backends`` once
+    a flow run has persisted its results.
+
+    Args:
+        backends: Backends to write to
+        digest: SHA-256 hex digest of ``payload``
+        payload: Canonical JSON bytes
+        write_behind: Whether to defer writes to secondary backends
+        primary: Name of the backend committed synchronously (defaults to the first)
+        commit: Commit the synchronously written backends before returning
+
+    Returns:
+        Storage location per backend name
+    """
+    if not write_behind or len(backends) < 2:
+        return write_concurrently(backends, digest, payload, commit=commit)
+
+    primary = primary or backends[0].name
+    primaries = [backend for backend in backends if backend.name == primary]
+    if not primaries:
+        raise ValueError(f"Primary backend {primary!r} is not configured")
+
+    locations = write_concurrently(primaries, digest, payload, commit=commit)
+
+    write_queue = get_write_behind_queue()
+    for backend in backends:
+        if backend.name != primary:
+            write_queue.submit(backend, digest, payload)
+            locations[backend.name] = backend.location(digest)
+    return locations
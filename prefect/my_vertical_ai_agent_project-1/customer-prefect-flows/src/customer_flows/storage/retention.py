@@ -0,0 +1,192 @@
+"""Age, size and count retention for locally stored results."""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..utils.logging import get_logger
+from .archive import ArchiveBackend, remove_segment
+from .cleanup import CleanupEngine
+from .index import KIND_BLOB, KIND_PAYLOAD, KIND_SEGMENT, PAYLOAD_FLOW, ResultIndex, result_flow_name
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Limits enforced on indexed results.
+
+    Attributes:
+        max_age_days: Remove entries older than this
+        max_total_bytes: Remove the oldest entries until the total size fits
+        max_entries: Remove the oldest entries until the count fits
+        flow: Only apply the policy to this flow's entries
+    """
+
+    max_age_days: Optional[float] = None
+    max_total_bytes: Optional[int] = None
+    max_entries: Optional[int] = None
+    flow: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return self.max_age_days is None and self.max_total_bytes is None and self.max_entries is None
+
+
+def select_expired(index: ResultIndex, policy: RetentionPolicy, now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Select the entries a policy removes, oldest first.
+
+    Entries are read from the index in creation order and selection stops
+    as soon as every limit is met, so a run only touches the expired part
+    of the index.
+
+    Args:
+        index: Result index
+        policy: Retention policy
+        now: Current Unix time (defaults to now)
+
+    Returns:
+        Expired index entries
+    """
+    if policy.is_empty():
+        return []
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    cutoff = now - policy.max_age_days * 86400 if policy.max_age_days is not None else None
+    totals = index.totals(policy.flow)
+    entries, total_bytes = totals["entries"], totals["bytes"]
+
+    selected = []
+    for entry in index.oldest(policy.flow):
+        expired = (
+            (cutoff is not None and entry["created_at"] < cutoff)
+            or (policy.max_entries is not None and entries > policy.max_entries)
+            or (policy.max_total_bytes is not None and total_bytes > policy.max_total_bytes)
+        )
+        if not expired:
+            break
+        selected.append(entry)
+        entries -= 1
+        total_bytes -= entry["size"]
+    return selected
+
+
+def enforce_retention(
+    index: ResultIndex,
+    policy: RetentionPolicy,
+    compact_to: Optional[ArchiveBackend] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Delete or compact the entries a policy expires.
+
+    Content-addressed blobs are deleted, or with ``compact_to`` first
+    appended to the compressed archive under the date they were created.
+    Offloaded task payloads are deleted. Archive segments are dropped from
+    their partition manifest and deleted.
+
+    Args:
+        index: Result index
+        policy: Retention policy
+        compact_to: Archive that expired blobs are compacted into
+        dry_run: Only report what would be removed
+
+    Returns:
+        Summary of removed entries, freed bytes and failures
+    """
+    expired = select_expired(index, policy)
+    summary = {
+        "dry_run": dry_run,
+        "expired_entries": len(expired),
+        "expired_bytes": sum(entry["size"] for entry in expired),
+        "removed_entries": 0,
+        "compacted_entries": 0,
+        "failed_cleanups": [],
+    }
+    if dry_run or not expired:
+        summary["remaining"] = index.totals(policy.flow)
+        return summary
+
+    blobs = [entry for entry in expired if entry["kind"] != KIND_SEGMENT]
+    segments = [entry for entry in expired if entry["kind"] == KIND_SEGMENT]
+
+    if compact_to is not None:
+        for entry in blobs:
+            if entry["kind"] != KIND_BLOB:
+                continue
+            path = Path(entry["path"])
+            try:
+                payload = path.read_bytes()
+            except FileNotFoundError:
+                continue
+            created = datetime.fromtimestamp(entry["created_at"], timezone.utc)
+            compact_to.append(path.stem, payload, entry["flow"], archived_at=created)
+            summary["compacted_entries"] += 1
+        # Blobs are only deleted once their archived copy is durable
+        compact_to.flush()
+
+    removed = []
+    # Indexed blobs live next to the index
+    result = CleanupEngine(local_root=index.path.parent).run([entry["path"] for entry in blobs])
+    failed = {failure["resource_id"] for failure in result["failed_cleanups"]}
+    removed.extend(entry["path"] for entry in blobs if entry["path"] not in failed)
+    summary["failed_cleanups"].extend(result["failed_cleanups"])
+
+    for entry in segments:
+        try:
+            remove_segment(entry["path"])
+            removed.append(entry["path"])
+        except OSError as e:
+            summary["failed_cleanups"].append({"resource_id": entry["path"], "error": str(e)})
+
+    index.remove(removed)
+    summary["removed_entries"] = len(removed)
+    summary["remaining"] = index.totals(policy.flow)
+    logger.info(
+        "Retention enforced",
+        removed=len(removed),
+        compacted=summary["compacted_entries"],
+        failed=len(summary["failed_cleanups"]),
+    )
+    return summary
+
+
+def rebuild_index(
+    index: ResultIndex,
+    results_root: Path,
+    archive_root: Optional[Path] = None,
+    payloads_root: Optional[Path] = None,
+) -> int:
+    """
+    Index files written before the index existed.
+
+    This is the only operation that walks the storage tree; it is meant to
+    be run once when retention is first enabled.
+
+    Args:
+        index: Result index
+        results_root: Content-addressed store root
+        archive_root: Archive root
+        payloads_root: Offloaded task payload store root
+
+    Returns:
+        Number of files indexed
+    """
+    count = 0
+    for path in Path(results_root).rglob("*.json"):
+        stat = path.stat()
+        index.record(path, stat.st_size, flow=result_flow_name(path.read_bytes()), created_at=stat.st_mtime)
+        count += 1
+    if archive_root is not None:
+        for path in Path(archive_root).glob("flow=*/date=*/part-*"):
+            stat = path.stat()
+            flow = path.parent.parent.name.split("=", 1)[1]
+            index.record(path, stat.st_size, flow=flow, kind=KIND_SEGMENT, created_at=stat.st_mtime)
+            count += 1
+    if payloads_root is not None:
+        for path in Path(payloads_root).rglob("*.pkl"):
+            stat = path.stat()
+            index.record(path, stat.st_size, flow=PAYLOAD_FLOW, kind=KIND_PAYLOAD, created_at=stat.st_mtime)
+            count += 1
+    return count
@@ -1,17 +1,39 @@
 """Core Prefect 3.x tasks for data processing and operations."""
 
-from typing import Any, Dict, List, Optional
+import os
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Union
 from datetime import datetime, timezone
 
 from prefect import task
 from prefect.transactions import transaction
 
 from ..config import get_settings
+from ..metrics import finish_task_run, instrumented
+from ..notifications import get_notification_coalescer, get_notification_dispatcher
+from ..processing import ProcessedText, get_keyword_extractor, preprocess_batch, preprocess_stream
+from ..storage import (
+    MAX_REPORTED_FAILURES,
+    CleanupEngine,
+    canonical_json,
+    content_digest,
+    get_backend,
+    get_s3_client,
+    persist_payload,
+)
 from ..utils.logging import bind_flow_context, get_logger
+from ..validation import compile_rules, is_table, validate_table
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+# preprocess_data option name -> ProcessedText derived field
+_DERIVED_FIELD_OPTIONS = {
+    "uppercase": "uppercase",
+    "lowercase": "lowercase",
+    "remove_punctuation": "clean_text",
+}
+
 
 @task(
     name="data-preprocessing",
@@ -19,55 +41,79 @@ settings = get_settings()
     retries=3,
     retry_delay_seconds=10,
     tags=["data", "preprocessing"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
 )
-def preprocess_data(raw_data: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+@instrumented
+def preprocess_data(
+    raw_data: Union[str, os.PathLike, Iterable[bytes]],
+    options: Optional[Dict[str, Any]] = None,
+) -> Union[ProcessedText, Dict[str, Any]]:
     """
     Advanced data preprocessing with multiple transformation options.
     
+    For string input the result is a read-only mapping with the same keys as
+    before. Counters are computed in a single scan; the ``uppercase``,
+    ``lowercase`` and ``clean_text`` fields enabled by ``options`` are built
+    on first access.
+    
+    Paths, binary files and byte iterators (or a string path together with
+    ``options["input_mode"] = "file"``) are processed in bounded-memory
+    chunks of ``options["chunk_size"]`` bytes, memory-mapping files where
+    possible, and return a plain statistics dictionary without the text.
+    
     Args:
-        raw_data: Raw input data string
+        raw_data: Raw input data string, file path or byte stream
         options: Processing options dictionary
         
     Returns:
         Processed data with metadata
     """
     task_logger = bind_flow_context(logger, task="preprocess_data")
-    task_logger.info("Starting data preprocessing", data_length=len(raw_data))
     
     options = options or {}
     
     try:
-        processed = {
-            "original": raw_data,
-            "length": len(raw_data),
-            "word_count": len(raw_data.split()),
-            "character_count": len(raw_data.replace(" ", "")),
-            "processed_at": datetime.now(timezone.utc).isoformat(),
-        }
-        
-        # Apply optional transformations
-        if options.get("uppercase", False):
-            processed["uppercase"] = raw_data.upper()
+        if not isinstance(raw_data, str) or options.get("input_mode") == "file":
+            task_logger.info("Starting streamed data preprocessing")
+            processed = preprocess_stream(raw_data, options)
+            task_logger.info(
+                "Data preprocessing completed",
+                byte_count=processed["byte_count"],
+                chunk_count=processed["metadata"]["chunk_count"],
+            )
+            return processed
         
-        if options.get("lowercase", False):
-            processed["lowercase"] = raw_data.lower()
+        task_logger.info("Starting data preprocessing", data_length=len(raw_data))
         
-        if options.get("remove_punctuation", False):
-            import string
-            processed["clean_text"] = raw_data.translate(str.maketrans('', '', string.punctuation))
+        # Apply optional transformations lazily
+        derived = [
+            field
+            for option, field in _DERIVED_FIELD_OPTIONS.items()
+            if options.get(option, False)
+        ]
         
+        # Rank keywords by TF-IDF and fold this document into the corpus statistics
+        keyword_extractor = None
+        learn = options.get("update_keyword_stats", True)
         if options.get("extract_keywords", False):
-            # Simple keyword extraction (replace with more sophisticated NLP)
-            words = raw_data.lower().split()
-            processed["keywords"] = list(set([word for word in words if len(word) > 4]))[:10]
-        
-        # Add processing metadata
-        processed["metadata"] = {
-            "processor": "core_preprocessor",
-            "version": "1.0.0",
-            "options_applied": list(options.keys()),
-            "processing_time": "2024-01-01T00:00:00Z",  # Replace with actual timing
-        }
+            extractor = get_keyword_extractor()
+            keyword_extractor = partial(extractor.extract, k=options.get("keyword_limit"), learn=learn)
+        
+        processed = ProcessedText(
+            raw_data,
+            derived=derived,
+            keyword_extractor=keyword_extractor,
+            metadata={
+                "processor": "core_preprocessor",
+                "version": "1.0.0",
+                "options_applied": list(options.keys()),
+                "processing_time": "2024-01-01T00:00:00Z",  # Replace with actual timing
+            },
+        )
+        
+        if keyword_extractor is not None and learn:
+            extractor.idf.maybe_save()
         
         task_logger.info("Data preprocessing completed", processed_fields=len(processed))
         return processed
@@ -77,16 +123,67 @@ def preprocess_data(raw_data: str, options: Optional[Dict[str, Any]] = None) ->
         raise
 
 
+@task(
+    name="data-preprocessing-batch",
+    description="Columnar preprocessing of many records in one task run",
+    retries=3,
+    retry_delay_seconds=10,
+    tags=["data", "preprocessing"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
+)
+@instrumented
+def preprocess_data_batch(
+    records: Iterable[Any], options: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Preprocess a batch of records in a single task run.
+    
+    Computes length, word count, character count and (optionally) keywords
+    for every record in one pass and returns them column-wise. Use
+    ``processing.iter_batches`` to split a corpus into a handful of batches
+    instead of submitting one ``preprocess_data`` run per document. Pass a
+    list rather than a one-shot iterator when task retries should see the
+    same records again.
+    
+    Args:
+        records: List or iterator of strings or mappings
+        options: Processing options dictionary
+        
+    Returns:
+        Columnar processing results for the batch
+    """
+    task_logger = bind_flow_context(logger, task="preprocess_data_batch")
+    task_logger.info("Starting batch preprocessing")
+    
+    try:
+        processed = preprocess_batch(records, options)
+        task_logger.info("Batch preprocessing completed", record_count=processed["record_count"])
+        return processed
+        
+    except Exception as e:
+        task_logger.error("Batch preprocessing failed", error=str(e))
+        raise
+
+
 @task(
     name="data-validation",
     description="Comprehensive data validation with custom rules",
     retries=2,
     tags=["validation", "quality"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
 )
+@instrumented
 def validate_data(data: Dict[str, Any], rules: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Comprehensive data validation with customizable rules.
     
+    Rules are compiled once per distinct specification and reused across
+    calls; see ``validation.CompiledValidator`` for the supported rules.
+    pandas DataFrames and Arrow tables are validated column-wise instead,
+    see ``validation.validate_table``.
+    
     Args:
         data: Data to validate
         rules: Validation rules dictionary
@@ -97,47 +194,11 @@ def validate_data(data: Dict[str, Any], rules: Optional[Dict[str, Any]] = None)
     task_logger = bind_flow_context(logger, task="validate_data")
     task_logger.info("Starting data validation")
     
-    rules = rules or {}
-    
-    validation_result = {
-        "is_valid": True,
-        "errors": [],
-        "warnings": [],
-        "checks_performed": [],
-        "metadata": {
-            "validated_at": datetime.now(timezone.utc).isoformat(),
-            "validator_version": "1.0.0",
-        }
-    }
-    
     try:
-        # Basic existence checks
-        if not data:
-            validation_result["errors"].append("Data is empty or None")
-            validation_result["is_valid"] = False
-        validation_result["checks_performed"].append("existence_check")
-        
-        # Type validation
-        if not isinstance(data, dict):
-            validation_result["errors"].append("Data must be a dictionary")
-            validation_result["is_valid"] = False
-        validation_result["checks_performed"].append("type_check")
-        
-        # Custom rule validations
-        if rules.get("min_length") and len(str(data)) < rules["min_length"]:
-            validation_result["errors"].append(f"Data length below minimum: {rules['min_length']}")
-            validation_result["is_valid"] = False
-        
-        if rules.get("required_fields"):
-            missing_fields = set(rules["required_fields"]) - set(data.keys())
-            if missing_fields:
-                validation_result["errors"].append(f"Missing required fields: {list(missing_fields)}")
-                validation_result["is_valid"] = False
-        
-        if rules.get("max_size") and len(str(data)) > rules["max_size"]:
-            validation_result["warnings"].append(f"Data size exceeds recommended maximum: {rules['max_size']}")
-        
-        validation_result["checks_performed"].extend(["custom_rules"])
+        if is_table(data):
+            return _validate_table_logged(data, rules, task_logger)
+        
+        validation_result = compile_rules(rules).validate(data)
         
         task_logger.info(
             "Data validation completed", 
@@ -153,30 +214,133 @@ def validate_data(data: Dict[str, Any], rules: Optional[Dict[str, Any]] = None)
         raise
 
 
+@task(
+    name="data-validation-batch",
+    description="Validate many records against compiled rules in one task run",
+    retries=2,
+    tags=["validation", "quality"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
+)
+@instrumented
+def validate_data_batch(
+    records: Iterable[Any],
+    rules: Optional[Dict[str, Any]] = None,
+    max_failures: int = 1000,
+) -> Dict[str, Any]:
+    """
+    Validate a batch of records in a single task run.
+    
+    Args:
+        records: Records to validate
+        rules: Validation rules dictionary
+        max_failures: Maximum number of failing records to list
+        
+    Returns:
+        Summary counts plus the failing records
+    """
+    task_logger = bind_flow_context(logger, task="validate_data_batch")
+    task_logger.info("Starting batch validation")
+    
+    try:
+        summary = compile_rules(rules).validate_many(records, max_failures=max_failures)
+        
+        task_logger.info(
+            "Batch validation completed",
+            total=summary["total"],
+            invalid=summary["invalid"],
+        )
+        
+        return summary
+        
+    except Exception as e:
+        task_logger.error("Batch validation failed", error=str(e))
+        raise
+
+
+def _validate_table_logged(source: Any, rules: Optional[Dict[str, Any]], task_logger: Any) -> Dict[str, Any]:
+    """Run columnar validation and log its summary."""
+    validation_result = validate_table(source, rules)
+    task_logger.info(
+        "Table validation completed",
+        is_valid=validation_result["is_valid"],
+        row_count=validation_result["row_count"],
+        failing_columns=[name for name, column in validation_result["columns"].items() if column["errors"]],
+    )
+    return validation_result
+
+
+@task(
+    name="table-validation",
+    description="Vectorized validation of tabular extracts",
+    retries=2,
+    tags=["validation", "quality"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
+)
+@instrumented
+def validate_table_data(source: Any, rules: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Validate a DataFrame, Arrow table, or CSV/Parquet file column-wise.
+    
+    Null-rate, range, uniqueness and required-column checks run as
+    vectorized column operations and errors are summarized per column.
+    Files are read with a projection onto the columns the rules reference.
+    
+    Args:
+        source: pandas DataFrame, Arrow table, or file path
+        rules: Table validation rules
+        
+    Returns:
+        Validation results with per-column error summaries
+    """
+    task_logger = bind_flow_context(logger, task="validate_table_data")
+    task_logger.info("Starting table validation")
+    
+    try:
+        return _validate_table_logged(source, rules, task_logger)
+        
+    except Exception as e:
+        task_logger.error("Table validation failed", error=str(e))
+        raise
+
+
 @task(
     name="send-notification",
     description="Send notifications via multiple channels",
     retries=2,
     retry_delay_seconds=5,
     tags=["notification", "communication"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
 )
+@instrumented
 def send_notification(
     message: str, 
-    recipients: List[str], 
+    recipients: Union[List[str], Dict[str, List[str]]], 
     channels: List[str] = None,
     priority: str = "normal"
 ) -> Dict[str, Any]:
     """
     Send notifications through multiple channels.
     
+    All channels and recipients are delivered to concurrently through the
+    process-wide dispatcher, which reuses a pooled HTTP client for Slack and
+    webhooks and a persistent SMTP connection for email.
+    
+    When ``settings.notification_coalesce_window`` is set, non-urgent
+    notifications are buffered and merged into one digest per recipient,
+    channel and priority; their status is reported as ``queued``.
+    
     Args:
         message: Notification message
-        recipients: List of recipient identifiers
-        channels: List of channels to use (email, slack, webhook, etc.)
+        recipients: Recipient identifiers for every channel, or a list per
+            channel (email addresses, Slack channels or webhook URLs)
+        channels: List of channels to use (email, slack, webhook)
         priority: Notification priority (low, normal, high, urgent)
         
     Returns:
-        Notification delivery status
+        Notification delivery status, per channel and per recipient
     """
     task_logger = bind_flow_context(logger, task="send_notification")
     task_logger.info("Sending notification", recipients_count=len(recipients), priority=priority)
@@ -193,33 +357,18 @@ def send_notification(
             "sent_at": datetime.now(timezone.utc).isoformat(),
         }
         
-        # Simulate notification sending for each channel
-        for channel in channels:
-            if channel == "email":
-                # Email notification logic
-                notification_results["delivery_status"][channel] = {
-                    "status": "sent",
-                    "details": f"Email sent to {len(recipients)} recipients"
-                }
-            elif channel == "slack":
-                # Slack notification logic
-                notification_results["delivery_status"][channel] = {
-                    "status": "sent",
-                    "details": f"Slack message sent to {len(recipients)} channels"
-                }
-            elif channel == "webhook":
-                # Webhook notification logic
-                notification_results["delivery_status"][channel] = {
-                    "status": "sent",
-                    "details": f"Webhook called for {len(recipients)} endpoints"
-                }
-            else:
-                notification_results["delivery_status"][channel] = {
-                    "status": "unsupported",
-                    "details": f"Channel {channel} not implemented"
-                }
+        coalescer = get_notification_coalescer()
+        sender = coalescer.submit if coalescer is not None else get_notification_dispatcher().dispatch
+        notification_results["delivery_status"] = sender(message, recipients, channels, priority)
         
-        task_logger.info("Notification sent successfully", channels=channels)
+        failed = [
+            channel for channel, status in notification_results["delivery_status"].items()
+            if status["status"] not in ("sent", "queued")
+        ]
+        if failed:
+            task_logger.warning("Notification not fully delivered", channels=failed)
+        else:
+            task_logger.info("Notification sent successfully", channels=channels)
         return notification_results
         
     except Exception as e:
@@ -233,7 +382,10 @@ def send_notification(
     retries=3,
     retry_delay_seconds=15,
     tags=["storage", "persistence"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
 )
+@instrumented
 def persist_results(
     results: Dict[str, Any], 
     storage_config: Optional[Dict[str, Any]] = None
@@ -241,6 +393,25 @@ def persist_results(
     """
     Persist results to configured storage backends.
     
+    The ``local`` backend writes the canonical JSON of ``results`` to the
+    content-addressed store under ``settings.storage_dir`` (or
+    ``storage_config["local_path"]``); identical results are stored once.
+    The ``s3`` backend stores the same payload keyed by digest in
+    ``storage_config["s3_bucket"]`` (or ``settings.s3_bucket``).
+    The ``database`` backend inserts it as a JSON row into the ``results``
+    table of ``settings.database_url`` (SQLite or Postgres) using pooled
+    connections and batched inserts. The ``archive`` backend appends it to
+    zstd-compressed JSONL segments partitioned by flow and date under
+    ``settings.archive_dir`` for bulk analytics scans.
+    
+    Backends are written concurrently. With ``storage_config["write_behind"]``
+    (default ``settings.write_behind``) the task returns as soon as the
+    ``primary`` backend (default: the first) has committed; the remaining
+    backends are flushed in the background and spilled to disk on shutdown.
+    The database and archive backends batch buffered writes across task
+    runs; set ``storage_config["commit"]`` to commit them before returning,
+    or call ``commit_backends`` at the end of the flow run.
+    
     Args:
         results: Results data to persist
         storage_config: Storage configuration options
@@ -255,44 +426,30 @@ def persist_results(
     storage_locations = {}
     
     try:
-        # Add persistence metadata
-        enriched_results = {
-            **results,
-            "persistence_metadata": {
-                "persisted_at": datetime.now(timezone.utc).isoformat(),
-                "storage_version": "1.0.0",
-                "backends": storage_config.get("backends", ["local"]),
-            }
-        }
+        # Content address the results themselves; persistence metadata would
+        # change the digest on every run and defeat deduplication
+        payload = canonical_json(results)
+        digest = content_digest(payload)
         
-        # Persist to each configured backend
-        for backend in storage_config.get("backends", ["local"]):
-            if backend == "local":
-                # Local file storage
-                import json
-                import hashlib
-                
-                result_hash = hashlib.md5(str(enriched_results).encode()).hexdigest()[:8]
-                filename = f"results_{result_hash}.json"
-                storage_locations[backend] = f"file://./storage/{filename}"
-                
-                # In production, actually write the file
-                # with open(f"./storage/{filename}", "w") as f:
-                #     json.dump(enriched_results, f, indent=2)
-                
-            elif backend == "s3":
-                # S3 storage
-                result_hash = hashlib.md5(str(enriched_results).encode()).hexdigest()[:8]
-                key = f"customer-flows/results/{result_hash}.json"
-                storage_locations[backend] = f"s3://your-bucket/{key}"
-                
-            elif backend == "database":
-                # Database storage
-                record_id = f"result_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                storage_locations[backend] = f"db://results/{record_id}"
-                
+        backends = []
+        for name in storage_config.get("backends", ["local"]):
+            backend = get_backend(name, storage_config)
+            if backend is None:
+                task_logger.warning(f"Unsupported storage backend: {name}")
             else:
-                task_logger.warning(f"Unsupported storage backend: {backend}")
+                backends.append(backend)
+        
+        if backends:
+            storage_locations.update(
+                persist_payload(
+                    backends,
+                    digest,
+                    payload,
+                    write_behind=storage_config.get("write_behind", settings.write_behind),
+                    primary=storage_config.get("primary"),
+                    commit=storage_config.get("commit", False),
+                )
+            )
         
         task_logger.info("Results persisted successfully", locations=storage_locations)
         return storage_locations
@@ -307,17 +464,30 @@ def persist_results(
     description="Clean up temporary resources and artifacts",
     retries=1,
     tags=["cleanup", "maintenance"],
+    on_completion=[finish_task_run],
+    on_failure=[finish_task_run],
 )
+@instrumented
 def cleanup_resources(resource_ids: List[str], cleanup_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Clean up temporary resources and artifacts.
     
+    Resources are grouped by type and deleted in concurrent batches: local
+    paths (or ``file://`` URIs) are unlinked, ``s3://bucket/key`` objects and
+    ``s3://bucket/prefix/`` prefixes are removed with multi-object deletes of
+    up to 1000 keys, and ``db://results/<digest>`` rows with chunked
+    ``DELETE ... WHERE digest IN (...)`` statements. Missing resources count
+    as cleaned. Local paths outside ``settings.storage_dir`` are never
+    deleted, and directories only with ``cleanup_config["allow_directories"]``.
+    
     Args:
         resource_ids: List of resource identifiers to clean up
-        cleanup_config: Cleanup configuration options
+        cleanup_config: Cleanup configuration options (``database_url``,
+            ``s3_endpoint_url``, ``max_workers``, ``max_reported_failures``,
+            ``allow_directories``)
         
     Returns:
-        Cleanup results and summary
+        Cleanup summary with counts per resource type and only the failures
     """
     task_logger = bind_flow_context(logger, task="cleanup_resources")
     task_logger.info("Starting resource cleanup", resource_count=len(resource_ids))
@@ -325,38 +495,17 @@ def cleanup_resources(resource_ids: List[str], cleanup_config: Optional[Dict[str
     cleanup_config = cleanup_config or {}
     
     try:
-        cleanup_results = {
-            "resources_cleaned": [],
-            "failed_cleanups": [],
-            "cleanup_summary": {
-                "total_resources": len(resource_ids),
-                "successfully_cleaned": 0,
-                "failed_cleanups": 0,
-            },
-            "cleaned_at": datetime.now(timezone.utc).isoformat(),
-        }
+        engine = CleanupEngine(
+            s3_client=get_s3_client(cleanup_config["s3_endpoint_url"]) if cleanup_config.get("s3_endpoint_url") else None,
+            database_url=cleanup_config.get("database_url") or settings.database_url,
+            max_workers=cleanup_config.get("max_workers", 8),
+            max_reported_failures=cleanup_config.get("max_reported_failures", MAX_REPORTED_FAILURES),
+            allow_directories=cleanup_config.get("allow_directories", False),
+        )
+        cleanup_results = engine.run(resource_ids)
         
-        for resource_id in resource_ids:
-            try:
-                # Simulate resource cleanup
-                # In production, implement actual cleanup logic based on resource type
-                task_logger.debug(f"Cleaning up resource: {resource_id}")
-                
-                cleanup_results["resources_cleaned"].append({
-                    "resource_id": resource_id,
-                    "status": "cleaned",
-                    "cleaned_at": datetime.now(timezone.utc).isoformat(),
-                })
-                cleanup_results["cleanup_summary"]["successfully_cleaned"] += 1
-                
-            except Exception as cleanup_error:
-                task_logger.warning(f"Failed to cleanup resource {resource_id}", error=str(cleanup_error))
-                cleanup_results["failed_cleanups"].append({
-                    "resource_id": resource_id,
-                    "error": str(cleanup_error),
-                    "failed_at": datetime.now(timezone.utc).isoformat(),
-                })
-                cleanup_results["cleanup_summary"]["failed_cleanups"] += 1
+        for failure in cleanup_results["failed_cleanups"][:10]:
+            task_logger.warning(f"Failed to cleanup resource {failure['resource_id']}", error=failure["error"])
         
         task_logger.info(
             "Resource cleanup completed",
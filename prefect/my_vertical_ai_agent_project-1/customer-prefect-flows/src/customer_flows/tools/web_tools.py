@@ -1,5 +1,6 @@
 """Web-related tools for CrewAI agents."""
 
+import asyncio
 import requests
 from typing import Dict, Any, Optional, List
 from urllib.parse import urljoin, urlparse
@@ -16,6 +17,43 @@ from ..utils.logging import get_logger
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Set up headers to avoid being blocked
+SCRAPING_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+
+def extract_text(content: bytes, max_content_length: int) -> str:
+    """
+    Extract the readable text of an HTML page.
+    
+    Parsing is CPU-bound; async callers run it in a worker thread.
+    
+    Args:
+        content: Raw HTML
+        max_content_length: Maximum characters to return
+        
+    Returns:
+        Page text without scripts, styles and navigation
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # Remove unwanted elements
+    for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
+        element.decompose()
+    
+    # Extract text content
+    text_content = soup.get_text(separator='\n', strip=True)
+    
+    # Limit content length
+    if len(text_content) > max_content_length:
+        text_content = text_content[:max_content_length] + "... [Content truncated]"
+    return text_content
+
 
 class WebSearchTool(BaseTool):
     """Tool for searching the web using various search engines."""
@@ -96,33 +134,37 @@ class WebScrapingTool(BaseTool):
             if not parsed_url.scheme or not parsed_url.netloc:
                 return f"Invalid URL: {url}"
             
-            # Set up headers to avoid being blocked
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-            }
-            
             # Make request
             with httpx.Client(timeout=self.timeout) as client:
-                response = client.get(url, headers=headers)
+                response = client.get(url, headers=SCRAPING_HEADERS)
                 response.raise_for_status()
             
             # Parse content
-            soup = BeautifulSoup(response.content, 'html.parser')
+            text_content = extract_text(response.content, self.max_content_length)
+            
+            logger.info("Web scraping completed", url=url, content_length=len(text_content))
+            
+            return f"Content from {url}:\n\n{text_content}"
             
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-                element.decompose()
+        except Exception as e:
+            logger.error("Web scraping failed", url=url, error=str(e))
+            return f"Failed to scrape {url}: {str(e)}"
+    
+    async def _arun(self, url: str) -> str:
+        """Scrape content without blocking the event loop."""
+        logger.info("Scraping web page", url=url)
+        
+        try:
+            parsed_url = urlparse(url)
+            if not parsed_url.scheme or not parsed_url.netloc:
+                return f"Invalid URL: {url}"
             
-            # Extract text content
-            text_content = soup.get_text(separator='\n', strip=True)
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(url, headers=SCRAPING_HEADERS)
+                response.raise_for_status()
             
-            # Limit content length
-            if len(text_content) > self.max_content_length:
-                text_content = text_content[:self.max_content_length] + "... [Content truncated]"
+            # HTML parsing holds the GIL; keep it off the event loop
+            text_content = await asyncio.to_thread(extract_text, response.content, self.max_content_length)
             
             logger.info("Web scraping completed", url=url, content_length=len(text_content))
             
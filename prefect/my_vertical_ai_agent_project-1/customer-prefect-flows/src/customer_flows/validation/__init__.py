@@ -0,0 +1,12 @@
+"""Data validation helpers used by the Prefect tasks."""
+
+from .columnar import is_table, load_table, validate_table
+from .rules import CompiledValidator, compile_rules
+
+__all__ = [
+    "CompiledValidator",
+    "compile_rules",
+    "is_table",
+    "load_table",
+    "validate_table",
+]
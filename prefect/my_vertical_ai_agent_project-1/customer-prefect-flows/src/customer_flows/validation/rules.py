@@ -0,0 +1,317 @@
+"""Compiled validation rules for records and record batches."""
+
+import json
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+VALIDATOR_VERSION = "1.1.0"
+
+FATAL = "fatal"
+ERROR = "error"
+WARNING = "warning"
+
+# Supported names for the "types" rule
+TYPE_NAMES: Dict[str, Tuple[type, ...]] = {
+    "str": (str,),
+    "int": (int,),
+    "float": (int, float),
+    "number": (int, float),
+    "bool": (bool,),
+    "list": (list, tuple),
+    "dict": (dict,),
+    "null": (type(None),),
+}
+
+_MISSING = object()
+
+Finding = Tuple[str, str]
+Check = Callable[[Any], Optional[List[Finding]]]
+
+
+def _compile_getter(path: str) -> Callable[[Mapping[str, Any]], Any]:
+    """Compile a dotted field path into a getter returning ``_MISSING`` when absent."""
+    keys = tuple(path.split("."))
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda data: data.get(key, _MISSING)
+
+    def get(data: Any) -> Any:
+        for key in keys:
+            if not isinstance(data, Mapping):
+                return _MISSING
+            data = data.get(key, _MISSING)
+            if data is _MISSING:
+                return _MISSING
+        return data
+
+    return get
+
+
+def _compile_type_predicate(path: str, spec: Any) -> Callable[[Any], bool]:
+    """Compile a type name (or list of names) into an isinstance predicate."""
+    names = [spec] if isinstance(spec, str) else list(spec)
+    unknown = [name for name in names if name not in TYPE_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown type(s) {unknown} for field '{path}'")
+    allowed = tuple(t for name in names for t in TYPE_NAMES[name])
+    # bool is a subclass of int; only accept it when asked for explicitly
+    rejects_bool = "bool" not in names
+    return lambda value: isinstance(value, allowed) and not (rejects_bool and isinstance(value, bool))
+
+
+class CompiledValidator:
+    """
+    Reusable validator compiled from a rules specification.
+
+    Supported rules:
+
+    - ``required_fields``: field paths that must be present; dotted paths such
+      as ``"customer.email"`` address nested mappings (fatal)
+    - ``types``: field path to type name or list of names, see ``TYPE_NAMES``
+    - ``ranges``: field path to ``{"min", "max", "min_length", "max_length"}``
+    - ``min_length``: minimum length of ``str(data)``
+    - ``max_size``: recommended maximum length of ``str(data)`` (warning)
+    - ``fail_fast``: treat every error as fatal
+
+    A non-mapping input and missing required fields are fatal: validation
+    stops at the first fatal finding. Other errors are collected.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Any]] = None):
+        """
+        Compile the rules into a list of checks.
+
+        Args:
+            rules: Validation rules dictionary
+        """
+        self.rules = dict(rules or {})
+        self.fail_fast = bool(self.rules.get("fail_fast", False))
+        self.checks: List[Tuple[str, Check]] = [
+            ("existence_check", self._check_existence),
+            ("type_check", self._check_mapping),
+        ]
+        self.checks.extend(self._compile_custom_rules())
+
+    @staticmethod
+    def _check_existence(data: Any) -> Optional[List[Finding]]:
+        if not data:
+            return [(ERROR, "Data is empty or None")]
+        return None
+
+    @staticmethod
+    def _check_mapping(data: Any) -> Optional[List[Finding]]:
+        if not isinstance(data, Mapping):
+            return [(FATAL, "Data must be a dictionary")]
+        return None
+
+    def _compile_custom_rules(self) -> List[Tuple[str, Check]]:
+        rules = self.rules
+        checks: List[Tuple[str, Check]] = []
+
+        min_length = rules.get("min_length")
+        max_size = rules.get("max_size")
+        if min_length or max_size:
+
+            def check_size(data: Any) -> Optional[List[Finding]]:
+                # Serialize once for both size rules
+                size = len(str(data))
+                findings = []
+                if min_length and size < min_length:
+                    findings.append((ERROR, f"Data length below minimum: {min_length}"))
+                if max_size and size > max_size:
+                    findings.append((WARNING, f"Data size exceeds recommended maximum: {max_size}"))
+                return findings or None
+
+            checks.append(("size_check", check_size))
+
+        required: Sequence[str] = rules.get("required_fields") or ()
+        if required:
+            getters = [(path, _compile_getter(path)) for path in required]
+
+            def check_required(data: Mapping[str, Any]) -> Optional[List[Finding]]:
+                missing = [path for path, get in getters if get(data) is _MISSING]
+                if missing:
+                    return [(FATAL, f"Missing required fields: {missing}")]
+                return None
+
+            checks.append(("required_fields", check_required))
+
+        for path, spec in (rules.get("types") or {}).items():
+            checks.append(("type_rules", self._compile_type_check(path, spec)))
+
+        for path, bounds in (rules.get("ranges") or {}).items():
+            checks.append(("range_rules", self._compile_range_check(path, bounds)))
+
+        return checks
+
+    @staticmethod
+    def _compile_type_check(path: str, spec: Any) -> Check:
+        get = _compile_getter(path)
+        matches = _compile_type_predicate(path, spec)
+        message = f"Field '{path}' must be of type {spec}"
+
+        def check_type(data: Mapping[str, Any]) -> Optional[List[Finding]]:
+            value = get(data)
+            if value is not _MISSING and not matches(value):
+                return [(ERROR, message)]
+            return None
+
+        return check_type
+
+    @staticmethod
+    def _compile_range_check(path: str, bounds: Mapping[str, Any]) -> Check:
+        unknown = set(bounds) - {"min", "max", "min_length", "max_length"}
+        if unknown:
+            raise ValueError(f"Unknown range bound(s) {sorted(unknown)} for field '{path}'")
+        get = _compile_getter(path)
+        low, high = bounds.get("min"), bounds.get("max")
+        min_len, max_len = bounds.get("min_length"), bounds.get("max_length")
+
+        def check_range(data: Mapping[str, Any]) -> Optional[List[Finding]]:
+            value = get(data)
+            if value is _MISSING or value is None:
+                return None
+            try:
+                if low is not None and value < low:
+                    return [(ERROR, f"Field '{path}' below minimum: {low}")]
+                if high is not None and value > high:
+                    return [(ERROR, f"Field '{path}' above maximum: {high}")]
+                if min_len is not None and len(value) < min_len:
+                    return [(ERROR, f"Field '{path}' shorter than minimum length: {min_len}")]
+                if max_len is not None and len(value) > max_len:
+                    return [(ERROR, f"Field '{path}' longer than maximum length: {max_len}")]
+            except TypeError:
+                return [(ERROR, f"Field '{path}' cannot be range-checked")]
+            return None
+
+        return check_range
+
+    def run(self, data: Any) -> Tuple[List[str], List[str], int]:
+        """
+        Run the compiled checks.
+
+        Args:
+            data: Record to validate
+
+        Returns:
+            Errors, warnings and the number of checks that ran
+        """
+        errors: List[str] = []
+        warnings: List[str] = []
+        fail_fast = self.fail_fast
+        performed = 0
+        for _, check in self.checks:
+            performed += 1
+            findings = check(data)
+            if findings is None:
+                continue
+            for severity, message in findings:
+                if severity == WARNING:
+                    warnings.append(message)
+                    continue
+                errors.append(message)
+                if severity == FATAL or fail_fast:
+                    return errors, warnings, performed
+        return errors, warnings, performed
+
+    def is_valid(self, data: Any) -> bool:
+        """Return whether ``data`` passes all checks."""
+        return not self.run(data)[0]
+
+    def validate(self, data: Any) -> Dict[str, Any]:
+        """
+        Validate one record and return the detailed result.
+
+        Args:
+            data: Record to validate
+
+        Returns:
+            Validation results with detailed feedback
+        """
+        errors, warnings, performed = self.run(data)
+        checks_performed = [name for name, _ in self.checks[:min(performed, 2)]]
+        if performed > 2 or performed == len(self.checks):
+            checks_performed.append("custom_rules")
+        return {
+            "is_valid": not errors,
+            "errors": errors,
+            "warnings": warnings,
+            "checks_performed": checks_performed,
+            "metadata": {
+                "validated_at": datetime.now(timezone.utc).isoformat(),
+                "validator_version": VALIDATOR_VERSION,
+            },
+        }
+
+    def validate_many(self, records: Iterable[Any], max_failures: int = 1000) -> Dict[str, Any]:
+        """
+        Validate many records and return a compact summary.
+
+        Only failing records are reported, up to ``max_failures`` of them.
+
+        Args:
+            records: Records to validate
+            max_failures: Maximum number of failing records to list
+
+        Returns:
+            Counts of valid and invalid records plus the listed failures
+        """
+        run = self.run
+        total = invalid = warning_count = 0
+        failures: List[Dict[str, Any]] = []
+        for index, record in enumerate(records):
+            total += 1
+            errors, warnings, _ = run(record)
+            if warnings:
+                warning_count += 1
+            if errors:
+                invalid += 1
+                if len(failures) < max_failures:
+                    failures.append({"index": index, "errors": errors})
+        return {
+            "is_valid": invalid == 0,
+            "total": total,
+            "valid": total - invalid,
+            "invalid": invalid,
+            "records_with_warnings": warning_count,
+            "failures": failures,
+            "failures_truncated": invalid > len(failures),
+            "metadata": {
+                "validated_at": datetime.now(timezone.utc).isoformat(),
+                "validator_version": VALIDATOR_VERSION,
+            },
+        }
+
+
+def _normalize_rules(value: Any) -> Any:
+    # Sets and tuples are valid in specs but not in JSON; sets get a stable order
+    if isinstance(value, Mapping):
+        return {key: _normalize_rules(item) for key, item in value.items()}
+    if isinstance(value, (set, frozenset)):
+        items = [_normalize_rules(item) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+    if isinstance(value, (list, tuple)):
+        return [_normalize_rules(item) for item in value]
+    return value
+
+
+@lru_cache(maxsize=128)
+def _compile_cached(rules_key: str) -> CompiledValidator:
+    return CompiledValidator(json.loads(rules_key))
+
+
+def compile_rules(rules: Optional[Dict[str, Any]] = None) -> CompiledValidator:
+    """
+    Compile a rules specification, reusing validators for identical specs.
+
+    Sets and tuples in the spec are treated as lists, so
+    ``{"required_fields": {"a", "b"}}`` and ``["a", "b"]`` share a validator.
+
+    Args:
+        rules: Validation rules dictionary
+
+    Returns:
+        Compiled validator
+    """
+    return _compile_cached(json.dumps(_normalize_rules(rules or {}), sort_keys=True))
@@ -1,8 +1,14 @@
 """Pytest configuration and fixtures."""
 
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 from unittest.mock import Mock, patch
-import os
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -17,6 +23,18 @@ def setup_test_environment():
     })
 
 
+@pytest.fixture(autouse=True)
+def checkpoint_store(tmp_path):
+    """Keep flow checkpoints out of the working directory."""
+    from src.customer_flows.storage import CheckpointStore
+    
+    store = CheckpointStore(tmp_path / "checkpoints", fsync=False)
+    with patch("src.customer_flows.flows.example_flow.get_checkpoint_store", return_value=store), \
+            patch("src.customer_flows.flows.async_flow.get_checkpoint_store", return_value=store), \
+            patch("src.customer_flows.flows.retention_flow.get_checkpoint_store", return_value=store):
+        yield store
+
+
 @pytest.fixture
 def mock_openai():
     """Mock OpenAI API calls."""
@@ -59,3 +77,219 @@ def sample_analysis_result():
         "recommendations": ["Recommendation 1", "Recommendation 2"],
         "confidence": 0.85
     }
+
+
+@pytest.fixture(autouse=True)
+def prefect_result_storage(tmp_path_factory):
+    """Keep Prefect task results and cache records out of the user's Prefect home."""
+    from prefect.settings import PREFECT_LOCAL_STORAGE_PATH, temporary_settings
+    
+    # A fresh directory per test, so cached results never leak between runs
+    with temporary_settings(updates={PREFECT_LOCAL_STORAGE_PATH: tmp_path_factory.mktemp("prefect-results")}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def payload_store(tmp_path_factory):
+    """Keep offloaded task payloads and their index out of the working directory, with a fresh load cache."""
+    from src.customer_flows.storage import ContentAddressedStore, ResultIndex
+    from src.customer_flows.storage.payloads import _PayloadCache
+    
+    # Laid out like storage_dir, so retention may delete the indexed payloads
+    storage_dir = tmp_path_factory.mktemp("storage")
+    store = ContentAddressedStore(storage_dir / "payloads", suffix=".pkl", fsync=False)
+    store.index = ResultIndex(storage_dir / "index.db")
+    with patch("src.customer_flows.storage.payloads.get_payload_store", return_value=store), \
+            patch("src.customer_flows.storage.payloads.get_result_index", return_value=store.index), \
+            patch("src.customer_flows.storage.payloads._get_payload_cache", return_value=_PayloadCache(1024 * 1024)):
+        yield store
+    store.index.close()
+
+
+@pytest.fixture(autouse=True)
+def metrics_history(tmp_path_factory):
+    """Keep recorded flow runs out of the working directory."""
+    from src.customer_flows.metrics import MetricsHistory
+    
+    history = MetricsHistory(tmp_path_factory.mktemp("metrics") / "metrics.db")
+    with patch("src.customer_flows.metrics.instrumentation.get_metrics_history", return_value=history):
+        yield history
+    history.close()
+
+
+@pytest.fixture(autouse=True)
+def llm_registry():
+    """Keep LLM clients and connection warm-up away from the provider."""
+    from src.customer_flows.agents.llm_clients import LLMClientRegistry
+    
+    registry = LLMClientRegistry(api_key="test-openai-key", base_url="http://127.0.0.1:9/v1", timeout=1.0)
+    with patch("src.customer_flows.agents.llm_clients.get_llm_registry", return_value=registry):
+        yield registry
+    registry.close()
+
+
+class FilesystemS3Client:
+    """S3 client stand-in storing objects as files under a local directory."""
+    
+    def __init__(self, root):
+        self.root = root
+        self.calls = []
+    
+    def _path(self, bucket, key):
+        return self.root / bucket / key
+    
+    def _not_found(self, operation):
+        error = Exception(f"{operation}: Not Found")
+        error.response = {"Error": {"Code": "404"}}
+        return error
+    
+    def head_object(self, Bucket, Key):
+        self.calls.append(("head_object", Key))
+        path = self._path(Bucket, Key)
+        if not path.exists():
+            raise self._not_found("HeadObject")
+        return {"ContentLength": path.stat().st_size}
+    
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.calls.append(("put_object", Key))
+        path = self._path(Bucket, Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(Body)
+        return {}
+    
+    def get_object(self, Bucket, Key):
+        self.calls.append(("get_object", Key))
+        path = self._path(Bucket, Key)
+        if not path.exists():
+            raise self._not_found("GetObject")
+        return {"Body": open(path, "rb")}
+    
+    def list_objects_v2(self, Bucket, Prefix="", ContinuationToken=None, MaxKeys=1000):
+        self.calls.append(("list_objects_v2", Prefix))
+        keys = sorted(
+            str(path.relative_to(self.root / Bucket))
+            for path in (self.root / Bucket).rglob("*")
+            if path.is_file()
+        )
+        keys = [key for key in keys if key.startswith(Prefix)]
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + MaxKeys]
+        response = {"Contents": [{"Key": key} for key in page], "IsTruncated": start + MaxKeys < len(keys)}
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + MaxKeys)
+        return response
+    
+    def delete_objects(self, Bucket, Delete):
+        self.calls.append(("delete_objects", len(Delete["Objects"])))
+        assert len(Delete["Objects"]) <= 1000
+        errors = []
+        for obj in Delete["Objects"]:
+            if "locked" in obj["Key"]:
+                errors.append({"Key": obj["Key"], "Code": "AccessDenied", "Message": "Access Denied"})
+                continue
+            self._path(Bucket, obj["Key"]).unlink(missing_ok=True)
+        return {"Errors": errors} if errors else {}
+
+
+@pytest.fixture
+def s3_client(tmp_path):
+    """Filesystem-backed S3 client stand-in."""
+    return FilesystemS3Client(tmp_path / "s3")
+
+
+class _StandInHTTPHandler(BaseHTTPRequestHandler):
+    """Record POSTs and answer like Slack or a webhook receiver."""
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, dict(self.headers), body))
+        time.sleep(self.server.delay)
+        if "fail" in self.path:
+            self.send_response(500)
+            self.end_headers()
+            return
+        if body.get("channel") == "#proxy":
+            # A proxy or captive portal answering in place of Slack
+            response, content_type = b"<html>Service Unavailable</html>", "text/html"
+        else:
+            response = json.dumps({"ok": body.get("channel") != "#missing", "error": "channel_not_found"}).encode()
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+    
+    def log_message(self, *args):
+        pass
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 256
+
+
+@pytest.fixture
+def http_server():
+    """Local HTTP server standing in for Slack and webhook endpoints."""
+    server = _StandInHTTPServer(("127.0.0.1", 0), _StandInHTTPHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.delay = 0.0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class _StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue refusing recipients containing "reject"."""
+    
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+    
+    def handle(self):
+        self.server.connections += 1
+        self._reply("220 stand-in ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().rstrip("\r\n")
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in ("EHLO", "HELO"):
+                self._reply("250 stand-in")
+            elif command == "MAIL":
+                recipients = []
+                self._reply("250 OK")
+            elif command == "RCPT":
+                address = line.split(":", 1)[1].strip(" <>")
+                if "reject" in address:
+                    self._reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages.append(recipients)
+                self._reply("250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("250 OK")
+
+
+@pytest.fixture
+def smtp_server():
+    """Local SMTP server standing in for the mail relay."""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _StandInSMTPHandler)
+    server.daemon_threads = True
+    server.messages = []
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
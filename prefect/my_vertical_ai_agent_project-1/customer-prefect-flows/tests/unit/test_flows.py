@@ -1,9 +1,36 @@
 """Unit tests for Prefect flows."""
 
+import asyncio
+import os
+import threading
+import time
+
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import AsyncMock, patch, Mock
 
-from src.customer_flows.flows.example_flow import example_analysis_flow
+from src.customer_flows.agents.example_crew import (
+    ANALYSIS_FACETS,
+    AgentManager,
+    analysis_crew_fingerprint,
+    analysis_inputs,
+    create_analysis_crew,
+    get_crew_template,
+)
+from src.customer_flows.agents.rate_limits import LLMConcurrencyLimit
+from src.customer_flows.flows.async_flow import example_analysis_flow_async, process_data_async
+from src.customer_flows.flows.batch_flow import example_batch_analysis_flow, load_batch_inputs
+from src.customer_flows.flows.caching import CanonicalInputs
+from src.customer_flows.flows.example_flow import (
+    CREW_ANALYSIS_CACHE_POLICY,
+    PROCESS_DATA_CACHE_POLICY,
+    _unless_expired,
+    analysis_run_key,
+    example_analysis_flow,
+    process_data,
+    run_crew_analysis,
+)
+from src.customer_flows.flows.task_runners import HybridTaskRunner, get_process_pool, warm_process_pool
+from src.customer_flows.storage import CheckpointStore, PayloadRef, offload_payload
 
 
 class TestExampleAnalysisFlow:
@@ -86,3 +113,473 @@ class TestExampleAnalysisFlow:
         log_calls = [call[0][0] for call in mock_logger.info.call_args_list]
         assert "Starting example analysis flow" in log_calls
         assert "Flow completed successfully" in log_calls
+
+
+class TestExampleBatchAnalysisFlow:
+    """Test example_batch_analysis_flow."""
+    
+    @staticmethod
+    def _crew(fail_on=None):
+        crew = Mock()
+        
+        def kickoff(inputs):
+            if inputs["data"]["original"] == fail_on:
+                raise RuntimeError("rate limited")
+            return {"data": inputs["data"]["original"], "analysis": "batch analysis"}
+        
+        crew.kickoff.side_effect = kickoff
+        return crew
+    
+    @patch("src.customer_flows.flows.example_flow.create_analysis_crew")
+    def test_batch_flow_maps_every_input(self, mock_create_crew):
+        """Test that every document runs through every step."""
+        mock_create_crew.return_value = self._crew()
+        
+        result = example_batch_analysis_flow(["first doc", "second doc", "third doc"])
+        
+        assert result["status"] == "completed"
+        assert result["summary"] == {"total": 3, "completed": 3, "failed": 0}
+        assert [r["analysis"]["data"] for r in result["results"]] == ["first doc", "second doc", "third doc"]
+        assert all(r["storage_location"] for r in result["results"])
+        assert mock_create_crew.call_count == 3
+    
+    @patch("src.customer_flows.flows.example_flow.create_analysis_crew")
+    def test_batch_flow_reads_jsonl_and_isolates_failures(self, mock_create_crew, tmp_path):
+        """Test JSONL input and that one failed document does not fail the batch."""
+        mock_create_crew.return_value = self._crew(fail_on="bad doc")
+        path = tmp_path / "inputs.jsonl"
+        path.write_text('"good doc"\n\n{"input_data": "bad doc"}\n')
+        
+        result = example_batch_analysis_flow(str(path), save_results_flag=False)
+        
+        assert result["status"] == "partial"
+        assert [r["status"] for r in result["results"]] == ["completed", "failed"]
+        assert result["results"][1]["error"] == "rate limited"
+        assert result["results"][0]["storage_location"] is None
+    
+    def test_invalid_jsonl_line_is_rejected(self, tmp_path):
+        """Test that malformed records name their line."""
+        path = tmp_path / "inputs.jsonl"
+        path.write_text('"ok"\n{"text": "missing input_data"}\n')
+        
+        with pytest.raises(ValueError, match=":2:"):
+            load_batch_inputs(str(path))
+    
+    def test_llm_limit_caps_concurrent_crews(self):
+        """Test that crews beyond the cap wait and share the rate limit."""
+        limit = LLMConcurrencyLimit(max_concurrency=2, requests_per_minute=30)
+        active, peak, lock = [0], [0], threading.Lock()
+        
+        def run_crew():
+            with limit.slot():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+        
+        threads = [threading.Thread(target=run_crew) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert peak[0] == 2
+        assert limit.crew_max_rpm == 15
+
+
+class TestTaskCaching:
+    """Test cache keys of the expensive flow tasks."""
+    
+    def test_canonical_inputs_ignore_key_order(self):
+        """Test that equal inputs share a key regardless of dict order."""
+        policy = CanonicalInputs(namespace="run-crew-analysis", fingerprint=lambda: {"model": "gpt-4"})
+        
+        first = policy.compute_key(None, {"processed_data": {"a": 1, "b": [1, 2]}}, {})
+        second = policy.compute_key(None, {"processed_data": {"b": [1, 2], "a": 1}}, {})
+        
+        assert first == second
+    
+    def test_flow_policies_keep_prefect_key_storage(self):
+        """Test that the namespaces do not land in Prefect's own policy fields."""
+        for policy, namespace in [
+            (PROCESS_DATA_CACHE_POLICY, "process-input-data"),
+            (CREW_ANALYSIS_CACHE_POLICY, "run-crew-analysis"),
+        ]:
+            assert policy.key_storage is None
+            assert policy.namespace == namespace
+    
+    def test_key_changes_with_configuration_and_namespace(self):
+        """Test that configuration and task are part of the key."""
+        inputs = {"raw_data": "same input"}
+        key = CanonicalInputs(namespace="a", fingerprint=lambda: {"model": "gpt-4"}).compute_key(None, inputs, {})
+        
+        assert CanonicalInputs(namespace="a", fingerprint=lambda: {"model": "gpt-4o"}).compute_key(None, inputs, {}) != key
+        assert CanonicalInputs(namespace="b", fingerprint=lambda: {"model": "gpt-4"}).compute_key(None, inputs, {}) != key
+        assert CanonicalInputs(namespace="a", fingerprint=lambda: {"model": "gpt-4"}, exclude=["raw_data"]).compute_key(
+            None, {"raw_data": "other input"}, {}
+        ) == CanonicalInputs(namespace="a", fingerprint=lambda: {"model": "gpt-4"}, exclude=["raw_data"]).compute_key(
+            None, inputs, {}
+        )
+    
+    def test_processed_text_inputs_are_hashable(self):
+        """Test that crew inputs produced by process_data have a stable key."""
+        policy = CanonicalInputs(
+            namespace="run-crew-analysis", fingerprint=analysis_crew_fingerprint, volatile_fields=["processed_at"]
+        )
+        
+        processed = process_data("some text")
+        
+        assert policy.compute_key(None, {"processed_data": processed}, {}) == policy.compute_key(
+            None, {"processed_data": process_data("some text")}, {}
+        )
+        # Hashing does not build the lazy derived strings
+        assert processed._cache == {}
+    
+    @patch("src.customer_flows.flows.example_flow.run_crew_analysis")
+    @patch("src.customer_flows.flows.example_flow.process_data")
+    def test_refresh_bypasses_cached_results(self, mock_process_data, mock_run_crew_analysis):
+        """Test that refresh_cache re-runs both cached tasks."""
+        example_analysis_flow("test input", save_results_flag=False, refresh_cache=True)
+        
+        mock_process_data.with_options.assert_called_once_with(refresh_cache=True)
+        mock_run_crew_analysis.with_options.assert_called_once_with(refresh_cache=True)
+        mock_process_data.with_options.return_value.assert_called_once_with("test input")
+
+
+class TestPayloadReferences:
+    """Test that large payloads travel between steps by reference."""
+    
+    @patch("src.customer_flows.storage.payloads.get_settings")
+    @patch("src.customer_flows.flows.example_flow.create_analysis_crew")
+    def test_large_input_from_file_is_passed_by_reference(
+        self, mock_create_crew, mock_settings, tmp_path, checkpoint_store
+    ):
+        """Test that a file:// input is read once and handed on as a handle."""
+        mock_settings.return_value.payload_ref_threshold = 1024
+        seen = []
+        
+        def kickoff(inputs):
+            seen.append(inputs["data"])
+            return {"data": "ok", "analysis": "large document analysis"}
+        
+        mock_create_crew.return_value.kickoff.side_effect = kickoff
+        text = "A large document. " * 500
+        path = tmp_path / "document.txt"
+        path.write_text(text, encoding="utf-8")
+        
+        result = example_analysis_flow(path.as_uri(), save_results_flag=False, run_key="large-run")
+        
+        assert isinstance(result["processed_data"], PayloadRef)
+        assert result["processed_data"].load()["original"] == text
+        assert seen[0]["original"] == text
+        assert result["flow_metadata"]["run_key"] == "large-run"
+    
+    def test_reference_is_keyed_by_digest_without_loading(self, payload_store):
+        """Test that a reference hashes by the digest of the payload it points to."""
+        text = "cached document " * 200
+        ref = offload_payload(text, threshold=16)
+        policy = CanonicalInputs(namespace="process-input-data")
+        
+        assert isinstance(ref, PayloadRef)
+        with patch.object(PayloadRef, "load", side_effect=AssertionError("payload loaded")):
+            key = policy.compute_key(None, {"raw_data": ref}, {})
+            assert key == policy.compute_key(None, {"raw_data": offload_payload(text, threshold=16)}, {})
+            assert key != policy.compute_key(None, {"raw_data": offload_payload(text + ".", threshold=16)}, {})
+
+
+class TestCheckpointResume:
+    """Test step checkpoints of example_analysis_flow."""
+    
+    @patch("src.customer_flows.flows.example_flow.save_results")
+    @patch("src.customer_flows.flows.example_flow.create_analysis_crew")
+    def test_failed_save_resumes_without_rerunning_crew(self, mock_create_crew, mock_save_results, checkpoint_store):
+        """Test that a retry after a failed last step skips the LLM work."""
+        mock_crew = Mock()
+        mock_crew.kickoff.return_value = {"data": "input", "analysis": "expensive analysis"}
+        mock_create_crew.return_value = mock_crew
+        mock_save_results.side_effect = [ValueError("storage unavailable"), "storage://saved.json"]
+        
+        with pytest.raises(ValueError):
+            example_analysis_flow("checkpointed input", run_key="run-1")
+        assert checkpoint_store.completed_steps("run-1") == ["analysis", "processed_data", "validation"]
+        
+        result = example_analysis_flow("checkpointed input", run_key="run-1")
+        
+        assert result["storage_location"] == "storage://saved.json"
+        assert result["analysis"] == {"data": "input", "analysis": "expensive analysis"}
+        mock_crew.kickoff.assert_called_once()
+        assert checkpoint_store.completed_steps("run-1") == []
+    
+    @patch("src.customer_flows.flows.example_flow.run_crew_analysis")
+    @patch("src.customer_flows.flows.example_flow.process_data")
+    def test_resume_starts_at_first_incomplete_step(self, mock_process_data, mock_run_crew_analysis, checkpoint_store):
+        """Test that only steps without a checkpoint run."""
+        run_key = analysis_run_key("same input")
+        checkpoint_store.save(run_key, "processed_data", {"original": "same input"})
+        mock_run_crew_analysis.return_value = {"data": "same input", "analysis": "fresh analysis"}
+        
+        result = example_analysis_flow("same input", save_results_flag=False)
+        
+        mock_process_data.assert_not_called()
+        mock_run_crew_analysis.assert_called_once_with({"original": "same input"}, "sequential")
+        assert result["flow_metadata"]["run_key"] == run_key
+    
+    @patch("src.customer_flows.flows.example_flow.run_crew_analysis")
+    @patch("src.customer_flows.flows.example_flow.process_data")
+    def test_checkpoint_of_expired_payload_is_recomputed(
+        self, mock_process_data, mock_run_crew_analysis, checkpoint_store
+    ):
+        """Test that a checkpoint pointing at an expired payload counts as missing."""
+        run_key = analysis_run_key("same input")
+        checkpoint_store.save(run_key, "processed_data", PayloadRef("0" * 64, 100, "ProcessedText"))
+        mock_process_data.return_value = {"original": "same input"}
+        mock_run_crew_analysis.return_value = {"data": "same input", "analysis": "fresh analysis"}
+        
+        example_analysis_flow("same input", save_results_flag=False)
+        
+        mock_process_data.assert_called_once()
+        mock_run_crew_analysis.assert_called_once_with({"original": "same input"}, "sequential")
+    
+    def test_cached_result_of_expired_payload_is_recomputed(self):
+        """Test that a cache hit on an expired payload reruns the task."""
+        stale = PayloadRef("0" * 64, 100, "ProcessedText")
+        recompute = Mock(return_value={"original": "fresh"})
+        
+        assert _unless_expired(stale, recompute, Mock()) == {"original": "fresh"}
+        assert _unless_expired({"original": "cached"}, recompute, Mock()) == {"original": "cached"}
+        recompute.assert_called_once()
+    
+    def test_checkpoint_store_round_trip(self, tmp_path):
+        """Test saving, loading and clearing checkpoints."""
+        store = CheckpointStore(tmp_path)
+        
+        assert store.load("run", "analysis") == (False, None)
+        store.save("run", "analysis", {"result": [1, 2]})
+        
+        assert store.load("run", "analysis") == (True, {"result": [1, 2]})
+        assert [p.name for p in (tmp_path / "run").iterdir()] == ["analysis.pkl"]
+        store.clear("run")
+        assert store.completed_steps("run") == []
+    
+    def test_sweep_removes_only_idle_runs(self, tmp_path):
+        """Test that checkpoints of abandoned runs expire by age."""
+        store = CheckpointStore(tmp_path)
+        store.save("abandoned", "processed_data", "old")
+        store.save("resumed", "processed_data", "old")
+        store.save("running", "processed_data", "new")
+        now = time.time()
+        for path in [tmp_path / "abandoned", *(tmp_path / "abandoned").iterdir(), tmp_path / "resumed"]:
+            os.utime(path, (now - 10 * 86400, now - 10 * 86400))
+        store.save("resumed", "analysis", "new")
+        
+        assert store.sweep(7 * 86400, dry_run=True) == ["abandoned"]
+        assert store.completed_steps("abandoned") == ["processed_data"]
+        assert store.sweep(7 * 86400) == ["abandoned"]
+        assert store.completed_steps("abandoned") == []
+        assert store.completed_steps("resumed") == ["analysis", "processed_data"]
+        assert store.sweep(7 * 86400) == []
+
+
+class TestExampleAnalysisFlowAsync:
+    """Test example_analysis_flow_async."""
+    
+    @staticmethod
+    def _crew(delay=0.0):
+        crew = Mock()
+        crew.active = crew.max_active = 0
+        
+        async def kickoff_async(inputs):
+            crew.active += 1
+            crew.max_active = max(crew.max_active, crew.active)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                crew.active -= 1
+            return {"data": inputs["data"]["original"], "analysis": "async analysis"}
+        
+        crew.kickoff_async = AsyncMock(side_effect=kickoff_async)
+        return crew
+    
+    @patch("src.customer_flows.flows.async_flow.create_analysis_crew")
+    async def test_async_flow_uses_kickoff_async(self, mock_create_crew):
+        """Test that the crew is awaited rather than run synchronously."""
+        crew = self._crew()
+        mock_create_crew.return_value = crew
+        
+        result = await example_analysis_flow_async("async input data", save_results_flag=False)
+        
+        assert result["status"] == "completed"
+        assert result["analysis"] == {"data": "async input data", "analysis": "async analysis"}
+        crew.kickoff_async.assert_awaited_once()
+        crew.kickoff.assert_not_called()
+    
+    @patch("src.customer_flows.flows.async_flow.get_llm_limit", return_value=LLMConcurrencyLimit(20, 200))
+    @patch("src.customer_flows.flows.async_flow.create_analysis_crew")
+    async def test_many_runs_share_one_event_loop(self, mock_create_crew, _limit):
+        """Test that concurrent runs overlap while waiting on the LLM."""
+        crew = mock_create_crew.return_value = self._crew(delay=0.2)
+        
+        results = await asyncio.gather(*(
+            example_analysis_flow_async(f"document {i}", save_results_flag=False) for i in range(20)
+        ))
+        
+        assert [r["analysis"]["data"] for r in results] == [f"document {i}" for i in range(20)]
+        assert crew.max_active > 1
+    
+    async def test_async_slots_are_shared_with_sync_crews(self):
+        """Test that a slot held by a sync crew blocks async crews."""
+        limit = LLMConcurrencyLimit(max_concurrency=1)
+        
+        async def run_crew():
+            async with limit.slot_async(poll_interval=0.01):
+                pass
+        
+        with limit.slot():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(run_crew(), 0.1)
+        
+        await asyncio.wait_for(run_crew(), 0.1)
+
+
+class TestHybridTaskRunner:
+    """Test routing of task runs between threads and processes."""
+    
+    def test_routes_only_sync_cpu_tasks_to_processes(self):
+        """Test that preprocessing goes to processes and crews stay on threads."""
+        runner = HybridTaskRunner(max_workers=4, process_workers=2)
+        
+        assert runner.routes_to_process_pool(process_data)
+        assert not runner.routes_to_process_pool(run_crew_analysis)
+        assert not runner.routes_to_process_pool(process_data_async)
+    
+    def test_cpu_task_body_runs_in_worker_process(self):
+        """Test that an offloaded task returns the same result from another process."""
+        runner = HybridTaskRunner(max_workers=4, process_workers=2)
+        
+        with runner:
+            offloaded = runner._process_task(process_data)
+            result = offloaded.fn("Multi core preprocessing")
+        
+        expected = process_data.fn("Multi core preprocessing")
+        assert result["original"] == expected["original"]
+        assert result["word_count"] == expected["word_count"]
+        assert result["uppercase"] == "MULTI CORE PREPROCESSING"
+        assert offloaded is not process_data
+        assert offloaded.name == process_data.name
+    
+    def test_pool_is_warm_and_reused(self):
+        """Test that every worker starts up front and the pool is shared."""
+        pool = get_process_pool(2)
+        
+        assert warm_process_pool(pool, 2) == 2
+        assert get_process_pool(2) is pool
+    
+    def test_duplicate_keeps_configuration(self):
+        """Test that Prefect's copy of the runner routes the same way."""
+        runner = HybridTaskRunner(max_workers=8, process_workers=3, cpu_tags=["data"])
+        
+        assert runner.duplicate() == runner
+        assert runner != HybridTaskRunner(max_workers=8, process_workers=3)
+
+
+class TestLLMClientRegistry:
+    """Test the process-wide LLM clients."""
+    
+    def test_clients_are_shared_per_configuration(self, llm_registry):
+        """Test that equal configurations share a client and providers share a pool."""
+        first = llm_registry.get({"model": "gpt-4", "temperature": 0.1})
+        again = llm_registry.get({"temperature": 0.1, "model": "gpt-4"})
+        other = llm_registry.get({"model": "gpt-3.5-turbo", "temperature": 0.1})
+        
+        assert again is first
+        assert other is not first
+        assert first.http_client is other.http_client is llm_registry.http_client()
+    
+    def test_agent_managers_reuse_the_client(self, llm_registry):
+        """Test that building a crew per task run does not build a new client."""
+        assert AgentManager().llm is AgentManager().llm
+        assert AgentManager({"temperature": 0}).llm is not AgentManager().llm
+    
+    def test_warm_opens_connections(self, llm_registry, http_server):
+        """Test that warm-up reaches the provider and tolerates an unreachable one."""
+        llm_registry.base_url = http_server.url
+        assert llm_registry.warm(connections=3) == 3
+        
+        llm_registry.base_url = "http://127.0.0.1:9/v1"
+        thread = llm_registry.warm_in_background()
+        assert llm_registry.warm_in_background() is thread
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    
+    def test_close_shuts_down_pools(self, llm_registry):
+        """Test that closing releases the pooled HTTP clients."""
+        client = llm_registry.http_client()
+        llm_registry.close()
+        
+        assert client.is_closed
+        with pytest.raises(RuntimeError):
+            llm_registry.get({"model": "gpt-4"})
+
+
+class TestCrewTemplates:
+    """Test crews instantiated from process-wide templates."""
+    
+    @pytest.fixture(autouse=True)
+    def templates(self):
+        get_crew_template.cache_clear()
+        yield
+        get_crew_template.cache_clear()
+    
+    def test_template_is_built_once_per_configuration(self):
+        """Test that per-run crews are copies and agents are not rebuilt."""
+        with patch("src.customer_flows.agents.example_crew.AgentManager", wraps=AgentManager) as manager:
+            first = create_analysis_crew(crew_config={"max_rpm": 5})
+            second = create_analysis_crew(crew_config={"max_rpm": 5})
+            assert manager.call_count == 1
+            create_analysis_crew(crew_config={"max_rpm": 10})
+            assert manager.call_count == 2
+        
+        assert first is not second
+        assert first.tasks is not second.tasks
+        assert first.agents[0].llm is second.agents[0].llm
+    
+    def test_descriptions_are_interpolated_from_inputs(self):
+        """Test that the input reaches the task description only at kickoff."""
+        crew = create_analysis_crew()
+        data = {"original": "Quarterly revenue grew", "word_count": 3, "character_count": 20}
+        
+        assert "{original}" in crew.tasks[0].description
+        description = crew.tasks[0].description.format(**analysis_inputs(data))
+        assert "Original content: Quarterly revenue grew" in description
+        assert "Word count: 3" in description
+        assert analysis_inputs(data)["data"] is data
+    
+    def test_parallel_crew_fans_out_analysis_facets(self):
+        """Test that facet tasks run asynchronously and later stages wait on all of them."""
+        crew = create_analysis_crew(mode="parallel")
+        *facets, insight, review = crew.tasks
+        
+        assert len(facets) == len(ANALYSIS_FACETS)
+        assert all(task.async_execution for task in facets)
+        assert not getattr(insight, "async_execution", False)
+        assert insight.context == facets
+        assert review.context == [*facets, insight]
+        # Concurrent facet tasks never share an analyst
+        assert len({id(task.agent) for task in facets}) == len(facets)
+        assert all("{original}" in task.description for task in facets)
+        
+        with pytest.raises(ValueError):
+            create_analysis_crew(mode="hierarchical")
+    
+    @patch("src.customer_flows.flows.example_flow.create_analysis_crew")
+    def test_flow_passes_crew_mode(self, mock_create_crew):
+        """Test that the crew mode reaches the crew and separates run keys."""
+        mock_create_crew.return_value.kickoff.return_value = {"data": "input", "analysis": "parallel analysis"}
+        
+        result = example_analysis_flow("Facets of a document", save_results_flag=False, crew_mode="parallel")
+        
+        assert mock_create_crew.call_args.kwargs["mode"] == "parallel"
+        assert result["flow_metadata"]["run_key"] == analysis_run_key("Facets of a document", "parallel")
+        assert analysis_run_key("Facets of a document", "parallel") != analysis_run_key("Facets of a document")
@@ -0,0 +1,263 @@
+"""Unit tests for task instrumentation and metrics export."""
+
+import asyncio
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.customer_flows.flows.async_flow import validate_results_async
+from src.customer_flows.flows.example_flow import example_analysis_flow, process_data
+from src.customer_flows.metrics import (
+    MetricsHistory,
+    TaskRunRecord,
+    collect_task_metrics,
+    finish_task_run,
+    get_metrics_registry,
+    instrumented,
+    parse_window,
+    percentile,
+    record_llm_usage,
+    render_prometheus,
+    start_metrics_server,
+    token_cost,
+)
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    """Give every test an empty process-wide registry."""
+    get_metrics_registry.cache_clear()
+    yield get_metrics_registry()
+    get_metrics_registry.cache_clear()
+
+
+class CrewOutput(dict):
+    """Crew result carrying token usage like CrewAI's CrewOutput."""
+
+    def __init__(self, *args, token_usage=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.token_usage = token_usage
+
+
+class TestInstrumentation:
+    """Test per-task-run records."""
+
+    def test_call_outside_task_run_is_recorded(self):
+        """Test wall time, payload sizes and tokens of a plain call."""
+        @instrumented
+        def analyze(text):
+            record_llm_usage({"prompt_tokens": 120, "completion_tokens": 30}, model="gpt-4")
+            return text.upper()
+
+        with collect_task_metrics() as run_metrics:
+            assert analyze("some text") == "SOME TEXT"
+
+        summary = run_metrics.summary()
+        record = summary["tasks"][0]
+        assert record["task"] == "analyze"
+        assert record["state"] == "Completed"
+        assert record["attempts"] == 1
+        assert record["wall_time"] > 0
+        assert record["input_bytes"] > 0 and record["output_bytes"] > 0
+        assert record["model"] == "gpt-4"
+        assert summary["totals"]["total_tokens"] == 150
+
+    def test_retries_and_queue_wait_come_from_state_hook(self, registry):
+        """Test that attempts of one task run are merged and finished by the hook."""
+        expected = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        task_run = SimpleNamespace(
+            id="run-1",
+            flow_run_id="flow-1",
+            run_count=0,
+            expected_start_time=expected,
+            start_time=expected + timedelta(seconds=2),
+        )
+
+        @instrumented
+        def run_crew_analysis():
+            if task_run.run_count == 1:
+                raise RuntimeError("rate limited")
+            return "ok"
+
+        task = SimpleNamespace(name="run-crew-analysis", fn=run_crew_analysis)
+        context = SimpleNamespace(task=task, task_run=task_run)
+
+        with patch("src.customer_flows.metrics.instrumentation.TaskRunContext.get", return_value=context):
+            with collect_task_metrics() as run_metrics:
+                task_run.run_count = 1
+                with pytest.raises(RuntimeError):
+                    run_crew_analysis()
+                task_run.run_count = 2
+                run_crew_analysis()
+                finish_task_run(task, task_run, SimpleNamespace(name="Completed"))
+
+        record = run_metrics.summary()["tasks"][0]
+        assert record["task"] == "run_crew_analysis"
+        assert record["attempts"] == 2
+        assert record["retries"] == 1
+        assert record["queue_wait"] == 2.0
+        assert registry.snapshot()["retries"] == {"run_crew_analysis": 1}
+
+    def test_cached_task_run_is_recorded_without_attempts(self):
+        """Test that a cache hit still produces a record."""
+        task_run = SimpleNamespace(id="run-2", flow_run_id=None, run_count=0, expected_start_time=None, start_time=None)
+
+        with collect_task_metrics() as run_metrics:
+            task = SimpleNamespace(name="process-input-data", fn=process_data.fn)
+            finish_task_run(task, task_run, SimpleNamespace(name="Cached"))
+
+        record = run_metrics.summary()["tasks"][0]
+        assert record["task"] == "process_data"
+        assert (record["state"], record["attempts"], record["retries"]) == ("Cached", 0, 0)
+
+    def test_async_wrapper_is_recorded_once(self):
+        """Test that an async task delegating to a sync task body is one attempt."""
+        with collect_task_metrics() as run_metrics:
+            asyncio.run(validate_results_async.fn({"summary": "ok"}))
+
+        [record] = run_metrics.summary()["tasks"]
+        assert (record["task"], record["attempts"]) == ("validate_results_async", 1)
+
+
+class TestExposition:
+    """Test the Prometheus text endpoint."""
+
+    def test_render_prometheus(self):
+        """Test counters, cumulative histogram buckets and token labels."""
+        @instrumented
+        def analyze():
+            record_llm_usage(SimpleNamespace(prompt_tokens=10, completion_tokens=5), model="gpt-4")
+
+        analyze()
+        analyze()
+        text = render_prometheus()
+
+        assert 'customer_flows_task_runs_total{task="analyze",state="Completed"} 2' in text
+        assert 'customer_flows_task_duration_seconds_bucket{task="analyze",le="+Inf"} 2' in text
+        assert 'customer_flows_task_duration_seconds_count{task="analyze"} 2' in text
+        assert 'customer_flows_llm_tokens_total{task="analyze",model="gpt-4",kind="prompt"} 20' in text
+        assert "# TYPE customer_flows_task_duration_seconds histogram" in text
+
+    def test_metrics_endpoint(self):
+        """Test that the endpoint serves the exposition text."""
+        instrumented(lambda: None)()
+        server = start_metrics_server(0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode()
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert "customer_flows_task_runs_total" in body
+
+
+class TestFlowMetrics:
+    """Test the metrics summary attached to flow results."""
+
+    @patch("src.customer_flows.flows.example_flow.create_analysis_crew")
+    def test_flow_result_carries_summary(self, mock_create_crew):
+        """Test that each executed task run and its tokens appear in the result."""
+        usage = SimpleNamespace(prompt_tokens=900, completion_tokens=100, total_tokens=1000)
+        mock_create_crew.return_value.kickoff.return_value = CrewOutput(
+            data="document", analysis="insights", token_usage=usage
+        )
+
+        result = example_analysis_flow("Document to measure", save_results_flag=False)
+
+        metrics = result["metrics"]
+        tasks = [record["task"] for record in metrics["tasks"]]
+        assert tasks == ["process_data", "run_crew_analysis", "validate_results"]
+        assert metrics["totals"]["total_tokens"] == 1000
+        assert metrics["tasks"][1]["model"] == "gpt-4"
+        assert metrics["totals"]["input_bytes"] > len("Document to measure")
+
+
+class TestMetricsHistory:
+    """Test the historical metrics store and its reports."""
+
+    NOW = 1_700_000_000.0
+
+    def _record_runs(self, history):
+        for index, duration in enumerate([1.0, 2.0, 3.0, 4.0, 10.0]):
+            records = [
+                TaskRunRecord(task="process_data", state="Completed", wall_time=0.1),
+                TaskRunRecord(
+                    task="run_crew_analysis",
+                    state="Completed",
+                    wall_time=duration - 0.1,
+                    model="gpt-4",
+                    prompt_tokens=1000,
+                    completion_tokens=500,
+                ),
+            ]
+            history.record_flow_run(
+                "example-analysis-flow", duration, "completed", records, finished_at=self.NOW - 60 * index
+            )
+        # Outside a one-hour window
+        history.record_flow_run("example-analysis-flow", 99.0, "failed", finished_at=self.NOW - 7200)
+
+    def test_percentiles_and_windows(self):
+        """Test nearest-rank percentiles and window parsing."""
+        assert percentile([1, 2, 3, 4, 10], 50) == 3
+        assert percentile([1, 2, 3, 4, 10], 95) == 10
+        assert percentile([], 99) is None
+        assert parse_window("24h") == 86400
+        assert parse_window("30m") == 1800
+        with pytest.raises(ValueError):
+            parse_window("yesterday")
+
+    def test_stats_per_flow(self, tmp_path):
+        """Test latency, throughput and cost of flow runs within the window."""
+        history = MetricsHistory(tmp_path / "metrics.db")
+        self._record_runs(history)
+
+        (row,) = history.stats(by="flow", window_seconds=3600, now=self.NOW)
+
+        assert row["flow"] == "example-analysis-flow"
+        assert (row["runs"], row["failed"]) == (5, 0)
+        assert (row["p50"], row["p95"], row["p99"]) == (3.0, 10.0, 10.0)
+        assert row["throughput"] == 5.0
+        assert row["prompt_tokens"] == 5000
+        assert row["cost"] == pytest.approx(5 * token_cost("gpt-4", 1000, 500))
+
+    def test_stats_per_task_and_model(self, tmp_path):
+        """Test task and model breakdowns; unpriced tasks have no cost."""
+        history = MetricsHistory(tmp_path / "metrics.db")
+        self._record_runs(history)
+
+        tasks = {row["task"]: row for row in history.stats(by="task", window_seconds=3600, now=self.NOW)}
+        models = history.stats(by="model", window_seconds=3600, now=self.NOW)
+
+        assert tasks["process_data"]["cost"] is None
+        assert tasks["run_crew_analysis"]["p50"] == pytest.approx(2.9)
+        assert [row["model"] for row in models] == ["gpt-4"]
+        assert models[0]["completion_tokens"] == 2500
+        with pytest.raises(ValueError):
+            history.stats(by="agent")
+
+    @patch("src.customer_flows.flows.example_flow.create_analysis_crew")
+    def test_flows_append_runs(self, mock_create_crew, metrics_history):
+        """Test that completed and failed flow runs are recorded."""
+        mock_create_crew.return_value.kickoff.return_value = CrewOutput(
+            data="document",
+            analysis="insights",
+            token_usage={"prompt_tokens": 300, "completion_tokens": 100},
+        )
+        example_analysis_flow("First document", save_results_flag=False)
+        mock_create_crew.return_value.kickoff.side_effect = RuntimeError("provider down")
+        with pytest.raises(RuntimeError):
+            example_analysis_flow("Second document", save_results_flag=False)
+
+        (flow_row,) = metrics_history.stats(by="flow")
+        tasks = {row["task"]: row for row in metrics_history.stats(by="task")}
+
+        assert (flow_row["runs"], flow_row["failed"]) == (2, 1)
+        assert flow_row["prompt_tokens"] == 300
+        assert flow_row["cost"] == pytest.approx(token_cost("gpt-4", 300, 100))
+        assert (tasks["run_crew_analysis"]["runs"], tasks["run_crew_analysis"]["failed"]) == (2, 1)
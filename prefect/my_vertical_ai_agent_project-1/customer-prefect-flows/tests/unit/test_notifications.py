@@ -0,0 +1,175 @@
+"""Unit tests for notification delivery."""
+
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.customer_flows.notifications import (
+    NotificationCoalescer,
+    NotificationDispatcher,
+    PersistentSMTP,
+    format_digest,
+)
+from src.customer_flows.tasks.core_tasks import send_notification
+
+
+@pytest.fixture
+def dispatcher(http_server, smtp_server):
+    """Dispatcher wired to the stand-in servers."""
+    smtp = PersistentSMTP("127.0.0.1", smtp_server.server_address[1], starttls=False)
+    dispatcher = NotificationDispatcher(
+        smtp=smtp,
+        slack_token="xoxb-test",
+        slack_api_url=http_server.url,
+    )
+    yield dispatcher
+    dispatcher.close()
+
+
+class TestNotificationDispatcher:
+    """Test concurrent notification delivery."""
+    
+    def test_per_recipient_status(self, dispatcher, http_server):
+        """Test that each recipient gets its own delivery status."""
+        recipients = {
+            "webhook": [f"{http_server.url}/hook", f"{http_server.url}/fail"],
+            "slack": ["#alerts", "#missing"],
+        }
+        
+        status = dispatcher.dispatch("Flow failed", recipients, ["webhook", "slack", "pager"], priority="high")
+        
+        assert status["webhook"]["status"] == "partial"
+        assert status["webhook"]["recipients"][f"{http_server.url}/hook"]["status"] == "sent"
+        assert status["webhook"]["recipients"][f"{http_server.url}/fail"]["status"] == "failed"
+        assert status["slack"]["recipients"]["#missing"] == {"status": "failed", "error": "channel_not_found"}
+        assert status["pager"]["status"] == "unsupported"
+        slack_request = next(r for r in http_server.requests if r[0] == "/chat.postMessage")
+        assert slack_request[1]["Authorization"] == "Bearer xoxb-test"
+        assert slack_request[2]["text"] == "[high] Flow failed"
+    
+    def test_non_json_slack_response_fails_only_its_recipient(self, dispatcher):
+        """Test that an HTML 200 from Slack's URL is a per-recipient failure."""
+        status = dispatcher.dispatch("Flow failed", ["#alerts", "#proxy"], ["slack"])
+        
+        assert status["slack"]["status"] == "partial"
+        assert status["slack"]["recipients"]["#alerts"]["status"] == "sent"
+        assert status["slack"]["recipients"]["#proxy"]["status"] == "failed"
+        assert "Invalid Slack response" in status["slack"]["recipients"]["#proxy"]["error"]
+    
+    def test_recipients_are_sent_concurrently(self, dispatcher, http_server):
+        """Test that fan-out costs about one round trip."""
+        http_server.delay = 0.2
+        recipients = [f"{http_server.url}/hook/{i}" for i in range(50)]
+        
+        started = time.monotonic()
+        status = dispatcher.dispatch("Alert", recipients, ["webhook"])
+        
+        assert time.monotonic() - started < 2.0
+        assert status["webhook"]["status"] == "sent"
+        assert len(http_server.requests) == 50
+    
+    def test_email_reuses_one_smtp_connection(self, dispatcher, smtp_server):
+        """Test one transaction per send over a persistent connection."""
+        recipients = ["a@example.com", "reject@example.com", "b@example.com"]
+        
+        first = dispatcher.dispatch("Report ready", recipients, ["email"])
+        dispatcher.dispatch("Report ready", ["c@example.com"], ["email"])
+        
+        assert first["email"]["status"] == "partial"
+        assert first["email"]["recipients"]["a@example.com"] == {"status": "sent"}
+        assert first["email"]["recipients"]["reject@example.com"]["status"] == "failed"
+        assert smtp_server.messages == [["a@example.com", "b@example.com"], ["c@example.com"]]
+        assert smtp_server.connections == 1
+    
+    def test_email_without_smtp_host_fails_per_recipient(self):
+        """Test the status reported when email is not configured."""
+        dispatcher = NotificationDispatcher()
+        try:
+            status = dispatcher.dispatch("Hello", ["a@example.com"], ["email"])
+        finally:
+            dispatcher.close()
+        
+        assert status["email"]["status"] == "failed"
+        assert status["email"]["recipients"]["a@example.com"]["error"] == "SMTP_HOST is not configured"
+
+
+class TestSendNotificationTask:
+    """Test the send_notification task."""
+    
+    def test_task_reports_dispatcher_status(self, dispatcher, http_server):
+        """Test that the task returns per-recipient delivery status."""
+        with patch("src.customer_flows.tasks.core_tasks.get_notification_dispatcher", return_value=dispatcher):
+            result = send_notification("Done", [f"{http_server.url}/hook"], channels=["webhook"])
+        
+        assert result["channels_used"] == ["webhook"]
+        assert result["delivery_status"]["webhook"]["recipients"][f"{http_server.url}/hook"]["status"] == "sent"
+
+
+class TestNotificationCoalescer:
+    """Test digest coalescing."""
+    
+    def test_format_digest_collapses_repeats(self):
+        """Test digest text for repeated messages."""
+        assert format_digest(["only"]) == "only"
+        assert format_digest(["a failed", "b failed", "a failed"]) == (
+            "3 notifications:\n- a failed (x2)\n- b failed"
+        )
+    
+    def test_burst_is_sent_as_one_digest(self, dispatcher, http_server):
+        """Test that a burst inside the window becomes one send per recipient."""
+        coalescer = NotificationCoalescer(dispatcher, window=0.2)
+        hooks = [f"{http_server.url}/a", f"{http_server.url}/b"]
+        
+        for run in range(5):
+            status = coalescer.submit(f"Run {run} failed", hooks, ["webhook"])
+        
+        assert status["webhook"]["recipients"][hooks[0]] == {"status": "queued"}
+        deadline = time.monotonic() + 5
+        while len(http_server.requests) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        coalescer.close()
+        
+        assert sorted(path for path, _, _ in http_server.requests) == ["/a", "/b"]
+        assert http_server.requests[0][2]["message"].startswith("5 notifications:")
+    
+    def test_urgent_bypasses_window(self, dispatcher, http_server):
+        """Test that urgent notifications are sent immediately."""
+        coalescer = NotificationCoalescer(dispatcher, window=60)
+        
+        status = coalescer.submit("Down", [f"{http_server.url}/a"], ["webhook"], priority="urgent")
+        
+        assert status["webhook"]["status"] == "sent"
+        assert coalescer.pending() == 0
+        coalescer.close()
+    
+    def test_close_flushes_buffered_entries(self, dispatcher, http_server):
+        """Test that shutdown sends whatever is still buffered."""
+        coalescer = NotificationCoalescer(dispatcher, window=60)
+        coalescer.submit("one", [f"{http_server.url}/a"], ["webhook"], priority="low")
+        coalescer.submit("two", [f"{http_server.url}/a"], ["webhook"], priority="high")
+        
+        coalescer.close()
+        
+        assert coalescer.pending() == 0
+        assert sorted(body["priority"] for _, _, body in http_server.requests) == ["high", "low"]
+    
+    def test_failed_digest_is_retried_once_then_counted(self):
+        """Test that a raising send is buffered again, then dropped and counted."""
+        dispatcher = Mock()
+        dispatcher.dispatch.side_effect = [ConnectionError("down"), {"webhook": {"status": "sent"}}]
+        coalescer = NotificationCoalescer(dispatcher, window=60)
+        coalescer.submit("one", ["hook"], ["webhook"])
+        
+        assert coalescer.flush() == []
+        coalescer.submit("two", ["hook"], ["webhook"])
+        assert coalescer.pending() == 2
+        coalescer.flush()
+        
+        assert dispatcher.dispatch.call_args[0][0] == "2 notifications:\n- one\n- two"
+        
+        dispatcher.dispatch.side_effect = ConnectionError("down")
+        coalescer.submit("three", ["hook"], ["webhook"])
+        coalescer.close()
+        
+        assert (coalescer.pending(), coalescer.dropped_digests) == (0, 1)
@@ -0,0 +1,267 @@
+"""Unit tests for text preprocessing helpers."""
+
+import pickle
+
+import pytest
+
+from src.customer_flows.processing import batch as batch_module
+from src.customer_flows.processing import streaming as streaming_module
+from src.customer_flows.tasks import core_tasks
+from src.customer_flows.processing import (
+    BoundedTermCounter,
+    IDFTable,
+    KeywordExtractor,
+    ProcessedText,
+    iter_batches,
+    preprocess_batch,
+    preprocess_stream,
+)
+from src.customer_flows.tasks.core_tasks import preprocess_data, preprocess_data_batch
+
+
+@pytest.fixture
+def keyword_extractor(tmp_path, monkeypatch):
+    """Keyword extractor persisting its IDF table under a temporary directory."""
+    extractor = KeywordExtractor(IDFTable(tmp_path / "keyword_idf.json"))
+    for module in (batch_module, streaming_module, core_tasks):
+        monkeypatch.setattr(module, "get_keyword_extractor", lambda: extractor)
+    return extractor
+
+
+class TestProcessedText:
+    """Test the lazy single-document result."""
+    
+    def test_counters_match_eager_computation(self):
+        """Test counters against the string methods they replace."""
+        text = "Hello, World! 123 @#$"
+        
+        result = ProcessedText(text)
+        
+        assert result["original"] == text
+        assert result["length"] == len(text)
+        assert result["word_count"] == len(text.split())
+        assert result["character_count"] == len(text.replace(" ", ""))
+    
+    def test_derived_fields_built_on_first_access(self):
+        """Test that derived strings are lazy and cached."""
+        result = ProcessedText("Hello, World", derived=("uppercase", "clean_text"))
+        
+        assert result._cache == {}
+        assert result["uppercase"] == "HELLO, WORLD"
+        assert result["clean_text"] == "Hello World"
+        assert set(result._cache) == {"uppercase", "clean_text"}
+        assert "lowercase" not in result
+        with pytest.raises(KeyError):
+            result["lowercase"]
+    
+    def test_pickle_drops_derived_copies(self):
+        """Test that serialized results carry no derived strings."""
+        result = ProcessedText("some text", derived=("lowercase",))
+        result["lowercase"]
+        
+        restored = pickle.loads(pickle.dumps(result))
+        
+        assert restored._cache == {}
+        assert restored["lowercase"] == "some text"
+        assert restored == result
+    
+    def test_to_dict_excludes_derived_by_default(self):
+        """Test plain dictionary conversion."""
+        result = ProcessedText("abc", derived=("uppercase",))
+        
+        assert "uppercase" not in result.to_dict()
+        assert result.to_dict(include_derived=True)["uppercase"] == "ABC"
+    
+    def test_rejects_unknown_derived_field(self):
+        """Test validation of derived field names."""
+        with pytest.raises(ValueError):
+            ProcessedText("abc", derived=("reversed",))
+    
+    def test_preprocess_data_maps_options_to_fields(self, keyword_extractor):
+        """Test the preprocess_data task options."""
+        result = preprocess_data(
+            "Prefect orchestrates, CrewAI analyses!",
+            {"uppercase": True, "remove_punctuation": True, "extract_keywords": True},
+        )
+        
+        assert set(result) >= {"uppercase", "clean_text", "keywords", "metadata"}
+        assert "lowercase" not in result
+        assert result["clean_text"] == "Prefect orchestrates CrewAI analyses"
+        assert result["keywords"] == ["prefect", "orchestrates", "crewai", "analyses"]
+        assert keyword_extractor.idf.document_count == 1
+
+
+class TestPreprocessBatch:
+    """Test columnar batch preprocessing."""
+    
+    def test_columns_match_single_record_stats(self):
+        """Test that each column holds one entry per record."""
+        records = ["Hello World Test", "", "one  two"]
+        
+        result = preprocess_batch(records)
+        
+        assert result["record_count"] == 3
+        assert result["length"] == [len(r) for r in records]
+        assert result["word_count"] == [3, 0, 2]
+        assert result["character_count"] == [len(r.replace(" ", "")) for r in records]
+        assert "keywords" not in result
+    
+    def test_accepts_iterator_of_mappings(self, keyword_extractor):
+        """Test mapping records read from the configured text field."""
+        records = iter([{"body": "Prefect orchestrates workflows"}, {"body": None}])
+        
+        result = preprocess_batch(records, {"text_field": "body", "extract_keywords": True})
+        
+        assert result["record_count"] == 2
+        assert result["keywords"] == [["prefect", "orchestrates", "workflows"], []]
+    
+    def test_rejects_unsupported_records(self):
+        """Test that unsupported record types fail loudly."""
+        with pytest.raises(TypeError):
+            preprocess_batch([42])
+    
+    def test_task_returns_columnar_result(self):
+        """Test the Prefect task wrapper."""
+        result = preprocess_data_batch(["a b", "c"])
+        
+        assert result["word_count"] == [2, 1]
+
+
+class TestIterBatches:
+    """Test record batching."""
+    
+    def test_splits_stream_into_bounded_batches(self):
+        """Test batch sizes, including the trailing partial batch."""
+        batches = list(iter_batches(range(7), batch_size=3))
+        
+        assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    
+    def test_rejects_invalid_batch_size(self):
+        """Test that a non-positive batch size is rejected."""
+        with pytest.raises(ValueError):
+            list(iter_batches([1], batch_size=0))
+
+
+class TestPreprocessStream:
+    """Test bounded-memory streaming preprocessing."""
+    
+    TEXT = "Übergrößen  naïve café\nstreaming streaming chunks, across boundaries ünïcode " * 7
+    
+    def _split_bytes(self, data, size):
+        return [data[i:i + size] for i in range(0, len(data), size)]
+    
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+    def test_counts_independent_of_chunking(self, chunk_size, keyword_extractor):
+        """Test that tokens and multi-byte characters split across chunks count once."""
+        data = self.TEXT.encode("utf-8")
+        
+        options = {"extract_keywords": True, "update_keyword_stats": False}
+        result = preprocess_stream(self._split_bytes(data, chunk_size), options)
+        whole = preprocess_stream([data], options)
+        
+        assert result["length"] == len(self.TEXT)
+        assert result["word_count"] == len(self.TEXT.split())
+        assert result["character_count"] == len(self.TEXT.replace(" ", ""))
+        assert result["byte_count"] == len(data)
+        assert result["keyword_counts"] == whole["keyword_counts"]
+        assert result["keywords"][0] == "streaming"
+    
+    def test_memory_mapped_file(self, tmp_path):
+        """Test file input through the preprocess_data task."""
+        path = tmp_path / "export.log"
+        path.write_text(self.TEXT, encoding="utf-8")
+        
+        result = preprocess_data(str(path), {"input_mode": "file", "chunk_size": 5})
+        
+        assert result["word_count"] == len(self.TEXT.split())
+        assert result["length"] == len(self.TEXT)
+        assert "original" not in result
+    
+    def test_empty_file(self, tmp_path):
+        """Test that empty files, which cannot be mapped, are handled."""
+        path = tmp_path / "empty.txt"
+        path.write_bytes(b"")
+        
+        result = preprocess_stream(path)
+        
+        assert result["length"] == 0
+        assert result["word_count"] == 0
+
+
+class TestBoundedTermCounter:
+    """Test the capped term counter."""
+    
+    def test_vocabulary_stays_bounded(self):
+        """Test pruning keeps the most frequent terms."""
+        counter = BoundedTermCounter(max_terms=10)
+        counter.update(["frequent"] * 50)
+        counter.update(f"term{i:04d}" for i in range(100))
+        
+        assert len(counter) <= 10
+        assert counter.most_common(1) == [("frequent", 50)]
+        assert counter.pruned_terms > 0
+
+
+class TestKeywordExtractor:
+    """Test TF-IDF keyword ranking and persisted corpus statistics."""
+    
+    def test_ranks_by_term_frequency(self):
+        """Test that frequent terms rank first with an empty corpus."""
+        extractor = KeywordExtractor(limit=2)
+        
+        keywords = extractor.extract("apples bananas bananas cherry cherry cherry".split())
+        
+        assert keywords == ["cherry", "bananas"]
+    
+    def test_idf_downweights_common_terms(self):
+        """Test that terms seen in every document lose to distinctive ones."""
+        extractor = KeywordExtractor(limit=1)
+        extractor.idf.add_documents([{"report"}, {"report"}, {"report"}])
+        
+        assert extractor.extract("report report anomaly".split()) == ["anomaly"]
+    
+    def test_batch_updates_and_persists_statistics(self, keyword_extractor):
+        """Test that a batch is persisted once and reloaded incrementally."""
+        preprocess_batch(["shared alpha1", "shared beta22"], {"extract_keywords": True})
+        preprocess_batch(["shared gamma"], {"extract_keywords": True})
+        
+        reloaded = IDFTable(keyword_extractor.idf.path)
+        
+        assert reloaded.document_count == 3
+        assert reloaded.document_frequency["shared"] == 3
+        assert reloaded.document_frequency["alpha1"] == 1
+    
+    def test_retried_documents_are_counted_once(self, keyword_extractor):
+        """Test that processing the same records again leaves the statistics unchanged."""
+        records = ["shared alpha1", "shared beta22"]
+        preprocess_batch(records, {"extract_keywords": True})
+        preprocess_batch(records, {"extract_keywords": True})
+        keyword_extractor.extract("shared alpha1".split(), learn=True)
+        keyword_extractor.idf.save()
+        
+        reloaded = IDFTable(keyword_extractor.idf.path)
+        
+        assert reloaded.document_count == 2
+        assert reloaded.document_frequency["shared"] == 2
+    
+    def test_save_merges_concurrent_writers(self, tmp_path):
+        """Test that two tables sharing a file both contribute their deltas."""
+        path = tmp_path / "idf.json"
+        first, second = IDFTable(path), IDFTable(path)
+        first.add_documents([["terms"]])
+        second.add_documents([["terms"], ["other"]])
+        
+        first.save()
+        second.save()
+        
+        merged = IDFTable(path)
+        assert merged.document_count == 3
+        assert merged.document_frequency == {"terms": 2, "other": 1}
+    
+    def test_vocabulary_is_capped(self, tmp_path):
+        """Test that the persisted vocabulary keeps the most frequent terms."""
+        table = IDFTable(tmp_path / "idf.json", max_terms=2)
+        table.add_documents([["common", "rare1"], ["common", "rare2"], ["common", "next"], ["next"]])
+        table.save()
+        
+        assert IDFTable(table.path).document_frequency == {"common": 3, "next": 2}
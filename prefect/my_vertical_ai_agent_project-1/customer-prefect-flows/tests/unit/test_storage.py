@@ -0,0 +1,729 @@
+"""Unit tests for result storage."""
+
+import json
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.customer_flows.storage import (
+    ArchiveBackend,
+    CleanupEngine,
+    ContentAddressedStore,
+    DatabaseBackend,
+    LocalBackend,
+    PayloadRef,
+    PersistenceError,
+    ResultIndex,
+    RetentionPolicy,
+    S3Backend,
+    StorageBackend,
+    WriteBehindQueue,
+    canonical_json,
+    classify_resource,
+    content_digest,
+    enforce_retention,
+    iter_archive,
+    load_payload,
+    offload_payload,
+    persist_payload,
+    read_input,
+    read_manifest,
+    rebuild_index,
+    remove_segment,
+    select_expired,
+    write_concurrently,
+)
+from src.customer_flows.storage import archive as archive_module
+from src.customer_flows.storage.payloads import _MISSING, _PayloadCache
+from src.customer_flows.tasks.core_tasks import persist_results
+
+
+class TestContentAddressedStore:
+    """Test the content-addressed local store."""
+    
+    def test_canonical_json_ignores_key_order(self):
+        """Test that equal values hash identically."""
+        assert canonical_json({"b": 1, "a": [1, {"d": 2, "c": 3}]}) == canonical_json(
+            {"a": [1, {"c": 3, "d": 2}], "b": 1}
+        )
+    
+    def test_canonical_json_rejects_unknown_types(self):
+        """Test that objects without a deterministic encoding are not hashed by repr."""
+        with pytest.raises(TypeError):
+            canonical_json({"client": object()})
+    
+    def test_sharded_layout_and_full_digest(self, tmp_path):
+        """Test the blob path and contents."""
+        store = ContentAddressedStore(tmp_path)
+        
+        blob = store.put({"answer": 42})
+        
+        assert blob.digest == content_digest(b'{"answer":42}')
+        assert blob.path == tmp_path / blob.digest[:2] / blob.digest[2:4] / f"{blob.digest}.json"
+        assert json.loads(blob.path.read_text()) == {"answer": 42}
+        assert blob.written is True
+    
+    def test_identical_content_is_not_rewritten(self, tmp_path):
+        """Test deduplication of repeated writes."""
+        store = ContentAddressedStore(tmp_path)
+        first = store.put({"answer": 42})
+        
+        with patch("src.customer_flows.storage.content_store.tempfile.mkstemp") as mkstemp:
+            second = store.put({"answer": 42})
+        
+        mkstemp.assert_not_called()
+        assert second.written is False
+        assert second.path == first.path
+    
+    def test_failed_write_leaves_no_partial_blob(self, tmp_path):
+        """Test that interrupted writes are cleaned up."""
+        store = ContentAddressedStore(tmp_path)
+        
+        with patch("src.customer_flows.storage.content_store.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                store.put({"answer": 42})
+        
+        assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+
+
+class TestPayloadRefs:
+    """Test passing large payloads by reference."""
+    
+    def test_small_values_stay_inline(self, payload_store):
+        """Test that values under the threshold are not stored."""
+        assert offload_payload("short text", threshold=1024) == "short text"
+        assert not payload_store.root.exists()
+    
+    def test_large_values_are_stored_once(self, payload_store):
+        """Test that large values become small, deduplicated handles."""
+        text = "large document " * 1000
+        
+        ref = offload_payload(text, threshold=1024)
+        again = offload_payload(text, threshold=1024)
+        
+        assert isinstance(ref, PayloadRef)
+        assert ref == again
+        assert ref.type_name == "str"
+        assert len(list(payload_store.root.rglob("*.pkl"))) == 1
+        assert load_payload(ref) == text
+        assert load_payload("inline") == "inline"
+    
+    def test_payloads_are_indexed_and_expire(self, payload_store):
+        """Test that offloaded payloads are deleted by retention, never compacted."""
+        ref = offload_payload("large document " * 1000, threshold=1024)
+        offload_payload("large document " * 1000, threshold=1024)
+        [entry] = list(payload_store.index.oldest())
+        
+        assert (entry["kind"], entry["flow"]) == ("payload", "payloads")
+        assert entry["path"] == str(payload_store.path_for(ref.digest).resolve())
+        
+        summary = enforce_retention(payload_store.index, RetentionPolicy(max_entries=0), compact_to=Mock())
+        
+        assert (summary["removed_entries"], summary["compacted_entries"]) == (1, 0)
+        assert not payload_store.path_for(ref.digest).exists()
+    
+    def test_offloading_again_refreshes_the_age(self, payload_store):
+        """Test that a deduplicated offload keeps the payload from expiring."""
+        text = "large document " * 1000
+        ref = offload_payload(text, threshold=1024)
+        path = payload_store.path_for(ref.digest)
+        payload_store.index.record(path, ref.size, flow="payloads", kind="payload", created_at=time.time() - 2 * 86400)
+        
+        assert offload_payload(text, threshold=1024) == ref
+        summary = enforce_retention(payload_store.index, RetentionPolicy(max_age_days=1))
+        
+        assert summary["removed_entries"] == 0
+        assert load_payload(ref) == text
+    
+    def test_loaded_payload_cache_is_bounded_by_bytes(self):
+        """Test that large payloads are not pinned and old ones are evicted."""
+        cache = _PayloadCache(max_bytes=100)
+        cache.put("a", "first", 40)
+        cache.put("b", "second", 40)
+        cache.put("huge", "too large", 60)
+        cache.get("a")
+        cache.put("c", "third", 40)
+        
+        assert [cache.get(digest) for digest in ("a", "c")] == ["first", "third"]
+        assert cache.get("b") is _MISSING
+        assert cache.get("huge") is _MISSING
+    
+    def test_read_input_from_file_uri(self, tmp_path):
+        """Test that file:// inputs are read from disk."""
+        path = tmp_path / "input.txt"
+        path.write_text("text from a file", encoding="utf-8")
+        
+        assert read_input(path.as_uri()) == "text from a file"
+        assert read_input("plain text: not a uri") == "plain text: not a uri"
+        assert read_input("https://example.com") == "https://example.com"
+        assert read_input("note://not a supported scheme") == "note://not a supported scheme"
+    
+    def test_read_input_from_object_store(self, s3_client):
+        """Test that s3:// inputs are read through the shared S3 client."""
+        s3_client.put_object(Bucket="inputs", Key="docs/report.txt", Body=b"text from s3")
+        
+        with patch("src.customer_flows.storage.payloads.get_s3_client", return_value=s3_client):
+            assert read_input("s3://inputs/docs/report.txt") == "text from s3"
+
+
+class TestPersistResults:
+    """Test the persist_results task."""
+    
+    @pytest.fixture(autouse=True)
+    def result_index(self, tmp_path):
+        index = ResultIndex(tmp_path / "index.db")
+        with patch("src.customer_flows.storage.backends.get_result_index", return_value=index):
+            yield index
+        index.close()
+    
+    def test_local_backend_writes_content_addressed_blob(self, tmp_path):
+        """Test that the local backend writes and dedupes results."""
+        config = {"backends": ["local"], "local_path": str(tmp_path)}
+        
+        first = persist_results({"result": "ok"}, config)
+        second = persist_results({"result": "ok"}, config)
+        
+        assert first == second
+        assert first["local"].startswith("file://")
+        assert len([p for p in tmp_path.rglob("*.json")]) == 1
+    
+    def test_local_backend_records_blobs_in_index(self, tmp_path, result_index):
+        """Test that blobs are indexed once with their flow."""
+        config = {"backends": ["local"], "local_path": str(tmp_path / "results")}
+        result = {"result": "ok", "flow_metadata": {"flow_name": "example-analysis-flow"}}
+        
+        persist_results(result, config)
+        persist_results(result, config)
+        
+        [entry] = list(result_index.oldest())
+        assert entry["flow"] == "example-analysis-flow"
+        assert entry["size"] == len(canonical_json(result))
+    
+    def test_rewriting_a_blob_refreshes_its_age(self, tmp_path, result_index):
+        """Test that a deduplicated write keeps the blob from expiring."""
+        config = {"backends": ["local"], "local_path": str(tmp_path / "results")}
+        result = {"result": "ok"}
+        location = persist_results(result, config)["local"]
+        blob_path = ContentAddressedStore(tmp_path / "results").path_for(content_digest(canonical_json(result)))
+        result_index.record(blob_path, blob_path.stat().st_size, created_at=time.time() - 2 * 86400)
+        
+        assert persist_results(result, config)["local"] == location
+        summary = enforce_retention(result_index, RetentionPolicy(max_age_days=1))
+        
+        assert summary["removed_entries"] == 0
+        assert blob_path.exists()
+    
+    def test_local_and_s3_backends_are_written_together(self, tmp_path, s3_client):
+        """Test that every configured backend receives the payload."""
+        backends = {
+            "local": LocalBackend(ContentAddressedStore(tmp_path / "local")),
+            "s3": S3Backend("results-bucket", client=s3_client),
+        }
+        config = {"backends": ["local", "s3"]}
+        
+        with patch("src.customer_flows.tasks.core_tasks.get_backend", side_effect=lambda name, _: backends[name]):
+            locations = persist_results({"result": "ok"}, config)
+        
+        digest = content_digest(canonical_json({"result": "ok"}))
+        assert locations["s3"] == f"s3://results-bucket/customer-flows/results/{digest}.json"
+        assert locations["local"].startswith("file://")
+        assert json.loads((tmp_path / "s3" / "results-bucket" / "customer-flows" / "results" / f"{digest}.json").read_bytes()) == {"result": "ok"}
+
+
+class FlakyBackend(StorageBackend):
+    """Backend failing a fixed number of writes before succeeding."""
+    
+    name = "flaky"
+    
+    def __init__(self, failures):
+        self.failures = failures
+        self.written = []
+    
+    def location(self, digest):
+        return f"flaky://{digest}"
+    
+    def write(self, digest, payload):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("backend unavailable")
+        self.written.append(digest)
+        return self.location(digest)
+
+
+class TestConcurrentPersistence:
+    """Test concurrent and write-behind persistence."""
+    
+    def test_s3_backend_skips_existing_objects(self, s3_client):
+        """Test that content-addressed objects are uploaded once."""
+        backend = S3Backend("bucket", prefix="results/", client=s3_client)
+        
+        backend.write("abc", b"{}")
+        backend.write("abc", b"{}")
+        
+        assert [call for call in s3_client.calls if call[0] == "put_object"] == [("put_object", "results/abc.json")]
+    
+    def test_failures_are_reported_after_all_writes(self, tmp_path):
+        """Test that one failing backend does not prevent the others."""
+        local = LocalBackend(ContentAddressedStore(tmp_path))
+        payload = canonical_json({"a": 1})
+        
+        with pytest.raises(PersistenceError) as exc_info:
+            write_concurrently([local, FlakyBackend(failures=1)], content_digest(payload), payload)
+        
+        assert list(exc_info.value.failures) == ["flaky"]
+        assert local.store.exists(content_digest(payload))
+    
+    def test_write_behind_acknowledges_after_primary(self, tmp_path):
+        """Test that secondaries are flushed in the background with retries."""
+        local = LocalBackend(ContentAddressedStore(tmp_path / "local"))
+        flaky = FlakyBackend(failures=2)
+        write_queue = WriteBehindQueue(tmp_path / "spill.jsonl", retry_delay=0.01)
+        payload = canonical_json({"a": 1})
+        digest = content_digest(payload)
+        
+        with patch("src.customer_flows.storage.persistence.get_write_behind_queue", return_value=write_queue):
+            locations = persist_payload([local, flaky], digest, payload, write_behind=True)
+        
+        assert local.store.exists(digest)
+        assert locations["flaky"] == f"flaky://{digest}"
+        write_queue.join()
+        assert flaky.written == [digest]
+        assert write_queue.shutdown() == 0
+    
+    def test_unflushed_writes_are_spilled_and_replayed(self, tmp_path):
+        """Test durable spill on shutdown and replay on restart."""
+        spill_path = tmp_path / "spill.jsonl"
+        write_queue = WriteBehindQueue(spill_path, max_attempts=1)
+        write_queue.submit(FlakyBackend(failures=1), "abc", b'{"a":1}')
+        write_queue.join()
+        
+        assert write_queue.shutdown() == 1
+        assert json.loads(spill_path.read_text())["digest"] == "abc"
+        
+        recovered = FlakyBackend(failures=0)
+        restarted = WriteBehindQueue(spill_path)
+        restarted.register(recovered)
+        restarted.join()
+        
+        assert recovered.written == ["abc"]
+        assert not spill_path.exists()
+        restarted.shutdown()
+    
+    def test_write_behind_spills_uncommitted_writes(self, tmp_path):
+        """Test that a write whose commit fails is not counted as flushed."""
+        spill_path = tmp_path / "spill.jsonl"
+        write_queue = WriteBehindQueue(spill_path, max_attempts=2, retry_delay=0.01)
+        backend = FlakyBackend(failures=0)
+        backend.commit = Mock(side_effect=ConnectionError("commit failed"))
+        
+        write_queue.submit(backend, "abc", b'{"a":1}')
+        write_queue.join()
+        
+        assert backend.commit.call_count == 2
+        assert write_queue.shutdown() == 1
+        assert json.loads(spill_path.read_text())["digest"] == "abc"
+    
+    def test_write_behind_keeps_backends_of_one_kind_apart(self, tmp_path, s3_client):
+        """Test that two buckets are written and spilled separately."""
+        spill_path = tmp_path / "spill.jsonl"
+        write_queue = WriteBehindQueue(spill_path)
+        first = S3Backend("first", client=s3_client)
+        second = S3Backend("second", client=s3_client)
+    
+        write_queue.submit(first, "abc", b'{"a":1}')
+        write_queue.submit(second, "def", b'{"b":2}')
+        write_queue.join()
+        write_queue.shutdown()
+        write_queue.submit(second, "ghi", b'{"c":3}')
+    
+        assert (s3_client.root / "first" / first.key_for("abc")).exists()
+        assert (s3_client.root / "second" / second.key_for("def")).exists()
+        assert not (s3_client.root / "first" / first.key_for("def")).exists()
+        assert json.loads(spill_path.read_text())["backend"] == second.identity
+
+
+class TestDatabaseBackend:
+    """Test the pooled, batched database backend."""
+    
+    def _rows(self, backend):
+        with backend.pool.connection() as conn:
+            return conn.execute("SELECT digest, payload FROM results ORDER BY digest").fetchall()
+    
+    def test_bulk_writes_use_few_round_trips(self, tmp_path):
+        """Test that 10k results are inserted in batches."""
+        backend = DatabaseBackend(f"sqlite:///{tmp_path}/results.db", batch_size=500, wait_for_commit=False)
+        payloads = [canonical_json({"n": i}) for i in range(10_000)]
+        
+        locations = backend.write_many((content_digest(p), p) for p in payloads)
+        backend.flush()
+        
+        assert len(locations) == 10_000
+        assert len(self._rows(backend)) == 10_000
+        assert backend.batches_flushed <= 25
+        backend.close()
+    
+    def test_concurrent_writers_share_commits(self, tmp_path):
+        """Test group commit for writers waiting on their batch."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        backend = DatabaseBackend(f"sqlite:///{tmp_path}/results.db", flush_interval=0.05, wait_for_commit=True)
+        payloads = [canonical_json({"n": i}) for i in range(64)]
+        
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda p: backend.write(content_digest(p), p), payloads))
+        
+        assert len(self._rows(backend)) == 64
+        assert backend.batches_flushed < 64
+        backend.close()
+    
+    def test_parallel_writes_are_flushed_in_one_batch(self, tmp_path):
+        """Test that buffered writes return at once and share one insert."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        backend = DatabaseBackend(f"sqlite:///{tmp_path}/results.db", flush_interval=60)
+        payloads = [canonical_json({"n": i}) for i in range(64)]
+        
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda p: backend.write(content_digest(p), p), payloads))
+        assert backend.batches_flushed == 0
+        
+        assert backend.flush() == 64
+        assert backend.batches_flushed == 1
+        assert len(self._rows(backend)) == 64
+        backend.close()
+    
+    def test_duplicate_digests_are_ignored(self, tmp_path):
+        """Test that re-persisting identical results is a no-op."""
+        backend = DatabaseBackend(f"sqlite:///{tmp_path}/results.db", flush_interval=0, wait_for_commit=True)
+        payload = canonical_json({"result": "ok"})
+        
+        backend.write(content_digest(payload), payload)
+        location = backend.write(content_digest(payload), payload)
+        
+        assert location == f"db://results/{content_digest(payload)}"
+        assert [json.loads(row[1]) for row in self._rows(backend)] == [{"result": "ok"}]
+        backend.close()
+    
+    def test_persisted_results_share_batches(self, tmp_path):
+        """Test that persisting results one by one still batches the inserts."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        backend = DatabaseBackend(f"sqlite:///{tmp_path}/results.db", flush_interval=60)
+        payloads = [canonical_json({"n": i}) for i in range(1000)]
+        
+        for payload in payloads[:500]:
+            persist_payload([backend], content_digest(payload), payload)
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda p: persist_payload([backend], content_digest(p), p), payloads[500:]))
+        backend.commit()
+        
+        assert len(self._rows(backend)) == 1000
+        assert backend.batches_flushed == 2
+        
+        payload = canonical_json({"read": "after write"})
+        persist_payload([backend], content_digest(payload), payload, commit=True)
+        assert len(self._rows(backend)) == 1001
+        backend.close()
+    
+    def test_persist_results_uses_database_url(self, tmp_path):
+        """Test the database branch of persist_results."""
+        config = {"backends": ["database"], "database_url": f"sqlite:///{tmp_path}/results.db"}
+        
+        locations = persist_results({"result": "ok"}, config)
+        
+        assert locations["database"] == f"db://results/{content_digest(canonical_json({'result': 'ok'}))}"
+
+
+class TestArchiveBackend:
+    """Test the partitioned result archive."""
+    
+    def _flow_result(self, n):
+        return canonical_json({"n": n, "flow_metadata": {"flow_name": "example-analysis-flow"}})
+    
+    def test_results_are_partitioned_by_flow_and_date(self, tmp_path):
+        """Test partition layout, manifest and round trip."""
+        backend = ArchiveBackend(tmp_path, codec="gzip")
+        for n in range(3):
+            payload = self._flow_result(n)
+            backend.write(content_digest(payload), payload)
+        backend.close()
+        
+        [partition] = list(tmp_path.glob("flow=example-analysis-flow/date=*"))
+        manifest = read_manifest(partition)
+        
+        assert manifest["records"] == 3
+        assert [segment["file"] for segment in manifest["segments"]] == ["part-00000.jsonl.gz"]
+        assert [record["result"]["n"] for record in iter_archive(tmp_path, flow_name="example-analysis-flow")] == [0, 1, 2]
+    
+    def test_segments_roll_over_by_size(self, tmp_path):
+        """Test that full segments are closed and new ones started."""
+        backend = ArchiveBackend(tmp_path, codec="gzip", segment_bytes=1, frame_bytes=1)
+        for n in range(3):
+            payload = self._flow_result(n)
+            backend.write(content_digest(payload), payload)
+        backend.close()
+        
+        [partition] = list(tmp_path.glob("flow=*/date=*"))
+        
+        assert len(read_manifest(partition)["segments"]) == 3
+        assert len(list(iter_archive(tmp_path))) == 3
+    
+    def test_torn_frames_are_ignored(self, tmp_path):
+        """Test that bytes beyond the manifest are not read or kept."""
+        backend = ArchiveBackend(tmp_path, codec="gzip")
+        payload = self._flow_result(0)
+        backend.write(content_digest(payload), payload)
+        backend.flush()
+        [segment] = list(tmp_path.glob("flow=*/date=*/part-*"))
+        with open(segment, "ab") as f:
+            f.write(b"\x1f\x8b torn")
+        
+        assert len(list(iter_archive(tmp_path))) == 1
+        
+        payload = self._flow_result(1)
+        backend.write(content_digest(payload), payload)
+        backend.close()
+        
+        assert [record["result"]["n"] for record in iter_archive(tmp_path)] == [0, 1]
+    
+    def test_failed_flush_keeps_records_buffered(self, tmp_path):
+        """Test that records of a failed flush are written by the next one."""
+        backend = ArchiveBackend(tmp_path, codec="gzip", flush_interval=60)
+        for n in range(2):
+            payload = self._flow_result(n)
+            backend.write(content_digest(payload), payload)
+        
+        with patch("src.customer_flows.storage.archive._compress", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                backend.flush()
+        payload = self._flow_result(2)
+        backend.write(content_digest(payload), payload)
+        backend.close()
+        
+        assert [record["result"]["n"] for record in iter_archive(tmp_path)] == [0, 1, 2]
+    
+    def test_persisted_records_share_a_frame(self, tmp_path):
+        """Test that results persisted one by one are compressed together."""
+        backend = ArchiveBackend(tmp_path, codec="gzip", flush_interval=60)
+        for n in range(50):
+            payload = self._flow_result(n)
+            persist_payload([backend], content_digest(payload), payload)
+        assert not list(tmp_path.glob("flow=*/date=*"))
+        
+        with patch("src.customer_flows.storage.archive._compress", wraps=archive_module._compress) as compress:
+            backend.commit()
+        
+        assert compress.call_count == 1
+        assert len(list(iter_archive(tmp_path))) == 50
+        backend.close()
+    
+    def test_persisted_records_are_committed(self, tmp_path):
+        """Test that a committing persist only returns once records are on disk."""
+        backend = ArchiveBackend(tmp_path, codec="gzip", flush_interval=60)
+        payload = self._flow_result(0)
+        
+        persist_payload([backend], content_digest(payload), payload, commit=True)
+        
+        assert [record["result"]["n"] for record in iter_archive(tmp_path)] == [0]
+        backend.close()
+    
+    def test_zstd_segments(self, tmp_path):
+        """Test the default zstd codec."""
+        pytest.importorskip("zstandard")
+        backend = ArchiveBackend(tmp_path)
+        payload = self._flow_result(0)
+        backend.write(content_digest(payload), payload)
+        backend.close()
+        
+        assert list(tmp_path.glob("flow=*/date=*/part-00000.jsonl.zst"))
+        assert [record["digest"] for record in iter_archive(tmp_path)] == [content_digest(payload)]
+
+
+class TestCleanupEngine:
+    """Test type-aware batched cleanup."""
+    
+    def test_classify_resource(self):
+        """Test grouping of identifiers by type."""
+        assert classify_resource("/tmp/a.json") == ("file", "", "/tmp/a.json")
+        assert classify_resource("file:///tmp/a%20b.json") == ("file", "", "/tmp/a b.json")
+        assert classify_resource("s3://bucket/tmp/a.json") == ("s3", "bucket", "tmp/a.json")
+        assert classify_resource("s3://bucket/tmp/") == ("s3_prefix", "bucket", "tmp/")
+        assert classify_resource("db://results/abc") == ("db", "results", "abc")
+        assert classify_resource("ftp://host/x")[0] == "unsupported"
+    
+    def test_files_and_directories(self, tmp_path):
+        """Test local deletion, including already missing files."""
+        files = [tmp_path / f"{i}.tmp" for i in range(20)]
+        for path in files:
+            path.write_text("x")
+        (tmp_path / "dir").mkdir()
+        (tmp_path / "dir" / "nested").write_text("x")
+        resource_ids = [str(p) for p in files] + [(tmp_path / "dir").as_uri(), str(tmp_path / "missing")]
+        
+        result = CleanupEngine(local_root=tmp_path, allow_directories=True).run(resource_ids)
+        
+        assert result["cleanup_summary"]["successfully_cleaned"] == 22
+        assert result["failed_cleanups"] == []
+        assert list(tmp_path.iterdir()) == []
+        assert "resources_cleaned" not in result
+    
+    def test_local_deletions_are_confined_to_the_root(self, tmp_path):
+        """Test that paths outside the root and directories are refused."""
+        root = tmp_path / "storage"
+        (root / "dir").mkdir(parents=True)
+        (root / "dir" / "nested").write_text("x")
+        outside = tmp_path / "outside.json"
+        outside.write_text("x")
+        resource_ids = [
+            str(outside),
+            str(root / ".." / "outside.json"),
+            root.as_uri(),
+            (root / "dir").as_uri(),
+            str(root / "dir" / "nested"),
+        ]
+        
+        result = CleanupEngine(local_root=root).run(resource_ids)
+        
+        assert result["cleanup_summary"]["by_type"]["file"] == {"cleaned": 1, "failed": 4}
+        assert outside.exists()
+        assert (root / "dir").is_dir()
+        assert not (root / "dir" / "nested").exists()
+    
+    def test_s3_keys_are_deleted_in_batches(self, s3_client):
+        """Test multi-object deletes of at most 1000 keys."""
+        keys = [f"tmp/{i}.json" for i in range(2500)] + ["tmp/locked.json"]
+        
+        result = CleanupEngine(s3_client=s3_client).run([f"s3://bucket/{key}" for key in keys])
+        
+        assert sorted(n for op, n in s3_client.calls if op == "delete_objects") == [501, 1000, 1000]
+        assert result["cleanup_summary"]["by_type"]["s3"] == {"cleaned": 2500, "failed": 1}
+        assert result["failed_cleanups"] == [
+            {"resource_id": "s3://bucket/tmp/locked.json", "error": "AccessDenied: Access Denied"}
+        ]
+    
+    def test_s3_prefix_is_listed_and_deleted(self, s3_client):
+        """Test prefix deletion across listing pages."""
+        for i in range(3):
+            s3_client.put_object(Bucket="bucket", Key=f"runs/42/{i}.json", Body=b"{}")
+        s3_client.put_object(Bucket="bucket", Key="runs/43/0.json", Body=b"{}")
+        
+        result = CleanupEngine(s3_client=s3_client).run(["s3://bucket/runs/42/"])
+        
+        assert result["cleanup_summary"]["by_type"]["s3_prefix"]["cleaned"] == 3
+        assert [obj["Key"] for obj in s3_client.list_objects_v2(Bucket="bucket")["Contents"]] == ["runs/43/0.json"]
+    
+    def test_database_rows_and_capped_failures(self, tmp_path):
+        """Test DELETE ... IN batches and that failures are capped."""
+        url = f"sqlite:///{tmp_path}/results.db"
+        backend = DatabaseBackend(url, flush_interval=0)
+        payloads = [canonical_json({"n": i}) for i in range(1200)]
+        backend.write_many((content_digest(p), p) for p in payloads)
+        backend.flush()
+        resource_ids = [f"db://results/{content_digest(p)}" for p in payloads[:1100]]
+        resource_ids += [f"db://users/{i}" for i in range(5)]
+        
+        result = CleanupEngine(database_url=url, max_reported_failures=2).run(resource_ids)
+        
+        with backend.pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 100
+        assert result["cleanup_summary"]["by_type"]["db"] == {"cleaned": 1100, "failed": 5}
+        assert len(result["failed_cleanups"]) == 2
+        assert result["cleanup_summary"]["unreported_failures"] == 3
+        backend.close()
+
+
+class TestRetention:
+    """Test index-driven retention and compaction."""
+    
+    DAY = 86400
+    
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = ResultIndex(tmp_path / "index.db")
+        yield index
+        index.close()
+    
+    def _store(self, tmp_path, index, count, flow="example-analysis-flow", now=1_000_000.0):
+        store = ContentAddressedStore(tmp_path / "results")
+        paths = []
+        for n in range(count):
+            blob = store.put({"n": n, "flow_metadata": {"flow_name": flow}})
+            # One result per day, the last one stored today
+            index.record(blob.path, blob.size, flow=flow, created_at=now - (count - 1 - n) * self.DAY)
+            paths.append(blob.path)
+        return paths
+    
+    def test_select_expired_by_age_count_and_size(self, tmp_path, index):
+        """Test that each limit selects the oldest entries only."""
+        paths = self._store(tmp_path, index, 10)
+        size = paths[0].stat().st_size
+        now = 1_000_000.0
+        
+        def selected(**limits):
+            return [entry["path"] for entry in select_expired(index, RetentionPolicy(**limits), now=now)]
+        
+        assert selected(max_age_days=6.5) == [str(p) for p in paths[:3]]
+        assert selected(max_entries=8) == [str(p) for p in paths[:2]]
+        assert len(selected(max_total_bytes=size * 5)) == 5
+        assert len(selected(max_age_days=6.5, max_entries=5)) == 5
+        assert selected() == []
+        assert selected(max_entries=0, flow="other-flow") == []
+    
+    def test_enforce_deletes_expired_blobs(self, tmp_path, index):
+        """Test that expired blobs are deleted and unindexed."""
+        paths = self._store(tmp_path, index, 5)
+        
+        dry = enforce_retention(index, RetentionPolicy(max_entries=2), dry_run=True)
+        assert dry["expired_entries"] == 3
+        assert all(p.exists() for p in paths)
+        
+        summary = enforce_retention(index, RetentionPolicy(max_entries=2))
+        
+        assert summary["removed_entries"] == 3
+        assert summary["remaining"]["entries"] == 2
+        assert [p.exists() for p in paths] == [False, False, False, True, True]
+        assert enforce_retention(index, RetentionPolicy(max_entries=2))["expired_entries"] == 0
+    
+    def test_enforce_compacts_into_archive(self, tmp_path, index):
+        """Test that compacted blobs land in the archive under their creation date."""
+        paths = self._store(tmp_path, index, 3)
+        archive = ArchiveBackend(tmp_path / "archive", codec="gzip", index=index)
+        
+        summary = enforce_retention(index, RetentionPolicy(max_entries=1), compact_to=archive)
+        archive.close()
+        
+        assert summary["compacted_entries"] == 2
+        assert not paths[0].exists() and not paths[1].exists()
+        records = list(iter_archive(tmp_path / "archive", flow_name="example-analysis-flow"))
+        assert [record["result"]["n"] for record in records] == [0, 1]
+        assert len(list((tmp_path / "archive").glob("flow=*/date=*"))) == 2
+        # Remaining blob plus one indexed segment per partition
+        assert index.totals()["entries"] == 3
+    
+    def test_expired_segments_are_removed_from_manifest(self, tmp_path, index):
+        """Test that dropping a segment keeps the partition readable."""
+        archive = ArchiveBackend(tmp_path, codec="gzip", segment_bytes=1, frame_bytes=1, index=index)
+        for n in range(3):
+            payload = canonical_json({"n": n, "flow_metadata": {"flow_name": "example-analysis-flow"}})
+            archive.write(content_digest(payload), payload)
+        archive.close()
+        [partition] = list(tmp_path.glob("flow=*/date=*"))
+        first = partition / read_manifest(partition)["segments"][0]["file"]
+        size = first.stat().st_size
+        
+        assert remove_segment(first) == size
+        assert remove_segment(first) == 0
+        
+        assert not first.exists()
+        assert read_manifest(partition)["records"] == 2
+        assert [record["result"]["n"] for record in iter_archive(tmp_path)] == [1, 2]
+    
+    def test_rebuild_index_covers_existing_files(self, tmp_path, index):
+        """Test the one-time indexing of results stored before the index."""
+        store = ContentAddressedStore(tmp_path / "results")
+        store.put({"n": 1, "flow_metadata": {"flow_name": "example-analysis-flow"}})
+        store.put({"n": 2})
+        
+        assert rebuild_index(index, tmp_path / "results", tmp_path / "archive") == 2
+        assert sorted(entry["flow"] for entry in index.oldest()) == ["example-analysis-flow", "unknown"]
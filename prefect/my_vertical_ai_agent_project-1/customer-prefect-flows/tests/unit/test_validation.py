@@ -0,0 +1,170 @@
+"""Unit tests for data validation."""
+
+import pytest
+
+from src.customer_flows.tasks.core_tasks import validate_data, validate_data_batch, validate_table_data
+from src.customer_flows.validation import CompiledValidator, compile_rules, validate_table
+
+
+class TestCompiledValidator:
+    """Test compiled validation rules."""
+    
+    RULES = {
+        "required_fields": ["id", "customer.email"],
+        "types": {"id": "int", "score": ["int", "float"], "customer.email": "str"},
+        "ranges": {"score": {"min": 0, "max": 1}, "customer.email": {"min_length": 3}},
+    }
+    
+    def test_valid_record(self):
+        """Test a record that passes every rule."""
+        validator = CompiledValidator(self.RULES)
+        
+        assert validator.is_valid({"id": 1, "score": 0.5, "customer": {"email": "a@b.c"}})
+    
+    def test_nested_required_field_is_fatal(self):
+        """Test that missing nested fields stop validation."""
+        errors, _, performed = CompiledValidator(self.RULES).run({"id": "x", "customer": {}})
+        
+        assert errors == ["Missing required fields: ['customer.email']"]
+        assert performed == 3
+    
+    def test_type_and_range_errors_are_collected(self):
+        """Test that non-fatal errors are all reported."""
+        errors, _, _ = CompiledValidator(self.RULES).run(
+            {"id": True, "score": 3, "customer": {"email": "ab"}}
+        )
+        
+        assert errors == [
+            "Field 'id' must be of type int",
+            "Field 'score' above maximum: 1",
+            "Field 'customer.email' shorter than minimum length: 3",
+        ]
+    
+    def test_fail_fast_stops_on_first_error(self):
+        """Test the fail_fast option."""
+        errors, _, _ = CompiledValidator({**self.RULES, "fail_fast": True}).run(
+            {"id": True, "score": 3, "customer": {"email": "ab"}}
+        )
+        
+        assert errors == ["Field 'id' must be of type int"]
+    
+    def test_unknown_type_rejected_at_compile_time(self):
+        """Test that invalid specs fail when compiled, not per record."""
+        with pytest.raises(ValueError):
+            CompiledValidator({"types": {"id": "uuid"}})
+    
+    def test_compile_rules_reuses_validators(self):
+        """Test that identical specs share one compiled validator."""
+        assert compile_rules({"min_length": 1, "max_size": 9}) is compile_rules({"max_size": 9, "min_length": 1})
+    
+    def test_compile_rules_accepts_sets_and_tuples(self):
+        """Test that specs with sets and tuples compile and share a validator."""
+        validator = compile_rules({"required_fields": {"b", "a"}})
+        
+        assert validator is compile_rules({"required_fields": ("a", "b")})
+        assert validator is compile_rules({"required_fields": ["a", "b"]})
+        assert not validator.validate({"a": 1})["is_valid"]
+    
+    def test_validate_many_reports_only_failures(self):
+        """Test the batch summary."""
+        records = [{"id": i, "customer": {"email": "a@b.c"}} for i in range(5)] + [{"id": 5}]
+        
+        summary = CompiledValidator(self.RULES).validate_many(records, max_failures=10)
+        
+        assert summary["total"] == 6
+        assert summary["invalid"] == 1
+        assert summary["failures"] == [{"index": 5, "errors": ["Missing required fields: ['customer.email']"]}]
+        assert summary["failures_truncated"] is False
+
+
+class TestValidateDataTask:
+    """Test the validate_data task result format."""
+    
+    def test_result_format_unchanged(self):
+        """Test the legacy keys and messages."""
+        result = validate_data({"a": 1}, {"min_length": 100, "max_size": 2, "required_fields": ["b"]})
+        
+        assert result["is_valid"] is False
+        assert result["errors"] == ["Data length below minimum: 100", "Missing required fields: ['b']"]
+        assert result["warnings"] == ["Data size exceeds recommended maximum: 2"]
+        assert result["checks_performed"] == ["existence_check", "type_check", "custom_rules"]
+    
+    def test_non_dict_is_fatal(self):
+        """Test that non-dict input stops after the type check."""
+        result = validate_data(None, {"required_fields": ["a"]})
+        
+        assert result["errors"] == ["Data is empty or None", "Data must be a dictionary"]
+        assert result["checks_performed"] == ["existence_check", "type_check"]
+    
+    def test_batch_task(self):
+        """Test the batch validation task."""
+        summary = validate_data_batch([{"a": 1}, {}], {"required_fields": ["a"]})
+        
+        assert summary["valid"] == 1
+        assert summary["invalid"] == 1
+
+
+class TestValidateTable:
+    """Test columnar validation of tabular inputs."""
+    
+    RULES = {
+        "required_columns": ["id", "score", "region"],
+        "max_null_rate": {"score": 0.25},
+        "ranges": {"score": {"min": 0, "max": 1}},
+        "unique": ["id"],
+    }
+    
+    @pytest.fixture
+    def frame(self):
+        pd = pytest.importorskip("pandas")
+        return pd.DataFrame({"id": [1, 2, 2, 4], "score": [0.1, None, 1.5, -1.0]})
+    
+    def _assert_summary(self, result):
+        assert result["is_valid"] is False
+        assert result["row_count"] == 4
+        assert result["errors"] == ["Missing required columns: ['region']"]
+        assert result["columns"]["id"]["duplicate_count"] == 1
+        assert result["columns"]["score"]["null_count"] == 1
+        assert result["columns"]["score"]["below_min"] == 1
+        assert result["columns"]["score"]["above_max"] == 1
+        assert len(result["columns"]["score"]["errors"]) == 2
+    
+    def test_pandas_frame(self, frame):
+        """Test vectorized checks on a DataFrame via validate_data."""
+        self._assert_summary(validate_data(frame, self.RULES))
+    
+    def test_arrow_table(self, frame):
+        """Test the same checks on an Arrow table."""
+        pa = pytest.importorskip("pyarrow")
+        
+        self._assert_summary(validate_table(pa.Table.from_pandas(frame, preserve_index=False), self.RULES))
+    
+    def test_parquet_and_csv_files(self, frame, tmp_path):
+        """Test file inputs through the table validation task."""
+        pytest.importorskip("pyarrow")
+        frame.to_parquet(tmp_path / "extract.parquet")
+        frame.to_csv(tmp_path / "extract.csv", index=False)
+        
+        self._assert_summary(validate_table_data(str(tmp_path / "extract.parquet"), self.RULES))
+        self._assert_summary(validate_table_data(str(tmp_path / "extract.csv"), self.RULES))
+    
+    def test_pandas_labels_are_matched_exactly(self):
+        """Test that int and MultiIndex column labels are not stringified."""
+        pd = pytest.importorskip("pandas")
+        frame = pd.DataFrame({1: [1, 1], ("score", "raw"): [0.5, 2.0]})
+        rules = {
+            "required_columns": [1, "1"],
+            "ranges": {("score", "raw"): {"max": 1}},
+            "unique": [1],
+        }
+        
+        result = validate_table(frame, rules)
+        
+        assert result["errors"] == ["Missing required columns: ['1']"]
+        assert result["columns"][1]["duplicate_count"] == 1
+        assert result["columns"][("score", "raw")]["above_max"] == 1
+    
+    def test_unknown_rule_rejected(self, frame):
+        """Test that record-only rules are not silently ignored."""
+        with pytest.raises(ValueError):
+            validate_table(frame, {"types": {"id": "int"}})